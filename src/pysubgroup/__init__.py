@@ -1,12 +1,16 @@
 # flake8: noqa
 from pysubgroup.algorithms import *
 from pysubgroup.binary_target import *
+from pysubgroup.chunked import *
 from pysubgroup.constraints import *
+from pysubgroup.cover_cache import *
+from pysubgroup.dataset_index import *
 from pysubgroup.fi_target import *
-from pysubgroup.gp_growth import GpGrowth
+from pysubgroup.gp_growth import GpGrowth, GpTransactions
 from pysubgroup.measures import *
 from pysubgroup.model_target import EMM_Likelihood, PolyRegression_ModelClass
 from pysubgroup.numeric_target import *
+from pysubgroup.parallel import *
 from pysubgroup.refinement_operator import *
 from pysubgroup.representations import *
 from pysubgroup.subgroup_description import *
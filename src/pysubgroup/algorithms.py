@@ -5,18 +5,15 @@ Created on 29.04.2016
 """
 import copy
 import warnings
-from collections import Counter, defaultdict, namedtuple
+from collections import namedtuple
 from heapq import heappop, heappush
-from itertools import chain, combinations
+from itertools import chain, combinations, islice
 from math import factorial
 
-import time
 import numpy as np
 
 import pysubgroup as ps
 
-from multiprocessing import Pool
-
 
 class SubgroupDiscoveryTask:
     """
@@ -58,28 +55,139 @@ def constraints_satisfied(constraints, subgroup, statistics=None, data=None):
     )
 
 
-try:  # pragma: no cover
-    from numba import (  # pylint: disable=import-error, import-outside-toplevel
-        int32,
-        int64,
-        njit,
+def cover_batch_size(row_nbytes, max_nbytes):
+    """Number of covers of row_nbytes bytes each which fit into max_nbytes"""
+    return max(1, max_nbytes // max(1, row_nbytes))
+
+
+def calculate_statistics_batched(task, subgroups, max_nbytes=1 << 26):
+    """
+    Computes the statistics of all subgroups. If the quality function provides
+    calculate_statistics_batch, the covers of the subgroups are stacked into
+    matrices of at most max_nbytes bytes, which are evaluated at once, and the
+    result is one namedtuple with an array per statistic. Otherwise it is the
+    list of the statistics of each subgroup. subgroups must not be empty.
+    """
+    if not hasattr(task.qf, "calculate_statistics_batch"):
+        return [
+            task.qf.calculate_statistics(sg, task.target, task.data) for sg in subgroups
+        ]
+    batch_size = cover_batch_size(len(task.data), max_nbytes)
+    batches = []
+    for start in range(0, len(subgroups), batch_size):
+        covers = ps.get_cover_matrix(
+            subgroups[start : start + batch_size], len(task.data), task.data
+        )
+        batches.append(
+            task.qf.calculate_statistics_batch(covers, task.target, task.data)
+        )
+    if len(batches) == 1:
+        return batches[0]
+    return batches[0].__class__._make(
+        np.concatenate(columns) for columns in zip(*batches)
     )
 
-    @njit([(int32[:, :], int64[:])], cache=True)
-    def getNewCandidates(candidates, hashes):  # pragma: no cover
-        result = []
-        for i in range(len(candidates) - 1):
-            for j in range(i + 1, len(candidates)):
-                if hashes[i] == hashes[j]:
-                    if np.all(candidates[i, :-1] == candidates[j, :-1]):
-                        result.append((i, j))
-        return result
 
-except ImportError:  # pragma: no cover
-    pass
+def statistics_row(statistics, i):
+    """Returns the statistics of subgroup i from calculate_statistics_batched"""
+    if isinstance(statistics, list):
+        return statistics[i]
+    return statistics.__class__._make(column[i] for column in statistics)
+
+
+def evaluate_batched(task, subgroups, statistics):
+    """Returns the qualities of subgroups given calculate_statistics_batched"""
+    if not isinstance(statistics, list) and hasattr(task.qf, "evaluate_batch"):
+        return np.asarray(task.qf.evaluate_batch(statistics))
+    return np.array(
+        [
+            task.qf.evaluate(sg, task.target, task.data, statistics_row(statistics, i))
+            for i, sg in enumerate(subgroups)
+        ]
+    )
+
+
+def _sorted_row_runs(rows, n_key_columns):
+    """
+    Sorts the rows of an integer matrix lexicographically. Returns the order of
+    the rows, the sorted rows and a mask marking the sorted rows which start a
+    new run of rows that agree in their first n_key_columns columns.
+    """
+    order = np.lexsort(rows.T[::-1])
+    sorted_rows = rows[order]
+    is_start = np.ones(len(rows), dtype=bool)
+    is_start[1:] = np.any(
+        sorted_rows[1:, :n_key_columns] != sorted_rows[:-1, :n_key_columns], axis=1
+    )
+    return order, sorted_rows, is_start
+
+
+def apriori_join(candidates):
+    """
+    Joins the pairs of rows of candidates which agree in all but their last
+    column. candidates is a matrix of selector ids, each row sorted ascending.
+    The joined rows are grouped by their prefix in the order of its first
+    appearance in candidates and are sorted by their last two ids within a group.
+    Returns the joined rows and the indices of the two rows each was joined from.
+    """
+    n, k = candidates.shape
+    if n == 0:
+        return (
+            np.empty((0, k + 1), dtype=candidates.dtype),
+            np.empty((0, 2), dtype=np.int64),
+        )
+    order, rows, is_start = _sorted_row_runs(candidates, k - 1)
+    starts = np.flatnonzero(is_start)
+    sizes = np.diff(np.append(starts, n))
+    group_order = np.argsort(np.minimum.reduceat(order, starts), kind="stable")
+    starts = starts[group_order]
+    sizes = sizes[group_order]
+    # the sorted positions of the rows, group after group
+    positions = np.arange(n) + np.repeat(starts - np.cumsum(sizes) + sizes, sizes)
+    # each row is joined with the rows after it in its group
+    n_pairs = np.repeat(starts + sizes, sizes) - positions - 1
+    left = np.repeat(positions, n_pairs)
+    right = (
+        left
+        + 1
+        + np.arange(len(left))
+        - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+    )
+    joined = np.column_stack((rows[left], rows[right, -1]))
+    return joined, np.column_stack((order[left], order[right]))
+
+
+def apriori_prune(joined, candidates):
+    """
+    Returns a mask of the rows of joined for which all subsets with one id less
+    are rows of candidates.
+    """
+    n, k = joined.shape
+    # leaving out one of the last two ids gives the joined candidates
+    if n == 0 or k <= 2:
+        return np.ones(n, dtype=bool)
+    subsets = np.concatenate([np.delete(joined, c, axis=1) for c in range(k - 2)])
+    order, _, is_start = _sorted_row_runs(np.concatenate((candidates, subsets)), k - 1)
+    run = np.cumsum(is_start) - 1
+    is_candidate = np.zeros(run[-1] + 1, dtype=bool)
+    is_candidate[run[order < len(candidates)]] = True
+    found = np.empty(len(order), dtype=bool)
+    found[order] = is_candidate[run]
+    return found[len(candidates) :].reshape(k - 2, n).all(axis=0)
 
 
 class Apriori:
+    """
+    Implements a level-wise search. The candidates of a level are kept as a
+    matrix of the ids of their selectors, from which the candidates of the next
+    level are joined and pruned with NumPy. use_numba is only kept for
+    compatibility.
+    If the conjunctions of the representation are bitsets, the covers of a
+    level are kept as a matrix as well, and the cover of a candidate of the
+    next level is computed from the covers of the two candidates it was joined
+    from.
+    """
+
     def __init__(
         self, representation_type=None, combination_name="Conjunction", use_numba=True
     ):
@@ -90,21 +198,12 @@ class Apriori:
         self.representation_type = representation_type
         self.use_vectorization = True
         self.optimistic_estimate_name = "optimistic_estimate"
-        self.next_level = self.get_next_level
-        self.compiled_func = None
-        if use_numba:  # pragma: no cover
-            try:
-                import numba  # pylint: disable=unused-import, import-outside-toplevel # noqa: F401, E501
-
-                self.next_level = self.get_next_level_numba
-                print("Apriori: Using numba for speedup")
-            except ImportError:
-                pass
+        self.use_numba = use_numba
 
     def get_next_level_candidates(self, task, result, next_level_candidates):
         promising_candidates = []
         optimistic_estimate_function = getattr(task.qf, self.optimistic_estimate_name)
-        for sg in next_level_candidates:
+        for i, sg in enumerate(next_level_candidates):
             statistics = task.qf.calculate_statistics(sg, task.target, task.data)
             ps.add_if_required(
                 result,
@@ -122,26 +221,23 @@ class Apriori:
             ) and ps.constraints_satisfied(
                 task.constraints_monotone, sg, statistics, task.data
             ):
-                promising_candidates.append((optimistic_estimate, sg.selectors))
+                promising_candidates.append((optimistic_estimate, i))
         min_quality = ps.minimum_required_quality(result, task)
         promising_candidates = [
-            selectors
-            for estimate, selectors in promising_candidates
-            if estimate > min_quality
+            i for estimate, i in promising_candidates if estimate > min_quality
         ]
         return promising_candidates
 
     def get_next_level_candidates_vectorized(self, task, result, next_level_candidates):
         promising_candidates = []
-        statistics = []
         optimistic_estimate_function = getattr(task.qf, self.optimistic_estimate_name)
-        next_level_candidates = list(next_level_candidates)
         if len(next_level_candidates) == 0:
             return []
-        for sg in next_level_candidates:
-            statistics.append(task.qf.calculate_statistics(sg, task.target, task.data))
-        tpl_class = statistics[0].__class__
-        vec_statistics = tpl_class._make(np.array(tpl) for tpl in zip(*statistics))
+        statistics = calculate_statistics_batched(task, next_level_candidates)
+        vec_statistics = statistics
+        if isinstance(statistics, list):
+            tpl_class = statistics[0].__class__
+            vec_statistics = tpl_class._make(np.array(tpl) for tpl in zip(*statistics))
         qualities = task.qf.evaluate(
             slice(None), task.target, task.data, vec_statistics
         )
@@ -149,54 +245,42 @@ class Apriori:
             None, None, None, vec_statistics
         )
 
-        for sg, quality, stats in zip(next_level_candidates, qualities, statistics):
-            ps.add_if_required(result, sg, quality, task, statistics=stats)
+        # the required quality only grows while adding, so only the statistics
+        # of the candidates which may be added are taken apart
+        required = ps.minimum_required_quality(result, task)
+        for i in np.flatnonzero(np.asarray(qualities) >= required):
+            if qualities[i] >= ps.minimum_required_quality(result, task):
+                ps.add_if_required(
+                    result,
+                    next_level_candidates[i],
+                    qualities[i],
+                    task,
+                    statistics=statistics_row(statistics, i),
+                )
 
         min_quality = ps.minimum_required_quality(result, task)
-        for sg, optimistic_estimate in zip(next_level_candidates, optimistic_estimates):
+        for i, optimistic_estimate in enumerate(optimistic_estimates):
             if optimistic_estimate >= min_quality:
-                promising_candidates.append(sg.selectors)
+                promising_candidates.append(i)
         return promising_candidates
 
-    def get_next_level_numba(self, promising_candidates):  # pragma: no cover
-        if not hasattr(self, "compiled_func") or self.compiled_func is None:
-            self.compiled_func = getNewCandidates
-
-        all_selectors = Counter(chain.from_iterable(promising_candidates))
-        all_selectors_ids = {selector: i for i, selector in enumerate(all_selectors)}
-        promising_candidates_selector_ids = [
-            tuple(all_selectors_ids[sel] for sel in selectors)
-            for selectors in promising_candidates
-        ]
-        shape1 = len(promising_candidates_selector_ids)
-        if shape1 == 0:
-            return []
-        shape2 = len(promising_candidates_selector_ids[0])
-        arr = np.array(promising_candidates_selector_ids, dtype=np.int32).reshape(
-            shape1, shape2
-        )
-
-        print(len(arr))
-        hashes = np.array(
-            [hash(tuple(x[:-1])) for x in promising_candidates_selector_ids],
-            dtype=np.int64,
-        )
-        print(len(arr), arr.dtype, hashes.dtype)
-        candidates_int = self.compiled_func(arr, hashes)
-        return [
-            (*promising_candidates[i], promising_candidates[j][-1])
-            for i, j in candidates_int
-        ]
-
     def get_next_level(self, promising_candidates):
-        by_prefix_dict = defaultdict(list)
-        for sg in promising_candidates:
-            by_prefix_dict[tuple(sg[:-1])].append(sg[-1])
-        return [
-            prefix + real_suffix
-            for prefix, suffixes in by_prefix_dict.items()
-            for real_suffix in combinations(sorted(suffixes), 2)
-        ]
+        """
+        Returns the candidates of the next level as a matrix of selector ids,
+        given the promising candidates of the current level as such a matrix,
+        and the indices of the two promising candidates each was joined from
+        """
+        joined, parents = apriori_join(promising_candidates)
+        keep = apriori_prune(joined, promising_candidates)
+        return joined[keep], parents[keep]
+
+    @staticmethod
+    def detach_covers(result, level_covers):
+        """Copies the covers of subgroups in result which are rows of level_covers"""
+        for _, sg, _ in result:
+            representation = getattr(sg, "representation", None)
+            if getattr(representation, "base", None) is level_covers:
+                sg.representation = representation.copy()
 
     def execute(self, task):
         if not isinstance(
@@ -211,14 +295,28 @@ class Apriori:
         with self.representation_type(task.data, task.search_space) as representation:
             combine_selectors = getattr(representation.__class__, self.combination_name)
             result = []
+            # the candidates are kept as rows of ids of the selectors sorted
+            selectors = sorted(set(task.search_space))
+            selector_ids = {sel: i for i, sel in enumerate(selectors)}
             # init the first level
             next_level_candidates = []
+            candidate_ids = []
             for sel in task.search_space:
                 sg = combine_selectors([sel])
                 if ps.constraints_satisfied(
                     task.constraints_monotone, sg, None, task.data
                 ):
                     next_level_candidates.append(sg)
+                    candidate_ids.append(selector_ids[sel])
+            candidate_ids = np.array(candidate_ids, dtype=np.int64).reshape(-1, 1)
+            from_representation = getattr(
+                combine_selectors, "from_representation", None
+            )
+            level_covers = None
+            if from_representation is not None and next_level_candidates:
+                level_covers = np.vstack(
+                    [sg.representation for sg in next_level_candidates]
+                )
 
             # level-wise search
             depth = 1
@@ -232,27 +330,36 @@ class Apriori:
                     promising_candidates = self.get_next_level_candidates(
                         task, result, next_level_candidates
                     )
+                if level_covers is not None:
+                    self.detach_covers(result, level_covers)
                 if len(promising_candidates) == 0:
                     break
 
                 if depth == task.depth:
                     break
 
-                next_level_candidates_no_pruning = self.next_level(promising_candidates)
-
-                # select those selectors and build a subgroup from them
+                # the next level consists of those joined candidates
                 #   for which all subsets of length depth (=candidate length -1)
-                #   are in the set of promising candidates
-                curr_depth = depth  # WARNING: need copy of depth for lazy eval
-                set_promising_candidates = set(tuple(p) for p in promising_candidates)
-                next_level_candidates = (
-                    combine_selectors(selectors)
-                    for selectors in next_level_candidates_no_pruning
-                    if all(
-                        (subset in set_promising_candidates)
-                        for subset in combinations(selectors, curr_depth)
-                    )
+                #   are promising candidates
+                candidate_ids, parents = self.get_next_level(
+                    candidate_ids[promising_candidates]
                 )
+                if level_covers is None:
+                    next_level_candidates = [
+                        combine_selectors([selectors[i] for i in row])
+                        for row in candidate_ids.tolist()
+                    ]
+                else:
+                    # the covers of the current level are freed once those of
+                    #   the next level are computed from them
+                    level_covers = level_covers[promising_candidates]
+                    level_covers = np.bitwise_and(
+                        level_covers[parents[:, 0]], level_covers[parents[:, 1]]
+                    )
+                    next_level_candidates = [
+                        from_representation([selectors[i] for i in row], cover)
+                        for row, cover in zip(candidate_ids.tolist(), level_covers)
+                    ]
 
                 depth = depth + 1
 
@@ -261,7 +368,31 @@ class Apriori:
 
 
 class BestFirstSearch:
+    """
+    Implements best first search, the subgroups are refined in the order of
+    their optimistic estimates.
+
+    With batch_expansion=True the refinements of a node are evaluated as one
+    batch: their covers are computed from the stacked covers of the selectors
+    and the statistics, qualities and optimistic estimates of as many
+    refinements as their covers fit into max_nbytes bytes are computed by
+    single calls to the quality function, if it provides
+    calculate_statistics_batch, evaluate_batch and optimistic_estimate_batch.
+    The result is the same as without batches, up to the rounding of the
+    batched statistics.
+    With n_pop > 1, up to n_pop nodes are taken from the queue and expanded
+    together. This still yields the best subgroups, but subgroups of equal
+    quality may be returned in place of each other.
+    """
+
+    def __init__(self, batch_expansion=False, n_pop=1, max_nbytes=1 << 26):
+        self.batch_expansion = batch_expansion or n_pop > 1
+        self.n_pop = n_pop
+        self.max_nbytes = max_nbytes
+
     def execute(self, task):
+        if self.batch_expansion:
+            return self.execute_batched(task)
         result = []
         queue = [(float("-inf"), ps.Conjunction([]))]
         operator = ps.StaticSpecializationOperator(task.search_space)
@@ -304,6 +435,106 @@ class BestFirstSearch:
         result = ps.prepare_subgroup_discovery_result(result, task)
         return ps.SubgroupDiscoveryResult(result, task)
 
+    def execute_batched(self, task):
+        result = []
+        queue = [(float("-inf"), ps.Conjunction([]))]
+        operator = ps.StaticSpecializationOperator(task.search_space)
+        task.qf.calculate_constant_statistics(task.data, task.target)
+        selector_index = {sel: i for i, sel in enumerate(task.search_space)}
+        selector_covers = ps.get_boolean_cover_matrix(
+            ps.get_cover_matrix(task.search_space, len(task.data), task.data),
+            len(task.data),
+        )
+        while queue:
+            q, old_description = heappop(queue)
+            if not -q > ps.minimum_required_quality(result, task):
+                break
+            nodes = [old_description]
+            while (
+                queue
+                and len(nodes) < self.n_pop
+                and -queue[0][0] > ps.minimum_required_quality(result, task)
+            ):
+                nodes.append(heappop(queue)[1])
+
+            node_covers = np.ones((len(nodes), len(task.data)), dtype=bool)
+            candidates = []
+            parent_inds = []
+            selector_inds = []
+            for i, node in enumerate(nodes):
+                if node.depth > 0:
+                    node_selectors = [selector_index[sel] for sel in node._selectors]
+                    np.logical_and.reduce(
+                        selector_covers[node_selectors], axis=0, out=node_covers[i]
+                    )
+                for candidate_description in operator.refinements(node):
+                    candidates.append(candidate_description)
+                    parent_inds.append(i)
+                    selector_inds.append(
+                        selector_index[candidate_description._selectors[-1]]
+                    )
+
+            batch_size = cover_batch_size(len(task.data), self.max_nbytes)
+            for start in range(0, len(candidates), batch_size):
+                stop = start + batch_size
+                covers = (
+                    selector_covers[selector_inds[start:stop]]
+                    & node_covers[parent_inds[start:stop]]
+                )
+                self._add_candidates(
+                    task, result, queue, candidates[start:stop], covers
+                )
+
+        result = ps.prepare_subgroup_discovery_result(result, task)
+        return ps.SubgroupDiscoveryResult(result, task)
+
+    @staticmethod
+    def _add_candidates(task, result, queue, candidates, covers):
+        qf = task.qf
+        if hasattr(qf, "calculate_statistics_batch"):
+            statistics = qf.calculate_statistics_batch(covers, task.target, task.data)
+        else:
+            statistics = [
+                qf.calculate_statistics(cover_arr, task.target, task.data)
+                for cover_arr in covers
+            ]
+        batched = not isinstance(statistics, list)
+        qualities = evaluate_batched(task, candidates, statistics)
+        depths = np.array([len(sg) for sg in candidates])
+        if batched and hasattr(qf, "optimistic_estimate_batch"):
+            estimates = qf.optimistic_estimate_batch(statistics)
+        elif hasattr(qf, "optimistic_estimate"):
+            estimates = np.array(
+                [
+                    qf.optimistic_estimate(
+                        sg, task.target, task.data, statistics_row(statistics, i)
+                    )
+                    if depth < task.depth
+                    else -np.inf
+                    for i, (sg, depth) in enumerate(zip(candidates, depths))
+                ],
+                dtype=float,
+            )
+        else:
+            estimates = np.full(len(candidates), np.inf)
+
+        # the required quality only grows while adding, so candidates below
+        # the current one would neither be added to the result nor the queue
+        required = ps.minimum_required_quality(result, task)
+        relevant = (qualities >= required) | (
+            (depths < task.depth) & (estimates >= required)
+        )
+        for i in np.flatnonzero(relevant):
+            sg = candidates[i]
+            stats = statistics_row(statistics, i)
+            ps.add_if_required(result, sg, qualities[i], task, statistics=stats)
+            if depths[i] < task.depth:
+                if estimates[i] >= ps.minimum_required_quality(result, task):
+                    if ps.constraints_satisfied(
+                        task.constraints_monotone, sg, stats, task.data
+                    ):
+                        heappush(queue, (-estimates[i], sg))
+
 
 class GeneralisingBFS:  # pragma: no cover
     def __init__(self):
@@ -369,52 +600,32 @@ class GeneralisingBFS:  # pragma: no cover
 class BeamSearch:
     """
     Implements the BeamSearch algorithm. Its a basic implementation
-    """
 
-    class PoolArgs(object):
-        def __init__(self, last_sg, selector_idx):
-            super().__init__()
-            self.last_sg = last_sg
-            self.selector_idx = selector_idx
-
-    class PoolResult(object):
-        def __init__(self, sg, quality, statistics):
-            super().__init__()
-            self.sg_inds = sg
-            self.quality = quality
-            self.statistics = statistics
-
-    def init_worker(task):
-        BeamSearch.task = task
-        # BeamSearch.task.search_space = BeamSearch.task.search_space.copy()
-        BeamSearch.task.data = BeamSearch.task.data.copy() # copying the data, releases some bottleneck for multiprocessing
-
-    task = None
+    The candidates of all beam members of a depth level are evaluated at once.
+    With an executor (a ps.SharedCoverPool) they are evaluated by its worker
+    processes; the executor is not closed, so it can be reused by later runs.
+    With nproc > 1 and no executor, a SharedCoverPool is created for each run.
+    """
 
-    def __init__(self, beam_width=20, beam_width_adaptive=False, nproc=0):
+    def __init__(
+        self, beam_width=20, beam_width_adaptive=False, nproc=0, executor=None
+    ):
         self.beam_width = beam_width
         self.beam_width_adaptive = beam_width_adaptive
         self.nproc = nproc
+        self.executor = executor
 
-    def _process_subgroup(self, args):
-        # print('worker, id(task)={}'.format(id(BeamSearch.task)))
-        last_sg = args.last_sg
-        task = BeamSearch.task
-
-        if args.selector_idx in last_sg:
-            return None
-        # if sel in last_sg.selectors:
-        #     return None
-
-        sg_inds = last_sg + [args.selector_idx,]
-        sg = ps.sg_from_inds(task.search_space, sg_inds)
-        # sg = ps.Conjunction(last_sg.selectors + (sel,))
-        statistics = task.qf.calculate_statistics(
-            sg, task.target, task.data
-        )
-        quality = task.qf.evaluate(sg, task.target, task.data, statistics)
-
-        return BeamSearch.PoolResult(sg_inds, quality, statistics)
+    @staticmethod
+    def _evaluate_candidates(task, candidates_inds):
+        candidates = [
+            ps.sg_from_inds(task.search_space, sg_inds) for sg_inds in candidates_inds
+        ]
+        if not candidates:
+            return
+        statistics = calculate_statistics_batched(task, candidates)
+        qualities = evaluate_batched(task, candidates, statistics)
+        for i, (sg_inds, quality) in enumerate(zip(candidates_inds, qualities)):
+            yield sg_inds, quality, statistics_row(statistics, i)
 
     def execute(self, task):
         # adapt beam width to the result set size if desired
@@ -443,81 +654,58 @@ class BeamSearch:
         ]
         previous_beam = None
 
-        pool = None
-        if self.nproc > 1:
-            pool = Pool(self.nproc, initializer=BeamSearch.init_worker, initargs=(task,))
-
-        dt_map = 0
-        dt_add_if = 0
+        pool = self.executor
+        if pool is None and self.nproc > 1:
+            pool = ps.SharedCoverPool(self.nproc)
+        if pool is not None:
+            pool.prepare(task)
 
         depth = 0
         while beam != previous_beam and depth < task.depth:
             previous_beam = beam.copy()
 
+            # candidates of all beam members, descriptions which were already
+            # visited would be skipped by add_if_required_inds anyway
+            candidates_inds = []
+            level_visited = set(visited)
             for _, last_sg_inds, _ in previous_beam:
-                # sg_hash = str(sorted(last_sg_inds))
-                # if sg_hash in visited:
-                #     continue
-                # visited.add(sg_hash)
-
-                # if getattr(last_sg, "visited", False):
-                #     continue
-                # setattr(last_sg, "visited", True)
-
-                if pool is not None:
-                    # results = pool.map
-                    dt_map_t0 = time.time()
-                    dt_add_if_ = 0
-                    for result in pool.imap_unordered(self._process_subgroup, [BeamSearch.PoolArgs(last_sg_inds, i) for i in range(len(task.search_space))], chunksize=20): #len(task.search_space)//self.nproc):
-                        if result is None:
-                            continue
-
-                        dt = time.time()
-                        ps.add_if_required(
-                            beam,
-                            visited,
-                            result.sg_inds,
-                            result.quality,
-                            task,
-                            check_for_duplicates=True,
-                            statistics=result.statistics,
-                            explicit_result_set_size=beam_width,
-                        )
-                        dt_add_if_ += time.time() - dt
-
-                    dt_map = (time.time() - dt_map_t0) - dt_add_if_
-                    # dt_add_if = dt_add_if_
-
-                    # print('dt for map: ', dt_map)
-                    # print('dt for add_if: ', dt_add_if_)
-                else:
-                    for sel in task.search_space:
-                        # create a clone
-                        if sel in last_sg.selectors:
-                            continue
-                        sg = ps.Conjunction(last_sg.selectors + (sel,))
-                        statistics = task.qf.calculate_statistics(
-                            sg, task.target, task.data
-                        )
-                        quality = task.qf.evaluate(sg, task.target, task.data, statistics)
-                        ps.add_if_required(
-                            beam,
-                            sg,
-                            quality,
-                            task,
-                            check_for_duplicates=True,
-                            statistics=statistics,
-                            explicit_result_set_size=beam_width,
-                        )
+                for selector_idx in range(len(task.search_space)):
+                    if selector_idx in last_sg_inds:
+                        continue
+                    sg_inds = last_sg_inds + [selector_idx]
+                    sg_hash = str(sorted(sg_inds))
+                    if sg_hash not in level_visited:
+                        level_visited.add(sg_hash)
+                        candidates_inds.append(sg_inds)
+
+            if pool is not None:
+                evaluated = pool.imap(candidates_inds)
+            else:
+                evaluated = self._evaluate_candidates(task, candidates_inds)
+            for sg_inds, quality, statistics in evaluated:
+                ps.add_if_required_inds(
+                    beam,
+                    visited,
+                    sg_inds,
+                    quality,
+                    task,
+                    check_for_duplicates=True,
+                    statistics=statistics,
+                    explicit_result_set_size=beam_width,
+                )
             depth += 1
             print('BeamSearch depth: [{}/{}]'.format(depth, task.depth))
 
-        if pool is not None:
+        if pool is not None and pool is not self.executor:
             pool.close()
 
-            # convert results
-            for i in range(len(beam)):
-                beam[i] = (beam[i][0], ps.sg_from_inds(task.search_space, beam[i][1]), beam[i][2])
+        # convert results
+        for i in range(len(beam)):
+            beam[i] = (
+                beam[i][0],
+                ps.sg_from_inds(task.search_space, beam[i][1]),
+                beam[i][2],
+            )
 
         # result = beam[-task.result_set_size:]
         while len(beam) > task.result_set_size:
@@ -590,8 +778,9 @@ class BeamSearch:
 
 
 class SimpleSearch:
-    def __init__(self, show_progress=True):
+    def __init__(self, show_progress=True, max_nbytes=1 << 26):
         self.show_progress = show_progress
+        self.max_nbytes = max_nbytes
 
     def execute(self, task):
         task.qf.calculate_constant_statistics(task.data, task.target)
@@ -619,33 +808,66 @@ class SimpleSearch:
                 warnings.warn(
                     "tqdm not installed but show_progress=True", ImportWarning
                 )
-        for selectors in all_selectors:
-            sg = ps.Conjunction(selectors)
-            statistics = task.qf.calculate_statistics(sg, task.target, task.data)
-            quality = task.qf.evaluate(sg, task.target, task.data, statistics)
-            ps.add_if_required(result, sg, quality, task, statistics=statistics)
+        all_selectors = iter(all_selectors)
+        # the covers of a batch of candidates take at most max_nbytes bytes
+        batch_size = cover_batch_size(len(task.data), self.max_nbytes)
+        while True:
+            candidates = [
+                ps.Conjunction(selectors)
+                for selectors in islice(all_selectors, batch_size)
+            ]
+            if not candidates:
+                break
+            statistics = calculate_statistics_batched(task, candidates, self.max_nbytes)
+            qualities = evaluate_batched(task, candidates, statistics)
+            # the required quality only grows while adding
+            required = ps.minimum_required_quality(result, task)
+            for i in np.flatnonzero(qualities >= required):
+                ps.add_if_required(
+                    result,
+                    candidates[i],
+                    qualities[i],
+                    task,
+                    statistics=statistics_row(statistics, i),
+                )
         result = ps.prepare_subgroup_discovery_result(result, task)
         return ps.SubgroupDiscoveryResult(result, task)
 
 
 class SimpleDFS:
+    """
+    Exhaustive depth-first search over all combinations of selectors.
+
+    Each subgroup is refined by adding a selector to it, so with a
+    representation (ps.BitSetRepresentation by default) the cover of a child
+    is computed by a single intersection with the cover of its parent.
+    """
+
+    def __init__(self, apply_representation=None):
+        if apply_representation is None:
+            apply_representation = ps.BitSetRepresentation
+        self.apply_representation = apply_representation
+
     def execute(self, task, use_optimistic_estimates=True):
         task.qf.calculate_constant_statistics(task.data, task.target)
-        result = self.search_internal(
-            task, [], task.search_space, [], use_optimistic_estimates
-        )
+        with self.apply_representation(task.data, task.search_space) as representation:
+            result = self.search_internal(
+                task,
+                representation.Conjunction([]),
+                task.search_space,
+                [],
+                use_optimistic_estimates,
+            )
         result = ps.prepare_subgroup_discovery_result(result, task)
         return ps.SubgroupDiscoveryResult(result, task)
 
     def search_internal(
-        self, task, prefix, modification_set, result, use_optimistic_estimates
+        self, task, sg, modification_set, result, use_optimistic_estimates
     ):
-        sg = ps.Conjunction(copy.copy(prefix))
-
         statistics = task.qf.calculate_statistics(sg, task.target, task.data)
         if (
             use_optimistic_estimates
-            and len(prefix) < task.depth
+            and sg.depth < task.depth
             and isinstance(task.qf, ps.BoundedInterestingnessMeasure)
         ):
             optimistic_estimate = task.qf.optimistic_estimate(
@@ -660,16 +882,17 @@ class SimpleDFS:
             task.constraints_monotone, sg, statistics=statistics, data=task.data
         ):
             return result
-        if len(prefix) < task.depth:
+        if sg.depth < task.depth:
             new_modification_set = copy.copy(modification_set)
             for sel in modification_set:
-                prefix.append(sel)
                 new_modification_set.pop(0)
                 self.search_internal(
-                    task, prefix, new_modification_set, result, use_optimistic_estimates
+                    task,
+                    sg & sel,
+                    new_modification_set,
+                    result,
+                    use_optimistic_estimates,
                 )
-                # remove the sel again
-                prefix.pop(-1)
         return result
 
 
@@ -677,13 +900,19 @@ class DFS:
     """
     Implementation of a depth-first-search
     with look-ahead using a provided datastructure.
+
+    With nproc > 1 the subtrees below depth split_depth are searched by a pool
+    of nproc worker processes, see ps.parallel_dfs. The result is the same as
+    that of the sequential search.
     """
 
-    def __init__(self, apply_representation=None):
+    def __init__(self, apply_representation=None, nproc=0, split_depth=2):
         self.target_bitset = None
         if apply_representation is None:
             apply_representation = ps.BitSetRepresentation
         self.apply_representation = apply_representation
+        self.nproc = nproc
+        self.split_depth = split_depth
         self.operator = None
         self.params_tpl = namedtuple(
             "StandardQF_parameters", ("size_sg", "positives_count")
@@ -694,7 +923,17 @@ class DFS:
         task.qf.calculate_constant_statistics(task.data, task.target)
         result = []
         with self.apply_representation(task.data, task.search_space) as representation:
-            self.search_internal(task, result, representation.Conjunction([]))
+            if self.nproc > 1:
+                result = ps.parallel_dfs(
+                    task,
+                    representation,
+                    self.apply_representation,
+                    self.operator,
+                    self.nproc,
+                    self.split_depth,
+                )
+            else:
+                self.search_internal(task, result, representation.Conjunction([]))
         result = ps.prepare_subgroup_discovery_result(result, task)
         return ps.SubgroupDiscoveryResult(result, task)
 
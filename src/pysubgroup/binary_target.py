@@ -14,6 +14,7 @@ from pysubgroup.measures import (
     GeneralizationAwareQF_stats,
 )
 
+from .representations import pack_bitset, popcount
 from .subgroup_description import EqualitySelector, get_cover_array_and_size
 from .utils import BaseTarget, derive_effective_sample_size
 
@@ -130,6 +131,7 @@ class SimplePositivesQF(
     def __init__(self):
         # self.dataset_statistics = None
         self.positives = None
+        self.packed_positives = None
         self.has_constant_statistics = False
         self.required_stat_attrs = ("size_sg", "positives_count")
 
@@ -138,6 +140,7 @@ class SimplePositivesQF(
     def calculate_constant_statistics(self, data, target):
         assert isinstance(target, BinaryTarget)
         self.positives = target.covers(data)
+        self.packed_positives = None
         # self.dataset_statistics = SimplePositivesQF.tpl(
         #     len(data), np.sum(self.positives)
         # )
@@ -158,6 +161,14 @@ class SimplePositivesQF(
     def calculate_statistics(
         self, subgroup, target, data, statistics=None
     ):  # pylint: disable=unused-argument
+        if getattr(subgroup, "is_packed", False):
+            # popcount of cover & positives, no boolean indexing required
+            if self.packed_positives is None:
+                self.packed_positives = pack_bitset(self.positives)
+            return PositivesQF_parameters(
+                subgroup.size_sg,
+                popcount(subgroup.representation & self.packed_positives),
+            )
         cover_arr, size_sg = get_cover_array_and_size(
             subgroup, len(self.positives), data
         )
@@ -167,12 +178,35 @@ class SimplePositivesQF(
         return PositivesQF_parameters(
             size_sg, np.count_nonzero(self.positives[cover_arr])
         )
-        
+
+    def calculate_statistics_batch(
+        self, covers, target, data
+    ):  # pylint: disable=unused-argument
+        """
+        Computes the statistics of many subgroups at once. covers is a 2-D
+        (subgroups x instances) matrix as returned by get_cover_matrix,
+        the result contains one array per statistic.
+        """
+        if covers.dtype == np.uint64:
+            if self.packed_positives is None:
+                self.packed_positives = pack_bitset(self.positives)
+            return PositivesQF_parameters(
+                popcount(covers, axis=-1),
+                popcount(covers & self.packed_positives, axis=-1),
+            )
+        return PositivesQF_parameters(
+            np.count_nonzero(covers, axis=1),
+            np.count_nonzero(covers & self.positives, axis=1),
+        )
 
     # <<< GpGrowth >>>
     def gp_get_stats(self, row_index):
         return np.array([1, self.positives[row_index]], dtype=int)
 
+    def gp_get_stats_batch(self, row_indices):
+        positives = self.positives[row_indices]
+        return np.column_stack([np.ones(len(positives), dtype=int), positives])
+
     def gp_get_null_vector(self):
         return np.zeros(2)
 
@@ -193,6 +227,10 @@ class SimplePositivesQF(
     def gp_requires_cover_arr(self):
         return False
 
+    @property
+    def gp_merge_is_additive(self):
+        return True
+
 
 # TODO Make ChiSquared useful for real nominal data not just binary
 #      Introduce Enum for direction
@@ -413,6 +451,29 @@ class StandardQF(SimplePositivesQF, BoundedInterestingnessMeasure):
             statistics.positives_count,
         )
 
+    def evaluate_batch(self, statistics):
+        """Quality of many subgroups given statistics from calculate_statistics_batch"""
+        dataset = self.dataset_statistics
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return StandardQF.standard_qf(
+                self.a,
+                dataset.size_sg,
+                dataset.positives_count,
+                np.asarray(statistics.size_sg),
+                np.asarray(statistics.positives_count),
+            )
+
+    def optimistic_estimate_batch(self, statistics):
+        dataset = self.dataset_statistics
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return StandardQF.standard_qf(
+                self.a,
+                dataset.size_sg,
+                dataset.positives_count,
+                np.asarray(statistics.positives_count),
+                np.asarray(statistics.positives_count),
+            )
+
     def optimistic_generalisation(self, subgroup, target, data, statistics=None):
         statistics = self.ensure_statistics(subgroup, target, data, statistics)
         dataset = self.dataset_statistics
@@ -0,0 +1,376 @@
+"""
+Subgroup discovery on data which is read in chunks of rows, e.g. from files
+which do not fit into memory:
+
+    source = ps.ChunkedDataSource("data.csv", chunksize=100_000)
+    search_space = source.create_selectors(ignore=["class"])
+    target = ps.BinaryTarget("class", "bad")
+    with source.build_store(search_space, target) as store:
+        task = ps.SubgroupDiscoveryTask(store, target, search_space, qf=ps.WRAccQF())
+        result = ps.DFS(ps.PackedBitSetRepresentation).execute(task)
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import pysubgroup as ps
+
+_FILE_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+_NULL = object()
+
+
+class ChunkedDataSource:
+    """
+    Streams a table as DataFrames of (at most) chunksize rows, from a CSV,
+    Parquet or Feather file or from a callable which returns an iterable of
+    DataFrames. Parquet and Feather files are read with pyarrow.
+
+    Each iteration reads the source again, only one chunk is held in memory.
+    """
+
+    def __init__(
+        self, source, chunksize=1 << 16, file_format=None, columns=None, **read_kwargs
+    ):
+        if file_format is None and not callable(source):
+            file_format = _FILE_FORMATS.get(os.path.splitext(str(source))[1].lower())
+        if not callable(source) and file_format not in ("csv", "parquet", "feather"):
+            raise ValueError(
+                f"file_format was {file_format} which is not in (csv, parquet, feather)"
+            )
+        self.source = source
+        self.chunksize = chunksize
+        self.file_format = file_format
+        self.columns = columns
+        self.read_kwargs = read_kwargs
+        self.n_instances = None
+
+    def __iter__(self):
+        n_instances = 0
+        for chunk in self._read():
+            n_instances += len(chunk)
+            yield chunk
+        self.n_instances = n_instances
+
+    def _read(self):
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        if callable(self.source):
+            for chunk in self.source():
+                yield chunk if self.columns is None else chunk[self.columns]
+        elif self.file_format == "csv":
+            with pd.read_csv(
+                self.source,
+                chunksize=self.chunksize,
+                usecols=self.columns,
+                **self.read_kwargs,
+            ) as reader:
+                yield from reader
+        elif self.file_format == "parquet":
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+            for batch in pq.ParquetFile(self.source).iter_batches(
+                batch_size=self.chunksize, columns=self.columns
+            ):
+                yield batch.to_pandas(**self.read_kwargs)
+        else:
+            for batch in self._feather_batches():
+                for offset in range(0, batch.num_rows, self.chunksize):
+                    yield batch.slice(offset, self.chunksize).to_pandas(
+                        **self.read_kwargs
+                    )
+
+    def _feather_batches(self):
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+
+        with pa.memory_map(str(self.source)) as f:
+            reader = pa.ipc.open_file(f)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if self.columns is not None:
+                    batch = batch.select(self.columns)
+                yield batch
+
+    def count_rows(self):
+        """Returns the number of rows, reading the source only if required"""
+        if self.n_instances is None:
+            if self.file_format == "parquet" and not callable(self.source):
+                import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+                self.n_instances = pq.ParquetFile(self.source).metadata.num_rows
+            elif self.file_format == "feather" and not callable(self.source):
+                self.n_instances = sum(b.num_rows for b in self._feather_batches())
+            else:
+                for _ in self:
+                    pass
+        return self.n_instances
+
+    def create_selectors(
+        self, nbins=5, intervals_only=True, ignore=None, sketch_size=4096
+    ):
+        """Creates the selectors of ps.create_selectors in one pass over the
+        source, see ps.create_numeric_selectors_from_chunks"""
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        if ignore is None:
+            ignore = []
+        nominal_values = None
+        is_bool = {}
+
+        def observe_nominal_values(chunks):
+            nonlocal nominal_values
+            for chunk in chunks:
+                if nominal_values is None:
+                    nominal_columns = chunk.select_dtypes(exclude=["number"]).columns
+                    nominal_values = {
+                        attr_name: {}
+                        for attr_name in nominal_columns
+                        if attr_name not in ignore
+                    }
+                for attr_name, values in nominal_values.items():
+                    is_bool[attr_name] = chunk.dtypes[attr_name] == "bool"
+                    for value in pd.unique(chunk[attr_name]):
+                        values.setdefault(_NULL if pd.isnull(value) else value, value)
+                yield chunk
+
+        numeric_selectors = ps.create_numeric_selectors_from_chunks(
+            observe_nominal_values(iter(self)),
+            nbins,
+            intervals_only,
+            ignore=ignore,
+            sketch_size=sketch_size,
+        )
+        selectors = []
+        for attr_name, values in (nominal_values or {}).items():
+            nominal_selectors = [
+                ps.EqualitySelector(attr_name, value) for value in values.values()
+            ]
+            if is_bool[attr_name]:
+                for sel in nominal_selectors:
+                    sel.is_bool = True
+            selectors.extend(nominal_selectors)
+        selectors.extend(numeric_selectors)
+        return selectors
+
+    def build_store(self, search_space, target=None, directory=None):
+        """Computes the covers of the search space chunk by chunk, see
+        ps.ChunkedCoverStore"""
+        return ChunkedCoverStore.build(self, search_space, target, directory)
+
+
+def _aligned_chunks(chunks, multiple=64):
+    """Re-slices chunks such that all of them but the last one have a multiple
+    of `multiple` rows"""
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    rest = None
+    for chunk in chunks:
+        if rest is not None and len(rest) > 0:
+            chunk = pd.concat([rest, chunk])
+        n_aligned = len(chunk) - len(chunk) % multiple
+        if n_aligned > 0:
+            yield chunk.iloc[:n_aligned]
+        rest = chunk.iloc[n_aligned:]
+    if rest is not None and len(rest) > 0:
+        yield rest
+
+
+class ChunkedCoverStore:
+    """
+    Packed covers (see ps.pack_bitset) of a fixed list of selectors together
+    with the numeric columns of a target, computed chunk by chunk and stored
+    in memory-mapped files.
+
+    A ChunkedCoverStore can be passed as `data` of a SubgroupDiscoveryTask.
+    The covers of its selectors, and of conjunctions and negations of them,
+    are read from the files, and the stored columns can be indexed like the
+    columns of a DataFrame, such that the quality functions aggregate their
+    statistics over the whole dataset. With ps.PackedBitSetRepresentation the
+    covers of the selectors are used without copying them into memory.
+
+    The files are removed on close() unless directory was given.
+    """
+
+    def __init__(self, directory, n_instances, selectors, covers, columns, owned):
+        self.directory = directory
+        self.n_instances = n_instances
+        self.selectors = selectors
+        self.packed_covers = covers
+        self.column_arrays = columns
+        self._owned = owned
+        self._rows = {selector: i for i, selector in enumerate(selectors)}
+
+    @classmethod
+    def build(cls, source, search_space, target=None, directory=None):
+        """Writes the covers of search_space (and of the target selector, if
+        any) and the numeric target columns of the chunks of source"""
+        owned = directory is None
+        if owned:
+            directory = tempfile.mkdtemp(prefix="pysubgroup_")
+        else:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            return cls._build(source, search_space, target, directory, owned)
+        except BaseException:
+            if owned:
+                shutil.rmtree(directory, ignore_errors=True)
+            raise
+
+    @classmethod
+    def _build(cls, source, search_space, target, directory, owned):
+        # pylint: disable=too-many-locals
+        selectors = list(dict.fromkeys(search_space))
+        target_selector = getattr(target, "target_selector", None)
+        if target_selector is not None and target_selector not in selectors:
+            selectors.append(target_selector)
+        attributes = [] if target is None else target.get_attributes()
+
+        n_instances = source.count_rows()
+        n_words = (n_instances + 63) // 64
+        covers = np.lib.format.open_memmap(
+            os.path.join(directory, "covers.npy"),
+            mode="w+",
+            dtype=np.uint64,
+            shape=(len(selectors), n_words),
+        )
+        columns = {}
+        n_rows = 0
+        for chunk in _aligned_chunks(source):
+            if n_rows + len(chunk) > n_instances:
+                raise ValueError("the source returned more rows than counted before")
+            if n_rows == 0:
+                numeric = set(chunk.select_dtypes(include=["number"]).columns)
+                for i, attribute in enumerate(a for a in attributes if a in numeric):
+                    columns[attribute] = np.lib.format.open_memmap(
+                        os.path.join(directory, f"column_{i}.npy"),
+                        mode="w+",
+                        dtype=np.float64,
+                        shape=(n_instances,),
+                    )
+            words = slice(n_rows // 64, (n_rows + len(chunk) + 63) // 64)
+            for i, selector in enumerate(selectors):
+                covers[i, words] = ps.pack_bitset(selector.covers(chunk))
+            for attribute, column in columns.items():
+                column[n_rows : n_rows + len(chunk)] = chunk[attribute].to_numpy(
+                    dtype=np.float64, na_value=np.nan
+                )
+            n_rows += len(chunk)
+        if n_rows != n_instances:
+            raise ValueError("the source returned fewer rows than counted before")
+        covers.flush()
+        for column in columns.values():
+            column.flush()
+        with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "n_instances": n_instances,
+                    "selectors": [repr(selector) for selector in selectors],
+                    "columns": list(columns),
+                },
+                f,
+            )
+        return cls(
+            directory,
+            n_instances,
+            selectors,
+            np.load(os.path.join(directory, "covers.npy"), mmap_mode="r"),
+            {
+                attribute: np.load(
+                    os.path.join(directory, f"column_{i}.npy"), mmap_mode="r"
+                )
+                for i, attribute in enumerate(columns)
+            },
+            owned,
+        )
+
+    def __len__(self):
+        return self.n_instances
+
+    def __contains__(self, selector):
+        return selector in self._rows
+
+    def packed_cover(self, selector):
+        """Returns the packed cover of a stored selector (read-only, on disk)"""
+        if selector not in self._rows:
+            raise KeyError(f"the cover of {selector} is not in the store")
+        return self.packed_covers[self._rows[selector]]
+
+    def covers(self, selector):
+        """Computes the boolean cover of selector"""
+        if selector in self._rows:
+            return ps.unpack_bitset(self.packed_cover(selector), self.n_instances)
+        return selector.compute_covers(self)
+
+    def __getitem__(self, attribute):
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        if attribute not in self.column_arrays:
+            raise KeyError(f"the column {attribute} is not in the store")
+        return pd.Series(self.column_arrays[attribute], name=attribute, copy=False)
+
+    def rows(self, selectors, block_words=1 << 10):
+        """Returns the instances x selectors matrix of the covers of selectors"""
+        return PackedRows(
+            [self.packed_cover(selector) for selector in selectors],
+            self.n_instances,
+            block_words,
+        )
+
+    def close(self):
+        self.packed_covers = None
+        self.column_arrays = {}
+        if self._owned:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PackedRows:
+    """
+    Boolean instances x selectors matrix, which is unpacked from the packed
+    covers of the selectors in blocks of block_words * 64 instances while it is
+    iterated. Columns are unpacked on access with matrix[:, j].
+    """
+
+    def __init__(self, packed_covers, n_instances, block_words=1 << 10):
+        self.packed_covers = packed_covers
+        self.n_instances = n_instances
+        self.block_words = block_words
+        self.shape = (n_instances, len(packed_covers))
+
+    def __len__(self):
+        return self.n_instances
+
+    def iter_blocks(self):
+        """Yields the matrix in blocks of consecutive instances"""
+        n_words = (self.n_instances + 63) // 64
+        for start in range(0, n_words, self.block_words):
+            stop = min(start + self.block_words, n_words)
+            n_block = min(stop * 64, self.n_instances) - start * 64
+            words = np.empty((len(self.packed_covers), stop - start), dtype=np.uint64)
+            for i, cover in enumerate(self.packed_covers):
+                words[i] = cover[start:stop]
+            yield ps.unpack_bitset(words, n_block).T
+
+    def __iter__(self):
+        for block in self.iter_blocks():
+            yield from block
+
+    def __getitem__(self, key):
+        rows, column = key
+        if rows != slice(None):
+            raise IndexError("only whole columns can be accessed")
+        return ps.unpack_bitset(self.packed_covers[column], self.n_instances)
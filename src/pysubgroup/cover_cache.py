@@ -0,0 +1,364 @@
+"""
+Opt-in cache for the covers of selectors.
+
+While a SelectorCoverCache is active, the covers of all selectors are looked up
+in the cache before they are computed from the data, e.g.
+
+    with ps.SelectorCoverCache(max_nbytes=1 << 30) as cache:
+        ps.BeamSearch().execute(task)
+        ps.DFS().execute(task)
+    print(cache.hits, cache.misses)
+
+A PersistentCoverStore keeps the covers on disk between runs instead.
+"""
+import hashlib
+import itertools
+import json
+import os
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+import pysubgroup as ps
+
+
+def data_fingerprint(data):
+    """Digest of the column names, dtypes, index and values of a DataFrame"""
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((list(data.columns), [str(t) for t in data.dtypes])).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().data)
+    return digest.hexdigest()
+
+
+class SelectorCoverCache:
+    """
+    Maps (selector, data) to the cover of the selector on data.
+
+    Entries are evicted in least recently used order once the covers take more
+    than max_nbytes bytes. With packed=True the covers are stored as packed
+    bitsets (see ps.pack_bitset), which take an eighth of the memory, and are
+    unpacked on every hit.
+
+    With fingerprint="identity" a DataFrame is identified by the object itself
+    and its entries are dropped when it is garbage collected. With
+    fingerprint="content" equal DataFrames share their entries, the fingerprint
+    of a DataFrame is computed once per object. In both cases a DataFrame must
+    not be modified in place while the cache is active, use clear() otherwise.
+
+    The cached covers are read-only.
+    """
+
+    def __init__(self, max_nbytes=1 << 28, packed=False, fingerprint="identity"):
+        if fingerprint not in ("identity", "content"):
+            raise ValueError(
+                f"fingerprint was {fingerprint} which is not in (identity, content)"
+            )
+        self.max_nbytes = max_nbytes
+        self.packed = packed
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        # maps id(data) to (weakref(data), key of data)
+        self._data_keys = {}
+        self._previous = None
+
+    def _data_key(self, data):
+        data_id = id(data)
+        known = self._data_keys.get(data_id)
+        if known is not None and known[0]() is data:
+            return known[1]
+        if self.fingerprint == "content":
+            key = data_fingerprint(data)
+        else:
+            key = data_id
+        self._data_keys[data_id] = (weakref.ref(data, self._forget(data_id)), key)
+        return key
+
+    def _forget(self, data_id):
+        cache_ref = weakref.ref(self)
+
+        def callback(_):
+            cache = cache_ref()
+            if cache is None or data_id not in cache._data_keys:
+                return
+            _, key = cache._data_keys.pop(data_id)
+            if cache.fingerprint == "identity":
+                for entry_key in [k for k in cache._entries if k[1] == key]:
+                    cache._remove(entry_key)
+
+        return callback
+
+    def _remove(self, key):
+        _, nbytes = self._entries.pop(key)
+        self.nbytes -= nbytes
+
+    def covers(self, selector, data):
+        """Returns the cover of selector on data, computing it only on a miss"""
+        if type(data).__name__ != "DataFrame":
+            return selector.compute_covers(data)
+        key = (selector, self._data_key(data))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._unpack(entry[0], len(data))
+        self.misses += 1
+        cover = selector.compute_covers(data)
+        stored = cover
+        if isinstance(cover, np.ndarray):
+            cover.flags.writeable = False
+            if self.packed and cover.dtype == bool:
+                stored = ps.pack_bitset(cover)
+        self._store(key, stored)
+        return cover
+
+    def _store(self, key, cover):
+        nbytes = getattr(cover, "nbytes", 0)
+        if nbytes > self.max_nbytes:
+            return
+        self._entries[key] = (cover, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_nbytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _unpack(self, cover, data_len):
+        if self.packed and isinstance(cover, np.ndarray) and cover.dtype == np.uint64:
+            return ps.unpack_bitset(cover, data_len)
+        return cover
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._data_keys.clear()
+        self.nbytes = 0
+
+    def __enter__(self):
+        self._previous = ps.SelectorBase.cover_cache
+        ps.SelectorBase.cover_cache = self
+        return self
+
+    def __exit__(self, *args):
+        ps.SelectorBase.cover_cache = self._previous
+        self._previous = None
+
+
+class CoverRetentionPool:
+    """
+    Keeps the covers computed by Conjunction.covers up to max_nbytes bytes and
+    evicts them in least recently used order.
+
+    While the pool is active (with pool: ...), the conjunctions keep their covers
+    in the pool instead of on themselves, see Conjunction.cover_retention.
+    """
+
+    def __init__(self, max_nbytes=1 << 28):
+        self.max_nbytes = max_nbytes
+        self.nbytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._tokens = itertools.count()
+        self._previous = None
+
+    def store(self, cover):
+        """Stores cover and returns the token to get it, None if it is too large"""
+        if cover.nbytes > self.max_nbytes:
+            return None
+        token = next(self._tokens)
+        self._entries[token] = cover
+        self.nbytes += cover.nbytes
+        while self.nbytes > self.max_nbytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+        return token
+
+    def get(self, token):
+        """Returns the cover stored for token, None if it was evicted"""
+        cover = self._entries.get(token)
+        if cover is not None:
+            self._entries.move_to_end(token)
+        return cover
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __enter__(self):
+        self._previous = ps.Conjunction.cover_retention
+        ps.Conjunction.cover_retention = self
+        return self
+
+    def __exit__(self, *args):
+        ps.Conjunction.cover_retention = self._previous
+        self._previous = None
+
+
+class PersistentCoverStore:
+    """
+    Stores the packed covers (see ps.pack_bitset) of selectors in a directory,
+    such that they are computed once per dataset and mapped from disk in later
+    runs and by other algorithms.
+
+    While the store is active (with store: ...), the covers of all selectors on
+    DataFrames are looked up in the store like in a SelectorCoverCache. The
+    store has one subdirectory per dataset, named after the fingerprint of the
+    DataFrame (see data_fingerprint) or after a key passed to register(). It
+    holds files of packed covers and a manifest.json which maps the reprs of
+    the selectors to the rows of these files. Covers which are missing are
+    computed and appended as a new file on flush(), which is called on exit.
+
+    ps.PackedBitSetRepresentation and GpGrowth use the mapped covers without
+    copying them. The store must not be written by several processes at once.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        # maps the key of a dataset to a dict of repr(selector) -> packed cover
+        self._covers = {}
+        self._pending = {}
+        self._n_instances = {}
+        # maps id(data) to (weakref(data), key of data)
+        self._data_keys = {}
+        self._previous = None
+
+    def register(self, data, key):
+        """Uses key instead of the fingerprint of data to identify it"""
+        self._data_keys[id(data)] = (weakref.ref(data, self._forget(id(data))), key)
+
+    def _data_key(self, data):
+        known = self._data_keys.get(id(data))
+        if known is not None and known[0]() is data:
+            return known[1]
+        key = data_fingerprint(data)
+        self.register(data, key)
+        return key
+
+    def _forget(self, data_id):
+        store_ref = weakref.ref(self)
+
+        def callback(_):
+            store = store_ref()
+            if store is not None:
+                store._data_keys.pop(data_id, None)
+
+        return callback
+
+    def _dataset_directory(self, key):
+        return os.path.join(self.directory, str(key))
+
+    def _load(self, key, n_instances):
+        covers = self._covers.get(key)
+        if covers is not None:
+            return covers
+        covers = {}
+        manifest = self._read_manifest(key)
+        if manifest is not None:
+            if manifest["n_instances"] != n_instances:
+                raise ValueError(
+                    f"the covers stored for {key} are for {manifest['n_instances']} "
+                    f"instances, not for {n_instances}"
+                )
+            for segment in manifest["segments"]:
+                packed = np.load(
+                    os.path.join(self._dataset_directory(key), segment["file"]),
+                    mmap_mode="r",
+                )
+                covers.update(zip(segment["selectors"], packed))
+        self._covers[key] = covers
+        self._pending[key] = {}
+        self._n_instances[key] = n_instances
+        return covers
+
+    def _read_manifest(self, key):
+        path = os.path.join(self._dataset_directory(key), "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def packed_cover(self, selector, data):
+        """Returns the packed cover of selector on data, computing it only if it
+        is not stored yet"""
+        key = self._data_key(data)
+        covers = self._load(key, len(data))
+        selector_repr = repr(selector)
+        cover = covers.get(selector_repr)
+        if cover is not None:
+            self.hits += 1
+            return cover
+        self.misses += 1
+        cover = ps.pack_bitset(selector.compute_covers(data))
+        cover.flags.writeable = False
+        covers[selector_repr] = cover
+        self._pending[key][selector_repr] = cover
+        return cover
+
+    def covers(self, selector, data):
+        """Returns the cover of selector on data, see SelectorCoverCache.covers"""
+        if type(data).__name__ != "DataFrame":
+            return selector.compute_covers(data)
+        return ps.unpack_bitset(self.packed_cover(selector, data), len(data))
+
+    def rows(self, selectors, data, block_words=1 << 10):
+        """Returns the instances x selectors matrix of the covers on data"""
+        return ps.PackedRows(
+            [self.packed_cover(selector, data) for selector in selectors],
+            len(data),
+            block_words,
+        )
+
+    def flush(self):
+        """Writes the covers computed since the last flush to disk"""
+        for key, pending in self._pending.items():
+            if not pending:
+                continue
+            dataset_directory = self._dataset_directory(key)
+            os.makedirs(dataset_directory, exist_ok=True)
+            manifest = self._read_manifest(key) or {
+                "n_instances": self._n_instances[key],
+                "segments": [],
+            }
+            file_name = f"covers_{len(manifest['segments'])}.npy"
+            np.save(
+                os.path.join(dataset_directory, file_name),
+                np.stack(list(pending.values())),
+            )
+            manifest["segments"].append({"file": file_name, "selectors": list(pending)})
+            path = os.path.join(dataset_directory, "manifest.json")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(path + ".tmp", path)
+            # from now on the covers are mapped from disk
+            packed = np.load(os.path.join(dataset_directory, file_name), mmap_mode="r")
+            self._covers[key].update(zip(pending, packed))
+            pending.clear()
+
+    def close(self):
+        self.flush()
+        self._covers.clear()
+        self._pending.clear()
+
+    def __enter__(self):
+        self._previous = ps.SelectorBase.cover_cache
+        ps.SelectorBase.cover_cache = self
+        return self
+
+    def __exit__(self, *args):
+        ps.SelectorBase.cover_cache = self._previous
+        self._previous = None
+        self.close()
@@ -0,0 +1,124 @@
+"""
+Column-encoded view of a DataFrame for fast evaluation of selectors.
+"""
+import numpy as np
+
+import pysubgroup as ps
+
+
+class DatasetIndex:
+    """
+    Encodes the columns of a DataFrame once, such that the covers of selectors
+    can be computed without going through pandas.
+
+    Nominal columns are dictionary-encoded to integer codes, in the order in
+    which pd.unique returns their values (missing values share one code).
+    Numeric columns are stored as contiguous float arrays together with the
+    order which sorts them, so the cover of an IntervalSelector is a binary
+    search into the sorted values. Sparse columns are not encoded.
+
+    A DatasetIndex can be passed wherever a DataFrame is expected, e.g. as
+    `data` of a SubgroupDiscoveryTask, to the representations or to
+    create_selectors. Attributes which it does not define itself are looked up
+    on the wrapped DataFrame. The DataFrame must not be modified afterwards.
+    """
+
+    def __init__(self, data, columns=None):
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        self.data = data
+        self.n_instances = len(data)
+        self.codes = {}
+        self.categories = {}
+        self.null_codes = {}
+        self.values = {}
+        self.orders = {}
+        self.sorted_values = {}
+        self._code_lookup = {}
+        if columns is None:
+            columns = data.columns
+        numeric_columns = set(data.select_dtypes(include=["number"]).columns)
+        for column_name in columns:
+            column = data[column_name]
+            if isinstance(column.dtype, pd.SparseDtype):
+                continue
+            if column_name in numeric_columns:
+                values = np.ascontiguousarray(
+                    column.to_numpy(dtype=np.float64, na_value=np.nan)
+                )
+                # missing values are sorted to the end
+                order = np.argsort(values, kind="stable")
+                self.values[column_name] = values
+                self.orders[column_name] = order
+                self.sorted_values[column_name] = values[order]
+            else:
+                codes, categories = pd.factorize(column, use_na_sentinel=False)
+                categories = list(categories)
+                self.codes[column_name] = codes.astype(np.int32)
+                self.categories[column_name] = categories
+                self.null_codes[column_name] = next(
+                    (i for i, value in enumerate(categories) if pd.isnull(value)),
+                    None,
+                )
+
+    def __len__(self):
+        return self.n_instances
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __getattr__(self, name):
+        if name == "data" or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.data, name)
+
+    def code(self, attribute_name, value):
+        """Returns the code of value in a nominal column, None if it does not occur"""
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        if pd.isnull(value):
+            return self.null_codes[attribute_name]
+        lookup = self._code_lookup.get(attribute_name)
+        if lookup is None:
+            lookup = {
+                value: i
+                for i, value in enumerate(self.categories[attribute_name])
+                if not pd.isnull(value)
+            }
+            self._code_lookup[attribute_name] = lookup
+        return lookup.get(value)
+
+    def interval_rows(self, attribute_name, lower_bound, upper_bound):
+        """Returns the ids of the rows with lower_bound <= value < upper_bound"""
+        sorted_values = self.sorted_values[attribute_name]
+        start, stop = np.searchsorted(
+            sorted_values, [lower_bound, upper_bound], side="left"
+        )
+        return self.orders[attribute_name][start:stop]
+
+    def covers(self, selector):
+        """Computes the boolean cover of selector"""
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        attribute_name = getattr(selector, "attribute_name", None)
+        if isinstance(selector, ps.EqualitySelector):
+            value = selector.attribute_value
+            if attribute_name in self.codes:
+                code = self.code(attribute_name, value)
+                if code is None:
+                    return np.zeros(self.n_instances, dtype=bool)
+                return self.codes[attribute_name] == code
+            if attribute_name in self.values:
+                if pd.isnull(value):
+                    return np.isnan(self.values[attribute_name])
+                return self.values[attribute_name] == value
+        elif isinstance(selector, ps.IntervalSelector):
+            if attribute_name in self.values:
+                cover = np.zeros(self.n_instances, dtype=bool)
+                cover[
+                    self.interval_rows(
+                        attribute_name, selector.lower_bound, selector.upper_bound
+                    )
+                ] = True
+                return cover
+        return selector.compute_covers(self)
@@ -6,6 +6,8 @@ Created on 29.09.2017
 from collections import namedtuple
 from functools import total_ordering
 
+import numpy as np
+
 import pysubgroup as ps
 
 
@@ -40,9 +42,14 @@ class FITarget(ps.BaseTarget):
         return statistics
 
 
+# to enable pickling of namedtuple, name of variable and name of tuple have to match
+CountQF_parameters = namedtuple("CountQF_parameters", ("size_sg"))
+
+
 class SimpleCountQF(ps.AbstractInterestingnessMeasure):
-    tpl = namedtuple("CountQF_parameters", ("size_sg"))
+    tpl = CountQF_parameters
     gp_requires_cover_arr = False
+    gp_merge_is_additive = True
 
     def __init__(self):
         self.required_stat_attrs = ("size_sg",)
@@ -62,23 +69,33 @@ class SimpleCountQF(ps.AbstractInterestingnessMeasure):
         )
         return SimpleCountQF.tpl(size)
 
+    def calculate_statistics_batch(
+        self, covers, target, data
+    ):  # pylint: disable=unused-argument
+        if covers.dtype == np.uint64:
+            return SimpleCountQF.tpl(ps.popcount(covers, axis=-1))
+        return SimpleCountQF.tpl(np.count_nonzero(covers, axis=1))
+
     def gp_get_stats(self, _):
-        return {"size_sg": 1}
+        return np.array([1])
+
+    def gp_get_stats_batch(self, row_indices):
+        return np.ones((len(row_indices), 1), dtype=int)
 
     def gp_get_null_vector(self):
-        return {"size_sg": 0}
+        return np.zeros(1, dtype=int)
 
     def gp_merge(self, left, right):
-        left["size_sg"] += right["size_sg"]
+        left += right
 
     def gp_get_params(self, _cover_arr, v):
-        return SimpleCountQF.tpl(v["size_sg"])
+        return SimpleCountQF.tpl(v[0])
 
     def gp_to_str(self, stats):
-        return str(stats["size_sg"])
+        return str(stats[0])
 
     def gp_size_sg(self, stats):
-        return stats["size_sg"]
+        return stats[0]
 
 
 class CountQF(SimpleCountQF, ps.BoundedInterestingnessMeasure):
@@ -90,6 +107,12 @@ class CountQF(SimpleCountQF, ps.BoundedInterestingnessMeasure):
         statistics = self.ensure_statistics(subgroup, target, data, statistics)
         return statistics.size_sg
 
+    def evaluate_batch(self, statistics):
+        return np.asarray(statistics.size_sg)
+
+    def optimistic_estimate_batch(self, statistics):
+        return np.asarray(statistics.size_sg)
+
 
 class AreaQF(SimpleCountQF):
     def evaluate(self, subgroup, target, data, statistics=None):
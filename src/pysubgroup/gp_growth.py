@@ -1,6 +1,6 @@
 import itertools
 import warnings
-from collections import defaultdict, namedtuple
+from collections import OrderedDict
 from pathlib import Path
 
 import numpy as np
@@ -12,15 +12,371 @@ def identity(x, *args, **kwargs):  # pylint: disable=unused-argument
     return x
 
 
-class GpGrowth:
-    def __init__(self, mode="b_u"):
-        self.GP_node = namedtuple(
-            "GP_node", ["cls", "id", "parent", "children", "stats"]
+class GpTree:
+    """FP-tree stored in parallel arrays
+
+    Node 0 is the root, every other node i has the class cls[i], the parent
+    parent[i] < i and its statistics in the row stats[i]. Nodes are numbered in
+    the order in which they are first reached, such that the children of a node
+    (found through a CSR index over the parent array) are in insertion order.
+    The header maps the classes, in the order in which they first occur, to the
+    ids of their nodes.
+    """
+
+    def __init__(self, cls, parent, stats, null_vector, merge, additive=False):
+        self.cls = cls
+        self.parent = parent
+        self.stats = stats
+        self.null_vector = null_vector
+        self.merge = merge
+        self.additive = additive
+        self._header = None
+        self._child_ptr = None
+        self._child_ids = None
+        self._preorder = None
+
+    @classmethod
+    def from_transactions(cls, transactions, null_vector, merge, additive=False):
+        """Creates the tree of transactions given in CSR form (GpTransactions)
+
+        The tree is built one depth at a time: the transactions which reach a
+        depth are grouped by their node at the previous depth and their class
+        at this depth, every group becomes a node. The classes of a transaction
+        must be sorted in the order in which the tree nests them.
+        """
+        indptr, indices, stats = (
+            transactions.indptr,
+            transactions.indices,
+            transactions.stats,
+        )
+        null_vector = np.asarray(null_vector)
+        tree = cls(None, None, None, null_vector, merge, additive)
+        n_classes = transactions.shape[1]
+        lengths = np.diff(indptr)
+        node_cls = [np.array([-1])]
+        node_parent = [np.array([-1])]
+        # the transaction which first reaches a node and the depth of the node
+        node_first = [np.array([-1])]
+        node_depth = [np.array([0])]
+        node_stats = [tree._empty_stats(1)]
+        if len(stats) > 0:
+            tree._merge_rows(node_stats[0], np.zeros(len(stats), dtype=int), stats)
+        n_nodes = 1
+        active = np.flatnonzero(lengths > 0)
+        nodes = np.zeros(len(active), dtype=np.int64)
+        depth = 0
+        while len(active) > 0:
+            classes = indices[indptr[active] + depth]
+            _, first, inverse = np.unique(
+                nodes * n_classes + classes, return_index=True, return_inverse=True
+            )
+            inverse = inverse.ravel()
+            node_cls.append(classes[first])
+            node_parent.append(nodes[first])
+            node_first.append(active[first])
+            node_depth.append(np.full(len(first), depth + 1))
+            node_stats.append(tree._empty_stats(len(first)))
+            tree._merge_rows(node_stats[-1], inverse, stats[active])
+            nodes = n_nodes + inverse
+            n_nodes += len(first)
+            depth += 1
+            remaining = lengths[active] > depth
+            active = active[remaining]
+            nodes = nodes[remaining]
+        # renumber the nodes in the order in which inserting the transactions
+        # one at a time would create them
+        order = np.lexsort((np.concatenate(node_depth), np.concatenate(node_first)))
+        new_ids = np.empty(n_nodes, dtype=np.int64)
+        new_ids[order] = np.arange(n_nodes)
+        parent = np.concatenate(node_parent)[order]
+        tree.cls = np.concatenate(node_cls)[order].astype(np.int64)
+        tree.parent = np.where(parent < 0, -1, new_ids[np.maximum(parent, 0)])
+        tree.stats = np.concatenate(node_stats)[order]
+        return tree
+
+    def __len__(self):
+        return len(self.cls)
+
+    @property
+    def header(self):
+        if self._header is None:
+            order = np.argsort(self.cls, kind="stable")
+            _, starts = np.unique(self.cls[order], return_index=True)
+            groups = np.split(order, starts[1:])
+            groups.sort(key=lambda nodes: nodes[0])
+            self._header = {int(self.cls[nodes[0]]): nodes for nodes in groups}
+        return self._header
+
+    def _index_children(self):
+        if self._child_ptr is None:
+            parents = self.parent[1:]
+            self._child_ids = np.argsort(parents, kind="stable") + 1
+            counts = np.bincount(parents, minlength=len(self))
+            self._child_ptr = np.concatenate([[0], np.cumsum(counts)])
+
+    def children(self, node):
+        self._index_children()
+        return self._child_ids[self._child_ptr[node] : self._child_ptr[node + 1]]
+
+    def _gather_children(self, nodes):
+        """Returns the children of all nodes, grouped by node, and their counts"""
+        self._index_children()
+        starts = self._child_ptr[nodes]
+        counts = self._child_ptr[nodes + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return self._child_ids[offsets + np.arange(counts.sum())], counts
+
+    def preorder(self):
+        """Returns the position of every node in a depth first traversal"""
+        if self._preorder is None:
+            levels = [np.zeros(1, dtype=np.int64)]
+            while True:
+                children, _ = self._gather_children(levels[-1])
+                if len(children) == 0:
+                    break
+                levels.append(children)
+            sizes = np.ones(len(self), dtype=np.int64)
+            for level in reversed(levels[1:]):
+                np.add.at(sizes, self.parent[level], sizes[level])
+            self._preorder = np.zeros(len(self), dtype=np.int64)
+            for level in levels[1:]:
+                parents = self.parent[level]
+                # sizes of the preceding siblings, which are visited before
+                preceding = np.cumsum(sizes[level]) - sizes[level]
+                is_first = np.ones(len(level), dtype=bool)
+                is_first[1:] = parents[1:] != parents[:-1]
+                preceding -= np.maximum.accumulate(np.where(is_first, preceding, 0))
+                self._preorder[level] = self._preorder[parents] + 1 + preceding
+        return self._preorder
+
+    def _empty_stats(self, n):
+        return np.tile(self.null_vector, (n, 1))
+
+    def _merge_rows(self, out, targets, rows):
+        """Merges rows into out[targets], in the order in which they are given"""
+        if self.additive:
+            np.add.at(out, targets, rows)
+        else:
+            for target, row in zip(targets, rows):
+                self.merge(out[target], row)
+
+    def class_stats(self):
+        """Returns the merged statistics of the nodes of each class"""
+        if self.additive:
+            order = np.concatenate(list(self.header.values()))
+            starts = np.cumsum([0] + [len(nodes) for nodes in self.header.values()])
+            merged = np.add.reduceat(self.stats[order], starts[:-1])
+            return dict(zip(self.header, merged))
+        out = {}
+        for cls, nodes in self.header.items():
+            s = self.null_vector.copy()
+            for node in nodes:
+                self.merge(s, self.stats[node])
+            out[cls] = s
+        return out
+
+    def _derived(self, cls, parent, stats):
+        return GpTree(cls, parent, stats, self.null_vector, self.merge, self.additive)
+
+    def conditional_tree(self, cls):
+        """Returns the tree of the ancestors of the nodes of class cls
+
+        The ancestors receive the statistics of the nodes of class cls below them.
+        """
+        sources = self.header[cls]
+        ancestors = []
+        positions = []
+        distances = []
+        current = self.parent[sources]
+        position = np.arange(len(sources))
+        distance = 1
+        while len(current) > 0:
+            ancestors.append(current)
+            positions.append(position)
+            distances.append(np.full(len(current), -distance))
+            not_root = current > 0
+            current = self.parent[current[not_root]]
+            position = position[not_root]
+            distance += 1
+        ancestors = np.concatenate(ancestors)
+        positions = np.concatenate(positions)
+        # the paths of the sources are copied one after the other, from the root
+        order = np.lexsort((np.concatenate(distances), positions))
+        ancestors = ancestors[order]
+        positions = positions[order]
+        sorted_ids, first, targets = np.unique(
+            ancestors, return_index=True, return_inverse=True
         )
+        new_ids = np.empty(len(sorted_ids), dtype=np.int64)
+        new_ids[np.argsort(first)] = np.arange(len(sorted_ids))
+        targets = new_ids[targets.ravel()]
+        old_ids = sorted_ids[np.argsort(new_ids)]
+        stats = self._empty_stats(len(old_ids))
+        self._merge_rows(stats, targets, self.stats[sources[positions]])
+        parent = np.full(len(old_ids), -1, dtype=np.int64)
+        parent[1:] = new_ids[np.searchsorted(sorted_ids, self.parent[old_ids[1:]])]
+        return self._derived(self.cls[old_ids], parent, stats)
+
+    def suffix_tree(self, cls):
+        """Returns the merged subtrees below the nodes of class cls
+
+        The root of the returned tree has class cls.
+        """
+        sources = self.header[cls]
+        preorder = self.preorder()
+        root_stats = self._empty_stats(1)
+        self._merge_rows(
+            root_stats, np.zeros(len(sources), dtype=int), self.stats[sources]
+        )
+        new_cls = [np.array([cls])]
+        new_parent = [np.array([-1])]
+        new_stats = [root_stats]
+        # the subtrees of the sources are traversed one after the other
+        new_keys = [np.array([-1])]
+        n_nodes = 1
+        frontier = sources
+        frontier_new = np.zeros(len(sources), dtype=np.int64)
+        frontier_source = np.arange(len(sources))
+        while len(frontier) > 0:
+            children, counts = self._gather_children(frontier)
+            if len(children) == 0:
+                break
+            parents = np.repeat(frontier_new, counts)
+            source = np.repeat(frontier_source, counts)
+            keys = parents * (self.cls.max() + 1) + self.cls[children]
+            order = np.lexsort((source, keys))
+            unique_keys, first, targets = np.unique(
+                keys[order], return_index=True, return_inverse=True
+            )
+            targets = targets.ravel()
+            children = children[order]
+            source = source[order]
+            stats = self._empty_stats(len(unique_keys))
+            self._merge_rows(stats, targets, self.stats[children])
+            new_cls.append(self.cls[children[first]])
+            new_parent.append(parents[order][first])
+            new_stats.append(stats)
+            new_keys.append(source[first] * len(self) + preorder[children[first]])
+            frontier = children
+            frontier_new = targets + n_nodes
+            frontier_source = source
+            n_nodes += len(unique_keys)
+        # renumber the nodes in the order in which they are first visited
+        order = np.argsort(np.concatenate(new_keys))
+        new_ids = np.empty(n_nodes, dtype=np.int64)
+        new_ids[order] = np.arange(n_nodes)
+        parent = np.concatenate(new_parent)[order]
+        parent[1:] = new_ids[parent[1:]]
+        return self._derived(
+            np.concatenate(new_cls)[order], parent, np.vstack(new_stats)[order]
+        )
+
+
+class GpTransactions:
+    """
+    Transactions of GpGrowth in CSR form: the indices of the selectors which
+    cover instance i are indices[indptr[i] : indptr[i + 1]], its statistics are
+    stats[i]. Like PackedRows, it can be used as the boolean instances x
+    selectors matrix. The statistics replace those computed by the quality
+    function through get_stats and get_stats_batch.
+    """
+
+    def __init__(self, indptr, indices, stats, n_selectors):
+        self.indptr = indptr
+        self.indices = indices
+        self.stats = stats
+        self.shape = (len(indptr) - 1, n_selectors)
+
+    @classmethod
+    def from_rows(cls, arrs, stats):
+        """Creates the transactions of a boolean matrix (or PackedRows)"""
+        blocks = arrs.iter_blocks() if isinstance(arrs, ps.PackedRows) else [arrs]
+        counts = []
+        indices = []
+        for block in blocks:
+            counts.append(np.count_nonzero(block, axis=1))
+            indices.append(np.nonzero(block)[1].astype(np.int32))
+        indptr = np.zeros(len(arrs) + 1, dtype=np.int64)
+        if len(counts) > 0:
+            np.cumsum(np.concatenate(counts), out=indptr[1:])
+        indices = np.concatenate(indices) if indices else np.empty(0, np.int32)
+        return cls(indptr, indices, np.asarray(stats), arrs.shape[1])
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __iter__(self):
+        for start, stop in zip(self.indptr[:-1], self.indptr[1:]):
+            row = np.zeros(self.shape[1], dtype=bool)
+            row[self.indices[start:stop]] = True
+            yield row
+
+    def __getitem__(self, key):
+        rows, column = key
+        if rows != slice(None):
+            raise IndexError("only whole columns can be accessed")
+        instances = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        cover_arr = np.zeros(len(self), dtype=bool)
+        cover_arr[instances[self.indices == column]] = True
+        return cover_arr
+
+    def pack(self):
+        """Returns the rows packed into bytes, as np.packbits(rows, axis=1)"""
+        packed = np.zeros((len(self), (self.shape[1] + 7) // 8), dtype=np.uint8)
+        instances = np.repeat(np.arange(len(self)), np.diff(self.indptr))
+        bits = (128 >> (self.indices & 7)).astype(np.uint8)
+        np.bitwise_or.at(packed, (instances, self.indices >> 3), bits)
+        return packed
+
+    def get_stats(self, row_index):
+        return self.stats[row_index]
+
+    def get_stats_batch(self, row_indices):
+        return self.stats[row_indices]
+
+    def save(self, path, **arrays):
+        """Writes the transactions and further arrays to an .npz file"""
+        np.savez(
+            path,
+            indptr=self.indptr,
+            indices=self.indices,
+            stats=self.stats,
+            n_selectors=self.shape[1],
+            **arrays,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Returns the transactions and the further arrays of an .npz file"""
+        with np.load(path, allow_pickle=False) as f:
+            arrays = dict(f)
+        transactions = cls(
+            arrays.pop("indptr"),
+            arrays.pop("indices"),
+            arrays.pop("stats"),
+            int(arrays.pop("n_selectors")),
+        )
+        return transactions, arrays
+
+
+class GpGrowth:
+    """
+    GP-growth, which mines an FP-tree of the selectors with generic
+    statistics provided by the gp_* methods of the quality function.
+
+    With nproc > 1 the trees of the selectors at the top level are mined
+    by a pool of nproc worker processes, see ps.parallel_gp_growth. The
+    result is the same as that of the sequential search.
+    """
+
+    def __init__(self, mode="b_u", nproc=0):
+        self.arrs = None
+        self.prefix_covers = OrderedDict()
         self.minSupp = 10
         self.tqdm = identity
         self.depth = 0
         self.mode = mode  # specify eihther b_u (bottom up) or t_d (top down)
+        self.nproc = nproc
         self.constraints_monotone = []
         self.results = []
         self.task = []
@@ -30,18 +386,24 @@ class GpGrowth:
     def prepare_selectors(self, search_space, data):
         selectors = []
         assert len(search_space) > 0, "Provided searchspace was empty"
+        # covers which are stored packed on disk are only unpacked when needed
+        cover_store = None
+        if isinstance(data, ps.ChunkedCoverStore):
+            cover_store = data
+        elif isinstance(ps.SelectorBase.cover_cache, ps.PersistentCoverStore) and (
+            type(data).__name__ == "DataFrame"
+        ):
+            cover_store = ps.SelectorBase.cover_cache
+        is_store = cover_store is not None
         for selector in search_space:
             cov_arr = selector.covers(data)
-            selectors.append((np.count_nonzero(cov_arr), selector, cov_arr))
-
-        selectors = [
-            (size, selector, arr)
-            for size, selector, arr in selectors
             if all(
-                constraint.is_satisfied(arr, slice(None), data)
+                constraint.is_satisfied(cov_arr, slice(None), data)
                 for constraint in self.constraints_monotone
-            )
-        ]
+            ):
+                selectors.append(
+                    (np.count_nonzero(cov_arr), selector, None if is_store else cov_arr)
+                )
         sorted_selectors = sorted(selectors, reverse=True)
         self.remove_selectors_with_low_optimistic_estimate(
             sorted_selectors, len(search_space)
@@ -50,6 +412,10 @@ class GpGrowth:
         selectors_sorted = [selector for size, selector, arr in sorted_selectors]
         if len(selectors_sorted) == 0:
             arrs = np.empty((0, 0), dtype=np.bool_)
+        elif cover_store is data:
+            arrs = data.rows(selectors_sorted)
+        elif is_store:
+            arrs = cover_store.rows(selectors_sorted, data)
         else:
             arrs = np.vstack([arr for size, selector, arr in sorted_selectors]).T
         # print(selectors_sorted)
@@ -62,7 +428,9 @@ class GpGrowth:
             # remove selectors which have to lo of an optimistic estimate
             # selectors_map = {selector : i for i,(_, selector, _) in enumerate(s)}
             stats = []
-            for _, _, cov_arr in s:
+            for _, selector, cov_arr in s:
+                if cov_arr is None:
+                    cov_arr = selector.covers(self.task.data)
                 statistics = self.task.qf.calculate_statistics(
                     cov_arr, self.task.target, self.task.data
                 )
@@ -76,7 +444,9 @@ class GpGrowth:
             del statistics
             to_pop = []
             min_quality = ps.minimum_required_quality(self.results, self.task)
-            for i, ((_, _, cov_arr), statistics) in enumerate(zip(s, stats)):
+            for i, ((_, selector, cov_arr), statistics) in enumerate(zip(s, stats)):
+                if cov_arr is None:
+                    cov_arr = selector.covers(self.task.data)
                 if (
                     not self.task.qf.optimistic_estimate(
                         cov_arr, self.task.target, self.task.data, statistics
@@ -91,18 +461,15 @@ class GpGrowth:
                 s.pop(i)
             self.results.clear()
 
-    def nodes_to_cls_nodes(self, nodes):
-        cls_nodes = defaultdict(list)
-        for node in nodes:
-            cls_nodes[node.cls].append(node)
-        return cls_nodes
-
     def setup_from_quality_function(self, qf):
         # pylint: disable=attribute-defined-outside-init
         self.get_stats = qf.gp_get_stats
         self.get_null_vector = qf.gp_get_null_vector
         self.merge = qf.gp_merge
         self.requires_cover_arr = qf.gp_requires_cover_arr
+        # additive statistics are merged with vectorized numpy operations
+        self.additive = getattr(qf, "gp_merge_is_additive", False)
+        self.get_stats_batch = getattr(qf, "gp_get_stats_batch", None)
         # pylint: enable=attribute-defined-outside-init
 
     def setup_constraints(self, constraints, qf):
@@ -127,6 +494,7 @@ class GpGrowth:
 
     def setup(self, task):
         self.task = task
+        self.results = []
         task.qf.calculate_constant_statistics(task.data, task.target)
         self.depth = task.depth
         self.setup_constraints(task.constraints_monotone, task.qf)
@@ -134,36 +502,97 @@ class GpGrowth:
         self.setup_from_quality_function(task.qf)
 
     def create_initial_tree(self, arrs):
-        # Create tree
-        root = self.GP_node(-1, -1, None, {}, self.get_null_vector())
-        nodes = []
-        for row_index, row in self.tqdm(
-            enumerate(arrs), "creating tree", total=len(arrs)
-        ):
-            self.normal_insert(
-                root, nodes, self.get_stats(row_index), np.nonzero(row)[0]
+        if not self.additive or len(arrs) == 0:
+            if not isinstance(arrs, GpTransactions):
+                arrs = GpTransactions.from_rows(arrs, self.get_all_stats(len(arrs)))
+            return GpTree.from_transactions(
+                arrs, self.get_null_vector(), self.merge, self.additive
             )
-        nodes.append(root)
-        return root, nodes
+        # identical transactions are inserted once with their summed statistics
+        transactions, first, inverse = np.unique(
+            self.pack_transactions(arrs),
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+        )
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        starts = np.searchsorted(inverse[order], np.arange(len(transactions)))
+        group_stats = np.add.reduceat(self.get_all_stats(len(arrs))[order], starts)
+        # transactions are inserted in the order in which they first occur
+        groups = np.argsort(first)
+        rows = np.unpackbits(transactions[groups], axis=1, count=arrs.shape[1])
+        grouped = GpTransactions.from_rows(rows.astype(bool), group_stats[groups])
+        return GpTree.from_transactions(
+            grouped, self.get_null_vector(), self.merge, self.additive
+        )
 
-    def execute(self, task):
+    @staticmethod
+    def pack_transactions(arrs):
+        """Packs the rows of the boolean instances x selectors matrix into bytes"""
+        if isinstance(arrs, GpTransactions):
+            return arrs.pack()
+        if isinstance(arrs, ps.PackedRows):
+            return np.vstack(
+                [np.packbits(block, axis=1) for block in arrs.iter_blocks()]
+            )
+        return np.packbits(arrs, axis=1)
+
+    def read_transactions(self, task, path):
+        """
+        Reads the transactions which to_file has written for task to the .npz
+        file path. Returns the selectors and the transactions like
+        prepare_selectors, the statistics stored in the file are used instead
+        of those of the quality function.
+        """
+        transactions, arrays = GpTransactions.load(path)
+        indices = arrays["search_space_indices"]
+        if len(indices) > 0 and indices.max() >= len(task.search_space):
+            raise ValueError(f"{path} was not written for the search space of task")
+        selectors_sorted = [task.search_space[i] for i in indices]
+        if [repr(sel) for sel in selectors_sorted] != list(arrays["selectors"]):
+            raise ValueError(f"{path} was not written for the search space of task")
+        # prepare_selectors may have raised the minimum quality
+        task.min_quality = arrays["min_quality"].item()
+        # pylint: disable=attribute-defined-outside-init
+        self.get_stats = transactions.get_stats
+        self.get_stats_batch = transactions.get_stats_batch
+        # pylint: enable=attribute-defined-outside-init
+        return selectors_sorted, transactions
+
+    def get_all_stats(self, n_instances):
+        if self.get_stats_batch is not None:
+            return self.get_stats_batch(np.arange(n_instances))
+        return np.array([self.get_stats(row_index) for row_index in range(n_instances)])
+
+    def execute(self, task, transactions=None):
+        """
+        Mines task. If transactions is given, the transactions are read from
+        this .npz file, which to_file has written for the same task, instead
+        of computing the covers of the selectors.
+        """
         assert self.mode in ("b_u", "t_d"), "mode needs to be either b_u or t_d"
         self.setup(task)
 
-        selectors_sorted, arrs = self.prepare_selectors(task.search_space, task.data)
-        root, nodes = self.create_initial_tree(arrs)
+        if transactions is None:
+            selectors_sorted, arrs = self.prepare_selectors(
+                task.search_space, task.data
+            )
+        else:
+            selectors_sorted, arrs = self.read_transactions(task, transactions)
+        tree = self.create_initial_tree(arrs)
+        # the covers are only needed by quality functions which require them
+        self.arrs = arrs if self.requires_cover_arr else None
+        self.prefix_covers = OrderedDict()
 
         # mine tree
-        cls_nodes = self.nodes_to_cls_nodes(nodes)
-        if self.mode == "b_u":
-            self.recurse(cls_nodes, tuple())
+        if self.nproc > 1:
+            self.results = ps.parallel_gp_growth(self, tree, self.nproc)
+        elif self.mode == "b_u":
+            self.recurse(tree, tuple())
         else:  # self.mode == "t_d"
-            results = self.recurse_top_down(cls_nodes, root)
-            results = self.calculate_quality_function_for_patterns(task, results, arrs)
-            for quality, sg, stats in results:
-                ps.add_if_required(
-                    self.results, sg, quality, self.task, statistics=stats
-                )
+            # the patterns are scored while they are mined
+            self.add_top_down_patterns(self.recurse_top_down(tree))
         self.results = self.convert_results_to_subgroups(self.results, selectors_sorted)
 
         self.results = ps.prepare_subgroup_discovery_result(self.results, task)
@@ -177,67 +606,108 @@ class GpGrowth:
             new_result.append((quality, sg, stats))
         return new_result
 
-    def calculate_quality_function_for_patterns(self, task, results, arrs):
-        out = []
-        for indices, gp_params in self.tqdm(
-            results,
-            "computing quality function",
+    def add_top_down_patterns(self, patterns):
+        """
+        Scores the patterns (indices, gp_params) of the top down mode and adds
+        them to the result if required. If the quality function requires the
+        covers, the patterns are scored in batches.
+        """
+        batch_size = 1
+        if self.requires_cover_arr:
+            batch_size = max(1, (1 << 26) // (8 * max(1, len(self.arrs))))
+        batch = []
+        for pattern in patterns:
+            batch.append(pattern)
+            if len(batch) >= batch_size:
+                self.add_patterns_if_required(batch)
+                batch = []
+        if len(batch) > 0:
+            self.add_patterns_if_required(batch)
+
+    def add_patterns_if_required(self, patterns):
+        for (indices, _), (quality, statistics) in zip(
+            patterns, self.score_patterns(patterns)
         ):
-            if self.requires_cover_arr:
-                if len(indices) == 1:
-                    cover_arr = arrs[:, indices[0]]
-                else:
-                    cover_arr = np.all([arrs[:, i] for i in indices])
-                statistics = task.qf.gp_get_params(cover_arr, gp_params)
-                sg = cover_arr
-            else:
+            ps.add_if_required(
+                self.results, indices, quality, self.task, statistics=statistics
+            )
+
+    def score_patterns(self, patterns):
+        """Returns the quality and statistics of the patterns (indices, gp_params)"""
+        task = self.task
+        if not self.requires_cover_arr:
+            out = []
+            for _, gp_params in patterns:
                 statistics = task.qf.gp_get_params(None, gp_params)
-                sg = None
-            # qual1 = task.qf.evaluate(sg, task.qf.calculate_statistics(sg, task.data))
-            qual2 = task.qf.evaluate(sg, task.target, task.data, statistics)
-            out.append((qual2, indices, statistics))
-        return out
+                quality = task.qf.evaluate(None, task.target, task.data, statistics)
+                out.append((quality, statistics))
+            return out
+        cover_arrs = [self.pattern_cover(indices) for indices, _ in patterns]
+        gp_params = [gp_params for _, gp_params in patterns]
+        if hasattr(task.qf, "gp_get_params_batch"):
+            statistics = task.qf.gp_get_params_batch(cover_arrs, gp_params)
+        else:
+            statistics = [
+                task.qf.gp_get_params(cover_arr, params)
+                for cover_arr, params in zip(cover_arrs, gp_params)
+            ]
+        return [
+            (task.qf.evaluate(cover_arr, task.target, task.data, stats), stats)
+            for cover_arr, stats in zip(cover_arrs, statistics)
+        ]
 
-    def normal_insert(self, root, nodes, new_stats, classes):
-        node = root
-        for cls in classes:
-            if cls not in node.children:
-                new_child = self.GP_node(
-                    cls, len(nodes), node, {}, self.get_null_vector()
-                )
-                nodes.append(new_child)
-                node.children[cls] = new_child
-            self.merge(node.stats, new_stats)
-            node = node.children[cls]
-        self.merge(node.stats, new_stats)
-        return node
+    def pattern_cover(self, indices):
+        """
+        Returns the cover of the conjunction of the selectors with indices.
+        The covers of recently used prefixes are kept, such that patterns which
+        share a prefix reuse its cover.
+        """
+        cover_arr = self.prefix_covers.get(indices)
+        if cover_arr is not None:
+            self.prefix_covers.move_to_end(indices)
+            return cover_arr
+        if len(indices) == 0:
+            cover_arr = np.ones(len(self.arrs), dtype=bool)
+        elif len(indices) == 1:
+            cover_arr = np.ascontiguousarray(self.arrs[:, indices[0]], dtype=bool)
+        else:
+            cover_arr = self.pattern_cover(indices[:-1]) & self.arrs[:, indices[-1]]
+        self.prefix_covers[indices] = cover_arr
+        max_size = max(2 * self.depth + 2, (1 << 27) // max(1, len(self.arrs)))
+        while len(self.prefix_covers) > max_size:
+            self.prefix_covers.popitem(last=False)
+        return cover_arr
 
     def add_if_required(self, prefix, gp_stats):
-        statistics = self.task.qf.gp_get_params(None, gp_stats)
-        quality = self.task.qf.evaluate(None, None, None, statistics)
+        quality, statistics = self.score_prefix(prefix, gp_stats)
         ps.add_if_required(
             self.results, prefix, quality, self.task, statistics=statistics
         )
 
-    def recurse(self, cls_nodes, prefix, is_single_path=False):
-        if len(cls_nodes) == 0:
+    def score_prefix(self, prefix, gp_stats):
+        """Returns the quality and the statistics of a pattern of the bottom up mode"""
+        if self.requires_cover_arr:
+            return self.score_patterns([(prefix, gp_stats)])[0]
+        statistics = self.task.qf.gp_get_params(None, gp_stats)
+        return self.task.qf.evaluate(None, None, None, statistics), statistics
+
+    def recurse(self, tree, prefix, is_single_path=False):
+        if len(tree) == 0:
             raise RuntimeError  # pragma: no cover
-        self.add_if_required(prefix, cls_nodes[-1][0].stats)
+        self.add_if_required(prefix, tree.stats[0])
         if len(prefix) >= self.depth:
             return  # pragma: no cover
 
-        stats_dict = self.get_stats_for_class(cls_nodes)
+        stats_dict = tree.class_stats()
         if not self.requires_cover_arr:
-            statistics = self.task.qf.gp_get_params(None, cls_nodes[-1][0].stats)
+            statistics = self.task.qf.gp_get_params(None, tree.stats[0])
             optimistic_estimate = self.task.qf.optimistic_estimate(
                 None, self.task.target, self.task.data, statistics
             )
-            if not optimistic_estimate >= ps.minimum_required_quality(
-                self.results, self.task
-            ):
+            if not optimistic_estimate >= self.minimum_required_quality():
                 return
         if is_single_path:
-            if len(cls_nodes) == 1 and -1 in cls_nodes:
+            if len(stats_dict) == 1:
                 return
             del stats_dict[-1]  # remove root node
             all_combinations = ps.powerset(
@@ -251,245 +721,149 @@ class GpGrowth:
                 if len(comb) > 0:
                     self.add_if_required(prefix + comb, stats_dict[comb[-1]])
         else:
-            for cls, nodes in cls_nodes.items():
+            for cls in tree.header:
                 if cls >= 0:
                     if self.check_constraints(stats_dict[cls]):
-                        if len(prefix) == (self.depth - 1):
-                            self.add_if_required((*prefix, cls), stats_dict[cls])
-                        else:
-                            is_single_path_now = len(nodes) == 1
-                            new_tree = self.create_new_tree_from_nodes(nodes)
-                            assert len(new_tree) > 0
-                            self.recurse(new_tree, (*prefix, cls), is_single_path_now)
-
-    def recurse_top_down(self, cls_nodes, root, depth_in=0):
-        # print(f"{depth_in}"+"\t"*depth_in+str(root.cls))
-        # print("init root", root.cls)
-        # print(depth_in)
-        # self.check_tree_is_ordered(root)
-        results = []
+                        self.recurse_class(tree, prefix, cls, stats_dict[cls])
 
+    def recurse_class(self, tree, prefix, cls, gp_stats):
+        if len(prefix) == (self.depth - 1):
+            self.add_if_required((*prefix, cls), gp_stats)
+        else:
+            is_single_path_now = len(tree.header[cls]) == 1
+            new_tree = tree.conditional_tree(cls)
+            self.recurse(new_tree, (*prefix, cls), is_single_path_now)
+
+    def minimum_required_quality(self):
+        return ps.minimum_required_quality(self.results, self.task)
+
+    def recurse_top_down(self, tree, depth_in=0, max_length=None):
+        """
+        Yields the patterns (indices, gp_stats) of tree in the order in which
+        they are added to the result. Patterns longer than max_length are left
+        out, as the caller would discard them.
+        """
         curr_depth = depth_in
-        stats_dict = self.get_stats_for_class(cls_nodes)
+        stats_dict = tree.class_stats()
         is_valid_class = {
             key: self.check_constraints(gp_stats)
             for key, gp_stats in stats_dict.items()
         }
-        # init_class = root.cls
-        # direct_child = None
-        init_root = root
+        root_cls = int(tree.cls[0])
+        node = 0
         alpha = []
         while True:
-            if root.cls == -1:
-                pass
-            else:
-                alpha.append(root.cls)
-            if len(root.children) == 1 and curr_depth <= self.depth:
-                # print(f"Path optmization {len(root.children)}")
-                #    curr_depth += 1
-
-                potential_root = next(iter(root.children.values()))
-                if is_valid_class[potential_root.cls]:
-                    root = potential_root
+            if tree.cls[node] != -1:
+                alpha.append(int(tree.cls[node]))
+            children = tree.children(node)
+            if len(children) == 1 and curr_depth <= self.depth:
+                if is_valid_class[int(tree.cls[children[0]])]:
+                    node = children[0]
                 else:
                     break
             else:
                 break
-        # self.get_prefixes_top_down(alpha,  max_length=self.depth - depth_in + 1) #
-        # assert len(alpha) > 0
-        prefixes = list(ps.powerset(alpha, max_length=self.depth - depth_in + 1))[1:]
-
-        # prefixes = list(map(lambda x: sum(x, tuple()), prefixes))
-        # print(root.cls, list(root.children), prefixes)
-        # print("AAA", list(cls_nodes.keys()))
-
-        if init_root.cls == -1:
+        max_length = self.depth if max_length is None else min(max_length, self.depth)
+        if root_cls == -1:
+            prefixes = [
+                prefix
+                for length in range(1, min(len(alpha), max_length) + 1)
+                for prefix in itertools.combinations(alpha, length)
+            ]
             prefixes.append(tuple())
+        else:
+            # the statistics of the tree are those of patterns including its class
+            prefixes = [
+                (root_cls, *prefix)
+                for length in range(min(len(alpha), max_length))
+                for prefix in itertools.combinations(alpha[1:], length)
+            ]
         for prefix in prefixes:
             if len(prefix) == 0:
-                if is_valid_class[init_root.cls]:
-                    results.append((prefix, stats_dict[init_root.cls]))
+                if is_valid_class[root_cls]:
+                    yield prefix, stats_dict[root_cls]
                 continue
             cls = prefix[-1]
             assert is_valid_class[cls]
-            results.append((prefix, stats_dict[cls]))
-
-        # suffixes = [((), root.stats)]
+            yield prefix, stats_dict[cls]
 
-        suffixes = []
+        # the suffixes of each prefix all start with the class of their tree
+        classes = [cls for cls in stats_dict if cls >= 0 and cls not in alpha]
         if curr_depth == (self.depth - 1):
-            # print(f"{depth_in}"+"\t"*depth_in+"B")
-            for cls, stats in stats_dict.items():
-                if cls < 0 or cls in alpha:
-                    continue
+            for cls in classes:
                 assert cls > max(
                     alpha
                 ), f"{cls} {max(alpha)}, {alpha}, {list(stats_dict.keys())}"
-                suffixes.append(((cls,), stats))
+            for pre in prefixes:
+                if len(pre) < max_length:
+                    for cls in classes:
+                        if is_valid_class[cls] and (len(pre) == 0 or pre[-1] < cls):
+                            yield (*pre, cls), stats_dict[cls]
         else:
-            # print(f"{depth_in}"+"\t"*depth_in+"A")
-            for cls in stats_dict:
-                if cls < 0 or cls in alpha:
-                    continue
-                if is_valid_class[cls]:
-                    # Future: There is also the possibility
-                    # to compute the stats_dict of the prefix tree
-                    # without creating the prefix tree first
-                    # This might be useful if curr_depth == self.depth - 2
-                    # as we need not recreate the tree
-                    new_root, nodes = self.get_top_down_tree_for_class(
-                        cls_nodes, cls, is_valid_class
-                    )
-                    # self.check_tree_is_ordered(new_root)
-                    # self.check_tree_is_ordered(init_root)
-                    assert len(nodes) > 0
-                    new_cls_nodes = self.nodes_to_cls_nodes(nodes)
-                    # new_dict = self.get_stats_for_class(new_cls_nodes)
-                    # for key, value in new_dict.items():
-                    #    if isinstance(stats_dict[key], dict):
-                    #        continue
-                    #    assert stats_dict[key][0]>=value[0], \
-                    #       f"{stats_dict[key][0]} {value[0]}"
-                    #    assert stats_dict[key][1]>=value[1], \
-                    #       f"{stats_dict[key][1]} {value[1]}"
-                    # print("  " * curr_depth, cls, curr_depth, len(new_cls_nodes))
-                    suffixes.extend(
-                        self.recurse_top_down(new_cls_nodes, new_root, curr_depth + 1)
-                    )
-        # if prefixes == [(12,), (13,)]:
-        #    print(f"{depth_in}"+"\t"*depth_in+ "pre, suf", prefixes)
-
-        # the combination below can be optimized to avoid the if
-        # by first grouping them by length
-        results.extend(
-            [
-                ((*pre, *suf), gp_stats)
-                for pre, (suf, gp_stats) in itertools.product(prefixes, suffixes)
-                if len(pre) + len(suf) <= self.depth
-                and (len(pre) == 0 or pre[-1] < suf[0])
-            ]
-        )
-        # if prefixes == [(12,), (13,)]:
-        #    print(f"{depth_in}"+"\t"*depth_in+ "results", results)
-        # print()
-        return results
-
-    def check_tree_is_ordered(self, root, prefix=None):  # pragma: no cover
-        """Verify that the nodes of a tree are sorted in ascending order"""
-        if prefix is None:
-            prefix = []
-        s = {root.cls}
-        for cls, child in root.children.items():
-            assert child.cls > root.cls, f"{prefix} , {cls}"
-            s2 = self.check_tree_is_ordered(child, prefix + [cls])
-            s = s.union(s2)
-        return s
-
-    def get_top_down_tree_for_class(self, cls_nodes, cls, is_valid_class):
-        # Future: Can eventually also remove infrequent nodes already
-        # during tree creation
-        base_root = None
-        nodes = []
-        if len(cls_nodes[cls]) > 0 and is_valid_class[cls]:  # pragma: no branch okay
-            base_root = self.create_copy_of_tree_top_down(
-                cls_nodes[cls][0], nodes, is_valid_class=is_valid_class
+            # Future: There is also the possibility
+            # to compute the stats_dict of the prefix tree
+            # without creating the prefix tree first
+            # This might be useful if curr_depth == self.depth - 2
+            # as we need not recreate the tree
+            classes = [cls for cls in classes if is_valid_class[cls]]
+            for pre in prefixes:
+                if len(pre) < max_length:
+                    for cls in classes:
+                        if len(pre) == 0 or pre[-1] < cls:
+                            yield from self.mine_suffix_tree(
+                                tree,
+                                pre,
+                                cls,
+                                stats_dict[cls],
+                                curr_depth + 1,
+                                max_length - len(pre),
+                            )
+
+    def mine_suffix_tree(self, tree, prefix, cls, gp_stats, depth, max_length):
+        """
+        Yields the patterns of the suffix tree of cls, appended to prefix. The
+        tree is skipped if the optimistic estimate of the statistics of cls
+        shows that none of its patterns can be added to the result.
+        """
+        if not self.requires_cover_arr and hasattr(self.task.qf, "optimistic_estimate"):
+            statistics = self.task.qf.gp_get_params(None, gp_stats)
+            optimistic_estimate = self.task.qf.optimistic_estimate(
+                None, self.task.target, self.task.data, statistics
             )
-            for from_root in cls_nodes[cls][1:]:
-                self.merge_trees_top_down(nodes, base_root, from_root, is_valid_class)
-        return base_root, nodes
-
-    def create_copy_of_tree_top_down(
-        self, from_root, nodes=None, parent=None, is_valid_class=None
-    ):
-        if nodes is None:
-            nodes = []  # pragma: no cover
-        # if len(nodes) == 0:
-        #    root_cls = -1
-        children = {}
-        new_root = self.GP_node(
-            from_root.cls, len(nodes), parent, children, from_root.stats.copy()
-        )
-        nodes.append(new_root)
-        for child_cls, child in from_root.children.items():
-            if (
-                is_valid_class is None or child_cls in is_valid_class
-            ):  # pragma: no branch okay
-                new_child = self.create_copy_of_tree_top_down(
-                    child, nodes, new_root, is_valid_class=is_valid_class
-                )
-                children[child_cls] = new_child
-        return new_root
-
-    def merge_trees_top_down(self, nodes, mutable_root, from_root, is_valid_class):
-        self.merge(mutable_root.stats, from_root.stats)
-        for cls in from_root.children:
-            if cls not in mutable_root.children:
-                new_child = self.create_copy_of_tree_top_down(
-                    from_root.children[cls],
-                    nodes,
-                    mutable_root,
-                    is_valid_class=is_valid_class,
-                )
-                mutable_root.children[cls] = new_child
-            else:
-                self.merge_trees_top_down(
-                    nodes,
-                    mutable_root.children[cls],
-                    from_root.children[cls],
-                    is_valid_class=is_valid_class,
-                )
-
-    def get_stats_for_class(self, cls_nodes):
-        out = {}
-        for key, nodes in cls_nodes.items():
-            s = self.get_null_vector()
-            for node in nodes:
-                self.merge(s, node.stats)
-            out[key] = s
-        return out
-
-    def create_new_tree_from_nodes(self, nodes):
-        new_nodes = {}
-        for node in nodes:
-            nodes_upwards = self.get_nodes_upwards(node)
-            self.create_copy_of_path(nodes_upwards[1:], new_nodes, node.stats)
-
-        # self.remove_infrequent_nodes(new_nodes)
-        cls_nodes = defaultdict(list)
-        for new_node in new_nodes.values():
-            cls_nodes[new_node.cls].append(new_node)
-        return cls_nodes
-
-    def create_copy_of_path(self, nodes, new_nodes, stats):
-        parent = None
-        for node in reversed(nodes):
-            if node.id not in new_nodes:
-                new_node = self.GP_node(node.cls, node.id, parent, {}, stats.copy())
-                new_nodes[node.id] = new_node
-            else:
-                new_node = new_nodes[node.id]
-                self.merge(new_node.stats, stats)
-            if parent is not None:
-                parent.children[new_node.cls] = new_node
-            parent = new_node
-
-    def get_nodes_upwards(self, node):
-        ref = node
-        path = []
-        while True:
-            path.append(ref)
-            ref = ref.parent
-            if ref is None:
-                break
-        return path
+            # an undefined estimate does not allow to skip the tree
+            if optimistic_estimate < self.minimum_required_quality():
+                return
+        for suffix, suffix_stats in self.recurse_top_down(
+            tree.suffix_tree(cls), depth, max_length
+        ):
+            yield (*prefix, *suffix), suffix_stats
 
     def to_file(self, task, path):
+        """
+        Writes the transactions of task to path. If path ends with .npz, they
+        are written in binary form, which execute and read_transactions read.
+        Otherwise each transaction is written as a line of the indices of its
+        selectors followed by its statistics.
+        """
         self.setup(task)
-        _, arrs = self.prepare_selectors(task.search_space, task.data)
+        selectors_sorted, arrs = self.prepare_selectors(task.search_space, task.data)
+
+        path = Path(path).absolute()
+        if path.suffix == ".npz":
+            index = {sel: i for i, sel in enumerate(task.search_space)}
+            transactions = GpTransactions.from_rows(arrs, self.get_all_stats(len(arrs)))
+            transactions.save(
+                path,
+                search_space_indices=np.array(
+                    [index[sel] for sel in selectors_sorted], dtype=np.int64
+                ),
+                selectors=np.array([repr(sel) for sel in selectors_sorted], dtype=str),
+                min_quality=task.min_quality,
+            )
+            return
 
         # Create tree
         to_str = task.qf.gp_to_str
-        path = Path(path).absolute()
         print(path)
         with open(path, "w", encoding="utf-8") as f:
             for row_index, row in self.tqdm(
@@ -5,13 +5,14 @@ import numpy as np
 import pysubgroup as ps
 
 beta_tuple = namedtuple("beta_tuple", ["beta", "size_sg"])
+EMM_Likelihood_parameters = namedtuple(
+    "EMM_Likelihood_parameters",
+    ["model_params", "subgroup_likelihood", "inverse_likelihood", "size"],
+)
 
 
 class EMM_Likelihood(ps.AbstractInterestingnessMeasure):
-    tpl = namedtuple(
-        "EMM_Likelihood",
-        ["model_params", "subgroup_likelihood", "inverse_likelihood", "size"],
-    )
+    tpl = EMM_Likelihood_parameters
 
     def __init__(self, model):
         self.model = model
@@ -31,11 +32,12 @@ class EMM_Likelihood(ps.AbstractInterestingnessMeasure):
         params = self.model.fit(cover_arr, data)
         return self.get_tuple(sg_size, params, cover_arr)
 
-    def get_tuple(self, sg_size, params, cover_arr):
+    def get_tuple(self, sg_size, params, cover_arr, all_likelihood=None):
         # numeric stability?
-        all_likelihood = self.model.likelihood(
-            params, np.ones(self.data_size, dtype=bool)
-        )
+        if all_likelihood is None:
+            all_likelihood = self.model.likelihood(
+                params, np.ones(self.data_size, dtype=bool)
+            )
         sg_likelihood_sum = np.sum(all_likelihood[cover_arr])
         total_likelihood_sum = np.sum(all_likelihood)
         dataset_average = np.nan
@@ -58,11 +60,29 @@ class EMM_Likelihood(ps.AbstractInterestingnessMeasure):
         sg_size = params.size_sg
         return self.get_tuple(sg_size, params, cover_arr)
 
+    def gp_get_params_batch(self, cover_arrs, gp_params):
+        """Computes gp_get_params for many patterns, evaluating their likelihoods
+        in one pass if the model supports it"""
+        params = [self.model.gp_get_params(v) for v in gp_params]
+        if not hasattr(self.model, "likelihood_batch"):
+            return [
+                self.get_tuple(p.size_sg, p, cover_arr)
+                for p, cover_arr in zip(params, cover_arrs)
+            ]
+        all_likelihoods = self.model.likelihood_batch(params)
+        return [
+            self.get_tuple(p.size_sg, p, cover_arr, all_likelihood)
+            for p, cover_arr, all_likelihood in zip(params, cover_arrs, all_likelihoods)
+        ]
+
     @property
     def gp_requires_cover_arr(self):
         return True
 
     def __getattr__(self, name):
+        if name == "model":
+            # not set yet while unpickling
+            raise AttributeError(name)
         return getattr(self.model, name)
 
 
@@ -137,6 +157,17 @@ class PolyRegression_ModelClass:
             return np.full(self.x[sg].shape, np.nan)
         return norm.pdf(np.polyval(stats.beta, self.x[sg]) - self.y[sg])
 
+    def likelihood_batch(self, stats_list):
+        """Returns the likelihoods of all instances for each of the stats as rows"""
+        from scipy.stats import norm  # pylint: disable=import-outside-toplevel
+
+        betas = np.array([stats.beta for stats in stats_list], dtype=float)
+        # Horner's scheme as in np.polyval, such that the values are identical
+        values = np.zeros((len(betas), len(self.x)))
+        for coefficients in betas.T:
+            values = values * self.x + coefficients[:, None]
+        return norm.pdf(values - self.y)
+
     def loglikelihood(self, stats, sg):
         from scipy.stats import norm  # pylint: disable=import-outside-toplevel
 
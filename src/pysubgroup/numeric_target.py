@@ -95,6 +95,20 @@ def read_mean(tpl):
     return tpl.mean
 
 
+def masked_row_sums(covers, values, block_nbytes=1 << 24):
+    """
+    Sums values over the instances of each row of the boolean covers matrix.
+    values may have a second axis to compute several sums at once. The rows are
+    converted to float in blocks of at most block_nbytes bytes, instead of
+    converting the whole matrix at once.
+    """
+    sums = np.empty((len(covers),) + values.shape[1:])
+    block = max(1, block_nbytes // (8 * max(1, covers.shape[1])))
+    for start in range(0, len(covers), block):
+        sums[start : start + block] = covers[start : start + block] @ values
+    return sums
+
+
 def calc_sorted_median(arr):
     half = (len(arr) - 1) // 2
     if len(arr) % 2 == 0:
@@ -103,12 +117,22 @@ def calc_sorted_median(arr):
         return arr[half]
 
 
+# to enable pickling of namedtuple, name of variable and name of tuple have to match
+StandardQFNumeric_parameters = namedtuple(
+    "StandardQFNumeric_parameters", ("size_sg", "mean", "estimate")
+)
+StandardQFNumeric_median_parameters = namedtuple(
+    "StandardQFNumeric_median_parameters", ("size_sg", "median", "estimate")
+)
+StandardQFNumericTscore_parameters = namedtuple(
+    "StandardQFNumericTscore_parameters", ("size_sg", "mean", "std", "estimate")
+)
+
+
 class StandardQFNumeric(ps.BoundedInterestingnessMeasure):
-    tpl = namedtuple("StandardQFNumeric_parameters", ("size_sg", "mean", "estimate"))
+    tpl = StandardQFNumeric_parameters
     mean_tpl = tpl
-    median_tpl = namedtuple(
-        "StandardQFNumeric_median_parameters", ("size_sg", "median", "estimate")
-    )
+    median_tpl = StandardQFNumeric_median_parameters
 
     @staticmethod
     def standard_qf_numeric(a, _, mean_dataset, instances_subgroup, mean_sg):
@@ -215,10 +239,48 @@ class StandardQFNumeric(ps.BoundedInterestingnessMeasure):
             estimate = float("-inf")
         return self.tpl(sg_size, sg_centroid, estimate)
 
+    def calculate_statistics_batch(self, covers, target, data):
+        """
+        Computes the statistics of many subgroups at once. covers is a 2-D
+        (subgroups x instances) matrix as returned by get_cover_matrix,
+        the result contains one array per statistic.
+        """
+        covers = ps.get_boolean_cover_matrix(covers, len(self.all_target_values))
+        if self.agg is not np.mean or not hasattr(self.estimator, "get_estimate_batch"):
+            # medians and the ordering estimate are computed one subgroup at a time
+            statistics = [
+                self.calculate_statistics(cover_arr, target, data)
+                for cover_arr in covers
+            ]
+            columns = list(zip(*statistics)) or [()] * len(self.tpl._fields)
+            return self.tpl._make(np.array(column) for column in columns)
+        sizes = np.count_nonzero(covers, axis=1)
+        non_empty = sizes > 0
+        sums = masked_row_sums(covers, self.all_target_values)
+        means = np.zeros(len(covers))
+        means[non_empty] = sums[non_empty] / sizes[non_empty]
+        estimates = self.estimator.get_estimate_batch(covers)
+        estimates[~non_empty] = float("-inf")
+        return self.tpl(sizes, means, estimates)
+
+    def evaluate_batch(self, statistics):
+        """Quality of many subgroups given statistics from calculate_statistics_batch"""
+        dataset = self.dataset_statistics
+        return StandardQFNumeric.standard_qf_numeric(
+            self.a,
+            dataset.size_sg,
+            self.read_centroid(dataset),
+            np.asarray(statistics.size_sg),
+            np.asarray(self.read_centroid(statistics)),
+        )
+
     def optimistic_estimate(self, subgroup, target, data, statistics=None):
         statistics = self.ensure_statistics(subgroup, target, data, statistics)
         return statistics.estimate
 
+    def optimistic_estimate_batch(self, statistics):
+        return np.asarray(statistics.estimate)
+
     class Summation_Estimator:
         r"""\
         This estimator calculates the optimistic estimate as a hyppothetical subgroup\
@@ -262,6 +324,15 @@ class StandardQFNumeric(ps.BoundedInterestingnessMeasure):
                 self.qf.dataset_statistics
             )
 
+        def get_estimate_batch(self, covers):
+            centroid = self.qf.read_centroid(self.qf.dataset_statistics)
+            excess = np.where(
+                self.indices_greater_centroid,
+                self.target_values_greater_centroid - centroid,
+                0,
+            )
+            return masked_row_sums(covers, excess)
+
     class Max_Estimator:
         r"""
         This estimator calculates the optimistic estimate
@@ -274,6 +345,7 @@ class StandardQFNumeric(ps.BoundedInterestingnessMeasure):
             self.qf = qf
             self.indices_greater_centroid = None
             self.target_values_greater_centroid = None
+            self.order_greater_centroid = None
 
         def get_data(self, data, target):  # pylint: disable=unused-argument
             return data
@@ -286,6 +358,11 @@ class StandardQFNumeric(ps.BoundedInterestingnessMeasure):
                 > self.qf.read_centroid(self.qf.dataset_statistics)
             )
             self.target_values_greater_centroid = self.qf.all_target_values
+            # the instances greater than the centroid by decreasing value
+            greater = np.flatnonzero(self.indices_greater_centroid)
+            self.order_greater_centroid = greater[
+                np.argsort(-self.target_values_greater_centroid[greater], kind="stable")
+            ]
 
         def get_estimate(
             self, subgroup, sg_size, sg_centroid, cover_arr, _
@@ -302,6 +379,22 @@ class StandardQFNumeric(ps.BoundedInterestingnessMeasure):
                 max_greater_centroid - self.qf.read_centroid(self.qf.dataset_statistics)
             )
 
+        def get_estimate_batch(self, covers):
+            # the maximum of a row is the value of its first covered instance
+            order = self.order_greater_centroid
+            covers_greater = covers[:, order]
+            sizes_greater = np.count_nonzero(covers_greater, axis=1)
+            max_greater = np.full(len(covers), -np.inf)
+            if len(order) > 0:
+                first = np.argmax(covers_greater, axis=1)
+                max_greater = self.target_values_greater_centroid[order[first]]
+            with np.errstate(invalid="ignore"):
+                estimates = sizes_greater.astype(float) ** self.qf.a * (
+                    max_greater - self.qf.read_centroid(self.qf.dataset_statistics)
+                )
+            estimates[sizes_greater == 0] = -np.inf
+            return estimates
+
     class MeanOrdering_Estimator:
         def __init__(self, qf):
             self.qf = qf
@@ -385,9 +478,7 @@ class StandardQFNumericMedian(ps.BoundedInterestingnessMeasure):
 
 
 class StandardQFNumericTscore(ps.BoundedInterestingnessMeasure):
-    tpl = namedtuple(
-        "StandardQFNumericTscore_parameters", ("size_sg", "mean", "std", "estimate")
-    )
+    tpl = StandardQFNumericTscore_parameters
 
     @staticmethod
     def t_score(mean_dataset, instances_subgroup, mean_sg, std_sg):
@@ -441,6 +532,26 @@ class StandardQFNumericTscore(ps.BoundedInterestingnessMeasure):
             estimate = float("-inf")
         return StandardQFNumericTscore.tpl(sg_size, sg_mean, sg_std, estimate)
 
+    def calculate_statistics_batch(
+        self, covers, target, data
+    ):  # pylint: disable=unused-argument
+        covers = ps.get_boolean_cover_matrix(covers, len(self.all_target_values))
+        sizes = np.count_nonzero(covers, axis=1)
+        non_empty = sizes > 0
+        # shift by the dataset mean for numerical stability of the variance
+        centered = self.all_target_values - self.dataset_statistics.mean
+        sums = masked_row_sums(covers, np.column_stack([centered, centered * centered]))
+        first_moments = sums[non_empty, 0] / sizes[non_empty]
+        second_moments = sums[non_empty, 1] / sizes[non_empty]
+        means = np.zeros(len(covers))
+        stds = np.zeros(len(covers))
+        means[non_empty] = self.dataset_statistics.mean + first_moments
+        stds[non_empty] = np.sqrt(
+            np.maximum(second_moments - first_moments * first_moments, 0)
+        )
+        estimates = np.where(non_empty, np.inf, float("-inf"))
+        return StandardQFNumericTscore.tpl(sizes, means, stds, estimates)
+
     def optimistic_estimate(self, subgroup, target, data, statistics=None):
         statistics = self.ensure_statistics(subgroup, target, data, statistics)
         return statistics.estimate
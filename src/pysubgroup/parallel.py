@@ -0,0 +1,542 @@
+"""
+Evaluation of subgroups, depth-first search and GP-growth in a pool of worker
+processes.
+
+The selector covers and the large arrays held by the quality function are written
+once to memory-mapped files. Workers open these files read-only, so they share the
+pages with each other instead of receiving a pickled copy of the whole task.
+"""
+import hashlib
+import io
+import itertools
+import math
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+from heapq import heappush, heapreplace, nlargest
+from multiprocessing import Pool, Value
+
+import numpy as np
+
+import pysubgroup as ps
+
+
+class MemmapArrayStore:
+    """
+    Stores numpy arrays as memory-mapped .npy files in a temporary directory.
+
+    Objects pickled with `dumps` refer to these files instead of containing the
+    data of arrays larger than `min_nbytes`; `loads` maps the files back in.
+    """
+
+    def __init__(self, min_nbytes=1 << 16, directory=None):
+        self.directory = tempfile.mkdtemp(prefix="pysubgroup_", dir=directory)
+        self.min_nbytes = min_nbytes
+        # maps the digest of an array to its path, so equal arrays are stored once
+        self._paths = {}
+        self._n_files = 0
+
+    def _new_path(self, suffix):
+        self._n_files += 1
+        return os.path.join(self.directory, f"{self._n_files}{suffix}")
+
+    def create(self, shape, dtype):
+        """Returns the path and a writable memmap of a new array in the store"""
+        path = self._new_path(".npy")
+        return path, np.lib.format.open_memmap(
+            path, mode="w+", dtype=dtype, shape=shape
+        )
+
+    def add(self, arr):
+        arr = np.ascontiguousarray(arr)
+        key = (arr.dtype.str, arr.shape, hashlib.blake2b(arr.data).hexdigest())
+        if key not in self._paths:
+            path, out = self.create(arr.shape, arr.dtype)
+            out[...] = arr
+            out.flush()
+            self._paths[key] = path
+        return self._paths[key]
+
+    def write(self, payload):
+        """Writes the bytes payload to a new file in the store, returns its path"""
+        path = self._new_path(".pkl")
+        with open(path, "wb") as f:
+            f.write(payload)
+        return path
+
+    def dumps(self, obj):
+        buffer = io.BytesIO()
+        _StorePickler(buffer, self).dump(obj)
+        return buffer.getvalue()
+
+    @staticmethod
+    def loads(payload):
+        return _StoreUnpickler(io.BytesIO(payload)).load()
+
+    @staticmethod
+    def load(path):
+        return np.asarray(np.load(path, mmap_mode="r"))
+
+    def close(self):
+        self._paths.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class _StorePickler(pickle.Pickler):
+    def __init__(self, file, store):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.store = store
+
+    def persistent_id(self, obj):  # pylint: disable=method-hidden
+        if (
+            type(obj) is np.ndarray  # pylint: disable=unidiomatic-typecheck
+            and not obj.dtype.hasobject
+            and obj.nbytes >= self.store.min_nbytes
+        ):
+            return ("memmap", self.store.add(obj))
+        return None
+
+
+class _StoreUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        _, path = pid
+        return MemmapArrayStore.load(path)
+
+
+# state of a worker process, (re)loaded by _load_state whenever a job refers to a
+# different state file than the previous one
+_worker = {}
+
+
+def _load_state(state_path):
+    if _worker.get("state_path") == state_path:
+        return
+    _worker.clear()
+    with open(state_path, "rb") as f:
+        _worker.update(MemmapArrayStore.loads(f.read()))
+    _worker["covers"] = MemmapArrayStore.load(_worker.pop("covers_path"))
+    _worker["state_path"] = state_path
+
+
+def evaluate_candidates(candidates, covers, n_instances, qf, target, search_space):
+    """
+    Computes (sg_inds, quality, statistics) for each tuple of selector indices
+    in candidates. covers holds the packed cover of each selector in a row.
+    """
+    packed = np.empty((len(candidates), covers.shape[1]), dtype=np.uint64)
+    for i, sg_inds in enumerate(candidates):
+        np.bitwise_and.reduce(covers[list(sg_inds)], axis=0, out=packed[i])
+    if hasattr(qf, "calculate_statistics_batch"):
+        batch = qf.calculate_statistics_batch(packed, target, None)
+        statistics = [batch.__class__._make(row) for row in zip(*batch)]
+    else:
+        statistics = [
+            qf.calculate_statistics(cover_arr, target, None)
+            for cover_arr in ps.unpack_bitset(packed, n_instances)
+        ]
+    results = []
+    for sg_inds, stats in zip(candidates, statistics):
+        sg = ps.sg_from_inds(search_space, sg_inds)
+        results.append((sg_inds, qf.evaluate(sg, target, None, stats), stats))
+    return results
+
+
+def _evaluate_candidates_in_worker(job):
+    state_path, candidates = job
+    _load_state(state_path)
+    return evaluate_candidates(
+        candidates,
+        _worker["covers"],
+        _worker["n_instances"],
+        _worker["qf"],
+        _worker["target"],
+        _worker["search_space"],
+    )
+
+
+class SharedCoverPool:
+    """
+    Pool of worker processes that evaluate subgroups given as lists of indices
+    into `task.search_space`.
+
+    The pool is meant to be created once and handed to several algorithm runs,
+    e.g. `ps.BeamSearch(executor=pool)`. `prepare(task)` makes a task resident
+    in the workers: the packed covers of all selectors and the arrays of the
+    quality function are written to memory-mapped files, which the workers map
+    in when they receive their next job. The covers are only recomputed if
+    `task.data` or `task.search_space` changed since the previous call, and the
+    workers keep their state if the quality function and the target did not
+    change either. The quality function needs to compute its statistics from a
+    cover array alone, i.e. without `data`.
+
+    Candidates are split into chunks of about `len(candidates) / (4 * nproc)`,
+    such that a chunk of packed covers does not exceed `chunk_nbytes`.
+    """
+
+    def __init__(self, nproc, chunk_nbytes=1 << 26, directory=None):
+        self.nproc = nproc
+        self.chunk_nbytes = chunk_nbytes
+        self.directory = directory
+        self.store = None
+        self.pool = Pool(nproc)
+        self._data_ref = None
+        self._search_space = None
+        self._covers_path = None
+        self._n_words = 0
+        self._state_path = None
+        self._state_payload = None
+
+    def _prepare_covers(self, task):
+        if (
+            self._data_ref is not None
+            and self._data_ref() is task.data
+            and self._search_space == task.search_space
+        ):
+            return
+        if self.store is not None:
+            self.store.close()
+        self.store = MemmapArrayStore(directory=self.directory)
+        self._state_payload = None
+        n_instances = len(task.data)
+        self._n_words = (n_instances + 63) // 64
+        self._covers_path, covers = self.store.create(
+            (len(task.search_space), self._n_words), np.uint64
+        )
+        for i, sel in enumerate(task.search_space):
+            covers[i] = ps.pack_bitset(sel.covers(task.data))
+        covers.flush()
+        self._data_ref = weakref.ref(task.data)
+        self._search_space = list(task.search_space)
+
+    def prepare(self, task):
+        """
+        Makes task resident in the workers. The quality function has to be
+        prepared with `calculate_constant_statistics` beforehand.
+        """
+        self._prepare_covers(task)
+        payload = self.store.dumps(
+            {
+                "covers_path": self._covers_path,
+                "n_instances": len(task.data),
+                "qf": task.qf,
+                "target": task.target,
+                "search_space": task.search_space,
+            }
+        )
+        if payload != self._state_payload:
+            self._state_path = self.store.write(payload)
+            self._state_payload = payload
+
+    def chunksize(self, n_candidates):
+        chunksize = math.ceil(n_candidates / (4 * self.nproc))
+        max_chunksize = max(1, self.chunk_nbytes // (8 * max(1, self._n_words)))
+        return max(1, min(chunksize, max_chunksize))
+
+    def imap(self, candidates, chunksize=None):
+        """
+        Yields (sg_inds, quality, statistics) for all candidates of the task
+        last passed to `prepare`, in the order of candidates
+        """
+        if self._state_path is None:
+            raise RuntimeError("SharedCoverPool.prepare has to be called first")
+        if chunksize is None:
+            chunksize = self.chunksize(len(candidates))
+        jobs = [
+            (self._state_path, candidates[start : start + chunksize])
+            for start in range(0, len(candidates), chunksize)
+        ]
+        for results in self.pool.imap(_evaluate_candidates_in_worker, jobs):
+            yield from results
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _Collector:
+    """
+    Collects every subgroup that may be part of the top-k result, instead of
+    keeping a result heap. The records are keyed by the position at which the
+    sequential search would have added them.
+
+    The quality of the k-th best subgroup found so far by any process is
+    shared through threshold. Subgroups which are strictly worse can be
+    pruned, those which tie with the final k-th best subgroup are kept.
+    """
+
+    def __init__(self, task, threshold):
+        self.task = task
+        self.threshold = threshold
+        self.qualities = []
+        self.records = []
+
+    def minimum_required_quality(self):
+        if len(self.qualities) < self.task.result_set_size:
+            local = self.task.min_quality
+        else:
+            local = self.qualities[0]
+        return max(local, self.threshold.value)
+
+    def _record(self, key, sg, quality, statistics, sel_inds):
+        task = self.task
+        if not quality >= self.minimum_required_quality():
+            return
+        if not ps.constraints_satisfied(task.constraints, sg, statistics, task.data):
+            return
+        self.records.append((key, quality, sel_inds, statistics))
+        if len(self.qualities) < task.result_set_size:
+            heappush(self.qualities, quality)
+        elif quality > self.qualities[0]:
+            heapreplace(self.qualities, quality)
+        else:
+            return
+        if len(self.qualities) == task.result_set_size:
+            with self.threshold.get_lock():
+                if self.qualities[0] > self.threshold.value:
+                    self.threshold.value = self.qualities[0]
+        if len(self.records) > 4 * task.result_set_size + 1024:
+            self.records = self.pop_records()
+
+    def pop_records(self):
+        """Returns and clears the records which can still be part of the result"""
+        required = self.minimum_required_quality()
+        records = [record for record in self.records if record[1] >= required]
+        self.records = []
+        return records
+
+
+def _replay_records(records, task, result, to_sg):
+    """Adds the records to result in the order of the sequential search"""
+    if len(records) >= task.result_set_size:
+        required = nlargest(task.result_set_size, [record[1] for record in records])
+        records = [record for record in records if record[1] >= required[-1]]
+    records.sort(key=lambda record: record[0])
+    for _, quality, sel_inds, statistics in records:
+        sg = to_sg(sel_inds)
+        ps.add_if_required(result, sg, quality, task, statistics=statistics)
+    return result
+
+
+class _DFSCollector(_Collector):
+    """
+    Depth-first search which collects the subgroups that may be part of the
+    top-k result of the sequential DFS. The path of a subgroup (the positions
+    of the refinements taken from the root) determines the order in which the
+    sequential DFS would have visited it.
+    """
+
+    def __init__(self, task, operator, threshold, split_depth=None):
+        super().__init__(task, threshold)
+        self.operator = operator
+        self.split_depth = split_depth
+        self.index = {sel: i for i, sel in enumerate(task.search_space)}
+        self.subtrees = []
+
+    def _add(self, path, sg, quality, statistics):
+        sel_inds = tuple(self.index[sel] for sel in sg._selectors)
+        self._record(path, sg, quality, statistics, sel_inds)
+
+    def search(self, sg, path=()):
+        task = self.task
+        statistics = task.qf.calculate_statistics(sg, task.target, task.data)
+        if not ps.constraints_satisfied(
+            task.constraints_monotone, sg, statistics, task.data
+        ):
+            return
+        optimistic_estimate = task.qf.optimistic_estimate(
+            sg, task.target, task.data, statistics
+        )
+        if not optimistic_estimate >= self.minimum_required_quality():
+            return
+        quality = task.qf.evaluate(sg, task.target, task.data, statistics)
+        self._add(path, sg, quality, statistics)
+
+        if sg.depth < task.depth:
+            for i, new_sg in enumerate(self.operator.refinements(sg)):
+                if new_sg.depth == self.split_depth:
+                    sel_inds = tuple(self.index[sel] for sel in new_sg._selectors)
+                    self.subtrees.append((path + (i,), sel_inds))
+                else:
+                    self.search(new_sg, path + (i,))
+
+
+# state of a DFS worker process, filled by _init_dfs_worker
+_dfs_worker = {}
+
+
+def _init_dfs_worker(payload, threshold):
+    state = MemmapArrayStore.loads(payload)
+    task = state["task"]
+    representation = state["apply_representation"](task.data, task.search_space)
+    representation.__enter__()
+    _dfs_worker["representation"] = representation
+    _dfs_worker["collector"] = _DFSCollector(
+        task, ps.StaticSpecializationOperator(task.search_space), threshold
+    )
+
+
+def _search_dfs_subtree(job):
+    path, sel_inds = job
+    collector = _dfs_worker["collector"]
+    search_space = collector.task.search_space
+    sg = _dfs_worker["representation"].Conjunction([search_space[i] for i in sel_inds])
+    collector.search(sg, path)
+    return collector.pop_records()
+
+
+def parallel_dfs(
+    task, representation, apply_representation, operator, nproc, split_depth=2
+):
+    """
+    Depth-first search over the refinements of `operator` in nproc processes.
+
+    The subtrees rooted at depth `split_depth` are searched by a pool of
+    worker processes, which share the quality required to enter the top-k
+    result. Returns the same result heap as `DFS.search_internal` for the
+    representation entered in the current process. The quality function has
+    to be prepared with `calculate_constant_statistics` beforehand.
+    """
+    threshold = Value("d", float("-inf"))
+    store = MemmapArrayStore()
+    payload = store.dumps({"task": task, "apply_representation": apply_representation})
+    pool = Pool(nproc, initializer=_init_dfs_worker, initargs=(payload, threshold))
+    try:
+        collector = _DFSCollector(task, operator, threshold, split_depth)
+        collector.search(representation.Conjunction([]))
+        records = collector.pop_records()
+        for subtree_records in pool.imap_unordered(
+            _search_dfs_subtree, collector.subtrees
+        ):
+            records.extend(subtree_records)
+        pool.close()
+        pool.join()
+    finally:
+        pool.terminate()
+        store.close()
+
+    return _replay_records(
+        records,
+        task,
+        [],
+        lambda sel_inds: representation.Conjunction(
+            [task.search_space[i] for i in sel_inds]
+        ),
+    )
+
+
+class _GpCollector(_Collector, ps.GpGrowth):
+    """
+    GpGrowth which collects the patterns that may be part of the top-k result
+    of the sequential search. A pattern is keyed by the position of the tree
+    at the top level it was found in and the order in which it was found.
+
+    If a pool is given, the trees of the classes at the top level (bottom
+    up) or the suffix trees at the top level (top down) are collected as jobs.
+    """
+
+    def __init__(self, gp, threshold, pool=None):
+        ps.GpGrowth.__init__(self, gp.mode)
+        self.__dict__.update(gp.__dict__)
+        _Collector.__init__(self, gp.task, threshold)
+        self.pool = pool
+        self.jobs = []
+        self.job_index = -1
+        self._counter = itertools.count()
+
+    def add_if_required(self, prefix, gp_stats):
+        quality, statistics = self.score_prefix(prefix, gp_stats)
+        key = (self.job_index, next(self._counter))
+        self._record(key, prefix, quality, statistics, prefix)
+
+    def add_patterns_if_required(self, patterns):
+        for (indices, _), (quality, statistics) in zip(
+            patterns, self.score_patterns(patterns)
+        ):
+            key = (self.job_index, next(self._counter))
+            self._record(key, indices, quality, statistics, indices)
+
+    def recurse_class(self, tree, prefix, cls, gp_stats):
+        if self.pool is not None and len(prefix) == 0 and self.depth > 1:
+            self.jobs.append((len(self.jobs), cls, gp_stats))
+        else:
+            super().recurse_class(tree, prefix, cls, gp_stats)
+
+    def mine_suffix_tree(self, tree, prefix, cls, gp_stats, depth, max_length):
+        if self.pool is not None and depth == 1:
+            self.jobs.append((len(self.jobs), prefix, cls, gp_stats, max_length))
+            return iter(())
+        return super().mine_suffix_tree(tree, prefix, cls, gp_stats, depth, max_length)
+
+
+# state of a GP-growth worker process, filled by _init_gp_worker
+_gp_worker = {}
+
+
+def _init_gp_worker(payload, threshold):
+    state = MemmapArrayStore.loads(payload)
+    _gp_worker["tree"] = state["tree"]
+    _gp_worker["collector"] = _GpCollector(state["gp"], threshold)
+
+
+def _mine_gp_class(job):
+    job_index, cls, gp_stats = job
+    collector = _gp_worker["collector"]
+    collector.job_index = job_index
+    collector.recurse_class(_gp_worker["tree"], (), cls, gp_stats)
+    return collector.pop_records()
+
+
+def _mine_gp_suffix_tree(job):
+    job_index, prefix, cls, gp_stats, max_length = job
+    collector = _gp_worker["collector"]
+    collector.job_index = job_index
+    collector.add_top_down_patterns(
+        collector.mine_suffix_tree(
+            _gp_worker["tree"], prefix, cls, gp_stats, 1, max_length
+        )
+    )
+    return collector.pop_records()
+
+
+def parallel_gp_growth(gp, tree, nproc):
+    """
+    Mines the tree of the GpGrowth gp in nproc processes.
+
+    The initial tree is shared with the workers through memory-mapped files,
+    each of them mines the trees of some classes at the top level. The
+    workers share the quality required to enter the top-k result. Returns the
+    same result heap as the sequential search. gp has to be set up for its
+    task beforehand.
+    """
+    threshold = Value("d", float("-inf"))
+    store = MemmapArrayStore()
+    payload = store.dumps({"gp": gp, "tree": tree})
+    pool = Pool(nproc, initializer=_init_gp_worker, initargs=(payload, threshold))
+    try:
+        collector = _GpCollector(gp, threshold, pool)
+        if gp.mode == "t_d":
+            collector.add_top_down_patterns(collector.recurse_top_down(tree))
+            mine_job = _mine_gp_suffix_tree
+        else:
+            collector.recurse(tree, ())
+            mine_job = _mine_gp_class
+        records = collector.pop_records()
+        for job_records in pool.imap_unordered(mine_job, collector.jobs):
+            records.extend(job_records)
+        pool.close()
+        pool.join()
+    finally:
+        pool.terminate()
+        store.close()
+    return _replay_records(records, gp.task, list(gp.results), lambda inds: inds)
@@ -31,10 +31,14 @@ class StaticSpecializationOperator:
 class StaticGeneralizationOperator:
     def __init__(self, selectors):
         self.search_space = selectors
+        self.search_space_index = {}
+        for i, selector in enumerate(selectors):
+            self.search_space_index.setdefault(selector.selector_id, i)
 
     def refinements(self, sG):
         index_of_last_selector = min(
-            self.search_space.index(sG._selectors[-1]), len(self.search_space) - 1
+            self.search_space_index[sG._selectors[-1].selector_id],
+            len(self.search_space) - 1,
         )
         new_selectors = self.search_space[index_of_last_selector + 1 :]
 
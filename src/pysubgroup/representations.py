@@ -1,18 +1,39 @@
 import numpy as np
 
+import pysubgroup as ps
 from pysubgroup.subgroup_description import Conjunction, Disjunction
 
 
 class RepresentationBase:
+    # the attributes which patch_selector sets on the selectors
+    patched_attributes = ("representation", "size_sg", "bitset")
+
     def __init__(self, new_conjunction, selectors_to_patch):
         self._new_conjunction = new_conjunction
         self.previous_conjunction = None
         self.selectors_to_patch = selectors_to_patch
+        self._previous_attributes = []
 
     def patch_all_selectors(self):
+        # the selectors are interned and shared, so their previous attributes
+        # are restored on exit
+        names = self.patched_attributes
+        self._previous_attributes = [
+            (sel, {a: getattr(sel, a) for a in names if hasattr(sel, a)})
+            for sel in self.selectors_to_patch
+        ]
         for sel in self.selectors_to_patch:
             self.patch_selector(sel)
 
+    def undo_patch_all_selectors(self):
+        for sel, previous in self._previous_attributes:
+            for name in self.patched_attributes:
+                if hasattr(sel, name):
+                    delattr(sel, name)
+            for name, value in previous.items():
+                setattr(sel, name, value)
+        self._previous_attributes = []
+
     def patch_selector(self, sel):  # pragma: no cover
         raise NotImplementedError()  # pragma: no cover
 
@@ -28,16 +49,27 @@ class RepresentationBase:
         return self
 
     def __exit__(self, *args):
+        self.undo_patch_all_selectors()
         self.undo_patch_classes()
 
 
 class BitSet_Conjunction(Conjunction):
+    __slots__ = ("representation",)
+
     n_instances = 0
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.representation = self.compute_representation()
 
+    @classmethod
+    def from_representation(cls, selectors, representation):
+        """Creates the conjunction of selectors whose representation is known"""
+        sg = cls.__new__(cls)
+        Conjunction.__init__(sg, selectors)
+        sg.representation = representation
+        return sg
+
     def compute_representation(self):
         # empty description ==> return a list of all '1's
         if not self._selectors:
@@ -61,6 +93,8 @@ class BitSet_Conjunction(Conjunction):
 
 
 class BitSet_Disjunction(Disjunction):
+    __slots__ = ("representation",)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.representation = self.compute_representation()
@@ -104,7 +138,162 @@ class BitSetRepresentation(RepresentationBase):
         super().patch_classes()
 
 
+#####
+# packed bitset operations
+#####
+if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+
+    def _bit_counts(words):
+        return np.bitwise_count(words)
+
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _bit_counts(words):
+        return _POPCOUNT_TABLE[words.view(np.uint8)]
+
+
+def popcount(words, axis=None):
+    """Number of set bits in packed words; with axis=-1 one count per row is returned"""
+    if axis is None:
+        return int(_bit_counts(words).sum(dtype=np.int64))
+    return _bit_counts(words).sum(axis=axis, dtype=np.int64)
+
+
+def pack_bitset(bool_arr):
+    """Packs a boolean cover into little-endian uint64 words (padding bits are 0)"""
+    bool_arr = np.asarray(bool_arr, dtype=bool)
+    n_words = (len(bool_arr) + 63) // 64
+    packed = np.zeros(n_words * 8, dtype=np.uint8)
+    packed[: (len(bool_arr) + 7) // 8] = np.packbits(bool_arr, bitorder="little")
+    return packed.view("<u8")
+
+
+def unpack_bitset(words, n_instances):
+    """Inverse of pack_bitset, 2-D inputs are unpacked row by row"""
+    return np.unpackbits(
+        words.view(np.uint8), axis=-1, count=n_instances, bitorder="little"
+    ).view(bool)
+
+
+class PackedBitSet_Conjunction(Conjunction):
+    __slots__ = ("representation",)
+
+    n_instances = 0
+    is_packed = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.representation = self.compute_representation()
+
+    @classmethod
+    def from_representation(cls, selectors, representation):
+        """Creates the conjunction of selectors whose representation is known"""
+        sg = cls.__new__(cls)
+        Conjunction.__init__(sg, selectors)
+        sg.representation = representation
+        return sg
+
+    def compute_representation(self):
+        # empty description ==> return a list of all '1's
+        if not self._selectors:
+            n_instances = PackedBitSet_Conjunction.n_instances
+            return pack_bitset(np.ones(n_instances, dtype=bool))
+        # non-empty description
+        result = self._selectors[0].representation.copy()
+        for sel in self._selectors[1:]:
+            np.bitwise_and(result, sel.representation, out=result)
+        return result
+
+    @property
+    def size_sg(self):
+        return popcount(self.representation)
+
+    def append_and(self, to_append):
+        super().append_and(to_append)
+        self.representation = np.bitwise_and(
+            self.representation, to_append.representation
+        )
+
+    def __array__(self, dtype=None, copy=None):  # pylint: disable=unused-argument
+        arr = unpack_bitset(self.representation, PackedBitSet_Conjunction.n_instances)
+        if dtype is not None:
+            return arr.astype(dtype)
+        return arr
+
+
+class PackedBitSet_Disjunction(Disjunction):
+    __slots__ = ("representation",)
+
+    is_packed = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.representation = self.compute_representation()
+
+    def compute_representation(self):
+        # empty description ==> return a list of all '0's
+        if not self._selectors:
+            return pack_bitset(
+                np.zeros(PackedBitSet_Conjunction.n_instances, dtype=bool)
+            )
+        # non-empty description
+        result = self._selectors[0].representation.copy()
+        for sel in self._selectors[1:]:
+            np.bitwise_or(result, sel.representation, out=result)
+        return result
+
+    @property
+    def size_sg(self):
+        return popcount(self.representation)
+
+    def append_or(self, to_append):
+        super().append_or(to_append)
+        self.representation = np.bitwise_or(
+            self.representation, to_append.representation
+        )
+
+    def __array__(self, dtype=None, copy=None):  # pylint: disable=unused-argument
+        arr = unpack_bitset(self.representation, PackedBitSet_Conjunction.n_instances)
+        if dtype is not None:
+            return arr.astype(dtype)
+        return arr
+
+
+class PackedBitSetRepresentation(RepresentationBase):
+    """
+    Stores covers as packed uint64 words (one bit per instance), which uses an
+    eighth of the memory of BitSetRepresentation. Sizes are computed by popcount.
+    """
+
+    Conjunction = PackedBitSet_Conjunction
+    Disjunction = PackedBitSet_Disjunction
+
+    def __init__(self, df, selectors_to_patch):
+        self.df = df
+        super().__init__(PackedBitSet_Conjunction, selectors_to_patch)
+
+    def patch_selector(self, sel):
+        cover_cache = ps.SelectorBase.cover_cache
+        if isinstance(self.df, ps.ChunkedCoverStore) and sel in self.df:
+            # the packed cover is mapped from disk
+            sel.representation = self.df.packed_cover(sel)
+        elif isinstance(cover_cache, ps.PersistentCoverStore) and (
+            type(self.df).__name__ == "DataFrame"
+        ):
+            sel.representation = cover_cache.packed_cover(sel, self.df)
+        else:
+            sel.representation = pack_bitset(sel.covers(self.df))
+        sel.size_sg = popcount(sel.representation)
+
+    def patch_classes(self):
+        PackedBitSet_Conjunction.n_instances = len(self.df)
+        super().patch_classes()
+
+
 class Set_Conjunction(Conjunction):
+    __slots__ = ("representation", "arr_for_interface")
+
     all_set = set()
 
     def __init__(self, *args, **kwargs):
@@ -150,6 +339,8 @@ class SetRepresentation(RepresentationBase):
 
 
 class NumpySet_Conjunction(Conjunction):
+    __slots__ = ("representation",)
+
     all_set = None
 
     def __init__(self, *args, **kwargs):
@@ -172,9 +363,14 @@ class NumpySet_Conjunction(Conjunction):
     def append_and(self, to_append):
         super().append_and(to_append)
         # self._selectors.append(to_append)
-        self.representation = np.intersect1d(
-            self.representation, to_append.representation, True
-        )
+        bitset = getattr(to_append, "bitset", None)
+        if bitset is not None:
+            # only look at the instances of this subgroup
+            self.representation = self.representation[bitset[self.representation]]
+        else:
+            self.representation = np.intersect1d(
+                self.representation, to_append.representation, True
+            )
 
     @property
     def __array_interface__(self):
@@ -189,7 +385,8 @@ class NumpySetRepresentation(RepresentationBase):
         super().__init__(NumpySet_Conjunction, selectors_to_patch)
 
     def patch_selector(self, sel):
-        sel.representation = np.nonzero(sel.covers(self.df))[0]
+        sel.bitset = np.asarray(sel.covers(self.df), dtype=bool)
+        sel.representation = np.nonzero(sel.bitset)[0]
         sel.size_sg = len(sel.representation)
 
     def patch_classes(self):
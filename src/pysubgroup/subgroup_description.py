@@ -4,9 +4,10 @@ Created on 28.04.2016
 @author: lemmerfn
 """
 import copy
+import hashlib
 import weakref
-from abc import ABC, abstractmethod
-from functools import total_ordering
+from abc import ABC, ABCMeta, abstractmethod
+from functools import lru_cache, total_ordering
 from itertools import chain
 
 import numpy as np
@@ -14,71 +15,113 @@ import numpy as np
 import pysubgroup as ps
 
 
-# @total_ordering
-# class SelectorBase(ABC):
-#     # selector cache
-#     __refs__ = weakref.WeakSet()
+class SelectorMeta(ABCMeta):
+    """Interns the selectors, such that each selector exists only once.
 
-#     def __new__(cls, *args, **kwargs):
-#         """Ensures that each selector only exists once."""
+    Constructing a selector which already exists returns the existing instance."""
 
-#         # create temporary selector
-#         tmp = super().__new__(cls)
-#         tmp.set_descriptions(*args, **kwargs)
+    def __call__(cls, *args, **kwargs):
+        return SelectorBase.intern(super().__call__(*args, **kwargs))
 
-#         # save original arguments
-#         # NOTE: this is a fix for pickle
-#         #       so we can call `__getnewargs_ex__` with the right arguments
-#         # TODO: this may have unintended side effects if args,
-#         #       kwargs are large or volatile (I don't think we have that yet though)
-#         tmp.__new_args__ = args, kwargs
 
-#         # check if selector is already in cache (__refs__)
-#         # if so, return cached instance
-#         if tmp not in SelectorBase.__refs__:
-#             return tmp  # new selector
-#         # (not sure why we never have the below case)
-#         for ref in SelectorBase.__refs__:  # pragma no branch okay
-#             if ref == tmp:
-#                 return ref
-#         # if not return
-#         return tmp  # pragma: no cover
-
-#     def __getnewargs_ex__(self):  # pylint: disable=invalid-getnewargs-ex-returned
-#         tmp_args = self.__new_args__
-#         del self.__new_args__
-#         return tmp_args
+@total_ordering
+class SelectorBase(metaclass=SelectorMeta):
+    # representation, size_sg and bitset are only set by the representations
+    __slots__ = (
+        "selector_id",
+        "_hash",
+        "_query",
+        "representation",
+        "size_sg",
+        "bitset",
+        "__weakref__",
+    )
+    # the active ps.SelectorCoverCache, if any
+    cover_cache = None
+    # the interned selectors by their class and intern_key
+    __refs__ = weakref.WeakValueDictionary()
+    # the dense ids of the reprs of the live selectors, equal selectors share
+    # their id. The id of a repr is freed, and later reused, once the last
+    # selector with this repr is garbage collected.
+    __ids__ = {}
+    # the number of live selectors with each id and the freed ids
+    _id_counts = {}
+    _free_ids = []
+    # attributes which are set after the construction and are kept when pickling
+    _state_attributes = ("is_bool", "sorted_column")
 
-#     def __init__(self):
-#         # add selector to cache
-#         # TODO: why not do this in `__new__`,
-#         # then it would be all together in one function?
-#         SelectorBase.__refs__.add(self)
+    @staticmethod
+    def intern(selector):
+        """Returns the existing selector which is identical to selector, if any,
+        and registers selector otherwise"""
+        key = (type(selector), selector.intern_key())
+        existing = SelectorBase.__refs__.get(key)
+        if existing is not None:
+            return existing
+        name = repr(selector)
+        selector_id = SelectorBase.__ids__.get(name)
+        if selector_id is None:
+            free_ids = SelectorBase._free_ids
+            selector_id = free_ids.pop() if free_ids else len(SelectorBase.__ids__)
+            SelectorBase.__ids__[name] = selector_id
+        counts = SelectorBase._id_counts
+        counts[selector_id] = counts.get(selector_id, 0) + 1
+        weakref.finalize(selector, SelectorBase._release_id, name).atexit = False
+        selector.selector_id = selector_id
+        SelectorBase.__refs__[key] = selector
+        return selector
 
-#     def __eq__(self, other):
-#         if other is None:  # pragma: no cover
-#             return False
-#         return repr(self) == repr(other)
+    @staticmethod
+    def _release_id(name):
+        """Frees the id of the repr name when its last selector is collected"""
+        selector_id = SelectorBase.__ids__[name]
+        SelectorBase._id_counts[selector_id] -= 1
+        if SelectorBase._id_counts[selector_id] == 0:
+            del SelectorBase._id_counts[selector_id]
+            del SelectorBase.__ids__[name]
+            SelectorBase._free_ids.append(selector_id)
+
+    def intern_key(self):
+        """Selectors with the same class and intern_key are the same selector"""
+        return (repr(self), str(self))
 
-#     def __lt__(self, other):
-#         return repr(self) < repr(other)
+    @abstractmethod
+    def constructor_args(self):
+        pass  # pragma: no cover
 
-#     def __hash__(self):
-#         return self._hash  # pylint: disable=no-member
+    def __reduce__(self):
+        # the unpickled selector is interned in the receiving process
+        state = {
+            name: getattr(self, name)
+            for name in self._state_attributes
+            if hasattr(self, name)
+        }
+        return (type(self), self.constructor_args(), (None, state) if state else None)
 
-#     @abstractmethod
-#     def set_descriptions(self, *args, **kwargs):
-#         pass  # pragma: no cover
+    def covers(self, data):
+        if isinstance(data, (ps.DatasetIndex, ps.ChunkedCoverStore)):
+            return data.covers(self)
+        if SelectorBase.cover_cache is not None:
+            return SelectorBase.cover_cache.covers(self, data)
+        return self.compute_covers(data)
 
+    @abstractmethod
+    def compute_covers(self, data):
+        pass  # pragma: no cover
 
-@total_ordering
-class SelectorBase(ABC):
     def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, SelectorBase):
+            return self.selector_id == other.selector_id
         if other is None:  # pragma: no cover
             return False
         return repr(self) == repr(other)
 
     def __lt__(self, other):
+        # the ids follow the order of construction, selectors are ordered by repr
+        if self is other:
+            return False
         return repr(self) < repr(other)
 
     def __hash__(self):
@@ -89,6 +132,10 @@ class SelectorBase(ABC):
         pass  # pragma: no cover
 
 
+# names of the types which can be passed as data
+_DATA_TYPES = ("DataFrame", "DatasetIndex", "ChunkedCoverStore")
+
+
 def get_cover_array_and_size(subgroup, data_len=None, data=None):
     if hasattr(subgroup, "representation"):
         cover_arr = subgroup
@@ -96,7 +143,7 @@ def get_cover_array_and_size(subgroup, data_len=None, data=None):
     elif isinstance(subgroup, slice):
         cover_arr = subgroup
         if data_len is None:
-            if type(data).__name__ == "DataFrame":
+            if type(data).__name__ in _DATA_TYPES:
                 data_len = len(data)
             else:
                 raise ValueError(
@@ -116,7 +163,7 @@ def get_cover_array_and_size(subgroup, data_len=None, data=None):
                 f"Currently a typechar of {type_char} is not supported."
             )
     else:
-        assert type(data).__name__ == "DataFrame", str(type(data))
+        assert type(data).__name__ in _DATA_TYPES, str(type(data))
         cover_arr = subgroup.covers(data)
         size = np.count_nonzero(cover_arr)
     return cover_arr, size
@@ -127,7 +174,7 @@ def get_size(subgroup, data_len=None, data=None):
         size = subgroup.size_sg
     elif isinstance(subgroup, slice):
         if data_len is None:
-            if type(data).__name__ == "DataFrame":
+            if type(data).__name__ in _DATA_TYPES:
                 data_len = len(data)
             else:
                 raise ValueError(
@@ -146,11 +193,37 @@ def get_size(subgroup, data_len=None, data=None):
                 f"Currently a typechar of {type_char} is not supported."
             )
     else:
-        assert type(data).__name__ == "DataFrame"
+        assert type(data).__name__ in _DATA_TYPES
         size = np.count_nonzero(subgroup.covers(data))
     return size
 
 
+def get_cover_matrix(subgroups, data_len=None, data=None):
+    """
+    Stacks the covers of several subgroups into a 2-D (subgroups x instances)
+    boolean matrix. If all subgroups are packed bitsets, their packed uint64 words
+    are stacked instead, see get_boolean_cover_matrix.
+    """
+    subgroups = list(subgroups)
+    if subgroups and all(getattr(sg, "is_packed", False) for sg in subgroups):
+        return np.vstack([sg.representation for sg in subgroups])
+    if data_len is None:
+        data_len = len(data)
+    covers = np.zeros((len(subgroups), data_len), dtype=bool)
+    for i, subgroup in enumerate(subgroups):
+        cover_arr, _ = get_cover_array_and_size(subgroup, data_len, data)
+        if not isinstance(cover_arr, slice):
+            cover_arr = np.asarray(cover_arr)
+        covers[i, cover_arr] = True
+    return covers
+
+
+def get_boolean_cover_matrix(covers, data_len):
+    if covers.dtype == np.uint64:
+        return ps.unpack_bitset(covers, data_len)
+    return covers
+
+
 def pandas_sparse_eq(col, value):
     import pandas as pd  # pylint: disable=import-outside-toplevel
     from pandas._libs.sparse import (
@@ -170,6 +243,15 @@ def pandas_sparse_eq(col, value):
 
 
 class EqualitySelector(SelectorBase):
+    # is_bool is only set for selectors of boolean attributes
+    __slots__ = (
+        "_attribute_name",
+        "_attribute_value",
+        "_selector_name",
+        "_string",
+        "is_bool",
+    )
+
     def __init__(self, attribute_name, attribute_value, selector_name=None):
         if attribute_name is None:
             raise TypeError()
@@ -194,6 +276,13 @@ class EqualitySelector(SelectorBase):
     def attribute_value(self):
         return self._attribute_value
 
+    def intern_key(self):
+        # e.g. 1 and True or b"yes" and "b'yes'" have the same repr
+        return (repr(self), str(self), type(self._attribute_value))
+
+    def constructor_args(self):
+        return (self._attribute_name, self._attribute_value, self._selector_name)
+
     def set_descriptions(
         self, attribute_name, attribute_value, selector_name=None
     ):  # pylint: disable=arguments-differ
@@ -221,7 +310,7 @@ class EqualitySelector(SelectorBase):
     def __repr__(self):
         return self._query
 
-    def covers(self, data):
+    def compute_covers(self, data):
         import pandas as pd  # pylint: disable=import-outside-toplevel
 
         column = data[self.attribute_name]
@@ -262,6 +351,8 @@ class EqualitySelector(SelectorBase):
 
 
 class NegatedSelector(SelectorBase):
+    __slots__ = ("_selector",)
+
     def __init__(self, selector):
         # TODO: this is redundant due to `__new__` and `set_descriptions`
         self._selector = selector
@@ -269,7 +360,10 @@ class NegatedSelector(SelectorBase):
 
         super().__init__()
 
-    def covers(self, data_instance):
+    def constructor_args(self):
+        return (self._selector,)
+
+    def compute_covers(self, data_instance):
         return np.logical_not(self._selector.covers(data_instance))
 
     def __repr__(self):
@@ -292,7 +386,118 @@ class NegatedSelector(SelectorBase):
 
 
 # Including the lower bound, excluding the upper_bound
+class SortedColumn:
+    """
+    Stable argsort of one numeric column, which the IntervalSelectors of that
+    column share. The cover of an interval then is a range of the sorted order,
+    found by binary search, instead of two comparisons over the whole column.
+
+    The order is computed on first use and recomputed when the selectors are
+    evaluated on other data, or when the column of the data no longer is the
+    array which was sorted (e.g. it was assigned anew or rows were appended).
+    Values written into the sorted array itself are not detected. The order is
+    released when the data is garbage collected.
+    """
+
+    def __init__(self, attribute_name):
+        self.attribute_name = attribute_name
+        self._data_ref = None
+        self._values = None
+        self._order = None
+        self._sorted_values = None
+
+    def __getstate__(self):
+        return {"attribute_name": self.attribute_name}
+
+    def __setstate__(self, state):
+        self.__init__(state["attribute_name"])
+
+    def _is_sorted(self, data, values):
+        # the sorted array is kept alive, so its buffer cannot be reused by
+        # another array
+        return (
+            self._data_ref is not None
+            and self._data_ref() is data
+            and values.shape == self._values.shape
+            and values.strides == self._values.strides
+            and values.dtype == self._values.dtype
+            and values.__array_interface__["data"][0]
+            == self._values.__array_interface__["data"][0]
+        )
+
+    def _release(self, data_ref):
+        if self._data_ref is data_ref:
+            self.clear()
+
+    def prepare(self, data):
+        """Returns the order and the sorted values of the column in data
+
+        Both are None if the column is not stored as a numeric numpy array.
+        Missing values are sorted to the end.
+        """
+        values = data[self.attribute_name].to_numpy()
+        if self._is_sorted(data, values):
+            return self._order, self._sorted_values
+        self.clear()
+        if values.dtype.kind not in "iuf":
+            return None, None
+        try:
+            data_ref = weakref.ref(data, self._release)
+        except TypeError:  # pragma: no cover
+            data_ref = None
+        order = np.argsort(values, kind="stable")
+        sorted_values = values[order]
+        if data_ref is not None:
+            self._data_ref = data_ref
+            self._values = values
+            self._order = order
+            self._sorted_values = sorted_values
+        return order, sorted_values
+
+    def interval_rows(self, data, lower_bound, upper_bound):
+        """Returns the ids of the rows with lower_bound <= value < upper_bound
+
+        Returns None if the column is not numeric.
+        """
+        order, sorted_values = self.prepare(data)
+        if order is None:
+            return None
+        start, stop = np.searchsorted(
+            sorted_values, [lower_bound, upper_bound], side="left"
+        )
+        return order[start:stop]
+
+    def clear(self):
+        """Releases the order computed for the last data"""
+        self.__init__(self.attribute_name)
+
+
+def _unique_of_sorted(sorted_values):
+    """Returns the unique values, their counts and the number of non-null values
+    of a sorted array, which has its missing values at the end"""
+    n_not_null = len(sorted_values)
+    if sorted_values.dtype.kind == "f":
+        n_not_null = np.searchsorted(sorted_values, np.nan)
+    data_not_null = sorted_values[:n_not_null]
+    is_first = np.ones(len(data_not_null), dtype=bool)
+    is_first[1:] = data_not_null[1:] != data_not_null[:-1]
+    starts = np.flatnonzero(is_first)
+    counts = np.diff(starts, append=n_not_null)
+    return data_not_null[starts], counts, n_not_null
+
+
 class IntervalSelector(SelectorBase):
+    # sorted_column is shared with the other interval selectors of the attribute,
+    # if any
+    __slots__ = (
+        "_attribute_name",
+        "_lower_bound",
+        "_upper_bound",
+        "selector_name",
+        "_string",
+        "sorted_column",
+    )
+
     def __init__(self, attribute_name, lower_bound, upper_bound, selector_name=None):
         assert lower_bound < upper_bound
         # TODO: this is redundant due to `__new__` and `set_descriptions`
@@ -316,7 +521,32 @@ class IntervalSelector(SelectorBase):
     def upper_bound(self):
         return self._upper_bound
 
-    def covers(self, data_instance):
+    def intern_key(self):
+        return (
+            repr(self),
+            str(self),
+            type(self._lower_bound),
+            type(self._upper_bound),
+        )
+
+    def constructor_args(self):
+        return (
+            self._attribute_name,
+            self._lower_bound,
+            self._upper_bound,
+            self.selector_name,
+        )
+
+    def compute_covers(self, data_instance):
+        sorted_column = getattr(self, "sorted_column", None)
+        if sorted_column is not None:
+            rows = sorted_column.interval_rows(
+                data_instance, self.lower_bound, self.upper_bound
+            )
+            if rows is not None:
+                cover = np.zeros(len(data_instance), dtype=bool)
+                cover[rows] = True
+                return cover
         val = data_instance[self.attribute_name].to_numpy()
         return np.logical_and((val >= self.lower_bound), (val < self.upper_bound))
 
@@ -443,7 +673,11 @@ def create_nominal_selectors_for_attribute(data, attribute_name, dtypes=None):
     import pandas as pd  # pylint: disable=import-outside-toplevel
 
     nominal_selectors = []
-    for val in pd.unique(data[attribute_name]):
+    if isinstance(data, ps.DatasetIndex) and attribute_name in data.categories:
+        values = data.categories[attribute_name]
+    else:
+        values = pd.unique(data[attribute_name])
+    for val in values:
         nominal_selectors.append(EqualitySelector(attribute_name, val))
     # setting the is_bool flag for selector
     if dtypes is None:
@@ -479,6 +713,8 @@ def create_numeric_selectors_for_attribute(
     import pandas as pd  # pylint: disable=import-outside-toplevel
 
     numeric_selectors = []
+    sorted_column = None
+    counts = None
     if isinstance(data[attr_name].dtype, pd.SparseDtype):
         numeric_selectors.append(
             EqualitySelector(attr_name, data[attr_name].sparse.fill_value)
@@ -488,36 +724,127 @@ def create_numeric_selectors_for_attribute(
         uniqueValues = np.unique(data_not_null)
         if len(data_not_null) < len(dense_data):
             numeric_selectors.append(EqualitySelector(attr_name, np.nan))
+    elif isinstance(data, ps.DatasetIndex) and attr_name in data.sorted_values:
+        uniqueValues, counts, n_not_null = _unique_of_sorted(
+            data.sorted_values[attr_name]
+        )
+        if isinstance(data.dtypes[attr_name], np.dtype):
+            uniqueValues = uniqueValues.astype(data.dtypes[attr_name])
+        if n_not_null < len(data):
+            numeric_selectors.append(EqualitySelector(attr_name, np.nan))
     else:
-        data_not_null = data[data[attr_name].notnull()]
-
-        uniqueValues = np.unique(data_not_null[attr_name])
-        if len(data_not_null) < len(data):
+        # the sort for the unique values is kept for the covers of the intervals
+        sorted_column = SortedColumn(attr_name)
+        _, sorted_values = sorted_column.prepare(data)
+        if sorted_values is not None:
+            uniqueValues, counts, n_not_null = _unique_of_sorted(sorted_values)
+        else:
+            sorted_column = None
+            data_not_null = data[data[attr_name].notnull()]
+            uniqueValues = np.unique(data_not_null[attr_name])
+            n_not_null = len(data_not_null)
+        if n_not_null < len(data):
             numeric_selectors.append(EqualitySelector(attr_name, np.nan))
 
     if len(uniqueValues) <= nbins:
         for val in uniqueValues:
             numeric_selectors.append(EqualitySelector(attr_name, val))
+        if sorted_column is not None:
+            # no interval shares the order
+            sorted_column.clear()
     else:
-        cutpoints = ps.equal_frequency_discretization(
-            data, attr_name, nbins, weighting_attribute
-        )
-        if intervals_only:
-            old_cutpoint = float("-inf")
-            for c in cutpoints:
-                numeric_selectors.append(IntervalSelector(attr_name, old_cutpoint, c))
-                old_cutpoint = c
-            numeric_selectors.append(
-                IntervalSelector(attr_name, old_cutpoint, float("inf"))
+        if counts is None or weighting_attribute is not None:
+            cutpoints = ps.equal_frequency_discretization(
+                data, attr_name, nbins, weighting_attribute
             )
         else:
-            for c in cutpoints:
-                numeric_selectors.append(IntervalSelector(attr_name, c, float("inf")))
-                numeric_selectors.append(IntervalSelector(attr_name, float("-inf"), c))
+            cutpoints = ps.equal_frequency_cutpoints(uniqueValues, counts, nbins)
+        intervals = _create_interval_selectors(attr_name, cutpoints, intervals_only)
+        if sorted_column is not None:
+            for sel in intervals:
+                sel.sorted_column = sorted_column
+        numeric_selectors.extend(intervals)
 
     return numeric_selectors
 
 
+def _create_interval_selectors(attr_name, cutpoints, intervals_only):
+    intervals = []
+    if intervals_only:
+        old_cutpoint = float("-inf")
+        for c in cutpoints:
+            intervals.append(IntervalSelector(attr_name, old_cutpoint, c))
+            old_cutpoint = c
+        intervals.append(IntervalSelector(attr_name, old_cutpoint, float("inf")))
+    else:
+        for c in cutpoints:
+            intervals.append(IntervalSelector(attr_name, c, float("inf")))
+            intervals.append(IntervalSelector(attr_name, float("-inf"), c))
+    return intervals
+
+
+def create_numeric_selectors_from_sketch(
+    attr_name, sketch, nbins=5, intervals_only=True
+):
+    """Creates the numeric selectors of an attribute summarized by a
+    ps.QuantileSketch"""
+    numeric_selectors = []
+    if sketch.has_null:
+        numeric_selectors.append(EqualitySelector(attr_name, np.nan))
+    unique_values = sketch.unique_values()
+    if sketch.exact and len(unique_values) <= nbins:
+        for val in unique_values:
+            numeric_selectors.append(EqualitySelector(attr_name, val))
+    else:
+        numeric_selectors.extend(
+            _create_interval_selectors(
+                attr_name, sketch.cutpoints(nbins), intervals_only
+            )
+        )
+    return numeric_selectors
+
+
+def create_numeric_selectors_from_chunks(
+    chunks,
+    nbins=5,
+    intervals_only=True,
+    weighting_attribute=None,
+    ignore=None,
+    sketch_size=4096,
+):
+    """Creates the numeric selectors in a single pass over an iterable of
+    DataFrames, e.g. pd.read_csv(..., chunksize=...), which need not fit into
+    memory together.
+
+    Each numeric column is summarized by a ps.QuantileSketch, such that the
+    selectors equal those of create_numeric_selectors on the concatenated
+    chunks as long as a column has at most sketch_size distinct values.
+    """
+    if ignore is None:
+        ignore = []
+    sketches = None
+    for chunk in chunks:
+        if sketches is None:
+            sketches = {
+                attr_name: ps.QuantileSketch(sketch_size)
+                for attr_name in chunk.select_dtypes(include=["number"]).columns
+                if attr_name not in ignore
+            }
+        weights = None
+        if weighting_attribute is not None:
+            weights = chunk[weighting_attribute].to_numpy()
+        for attr_name, sketch in sketches.items():
+            sketch.update(chunk[attr_name].to_numpy(), weights)
+    numeric_selectors = []
+    for attr_name, sketch in (sketches or {}).items():
+        numeric_selectors.extend(
+            create_numeric_selectors_from_sketch(
+                attr_name, sketch, nbins, intervals_only
+            )
+        )
+    return numeric_selectors
+
+
 def remove_target_attributes(selectors, target):
     return [
         sel for sel in selectors if sel.attribute_name not in target.get_attributes()
@@ -527,7 +854,46 @@ def remove_target_attributes(selectors, target):
 ##############
 # Boolean expressions
 ##############
+def expression_key(expression):
+    """Returns a key of a selector or boolean expression built from the ids of the
+    interned selectors, equal expressions have equal keys"""
+    if isinstance(expression, SelectorBase):
+        return (0, expression.selector_id)
+    if isinstance(expression, Conjunction):
+        return (1, expression.key)
+    if isinstance(expression, Disjunction):
+        return (2, expression.key)
+    return (3, repr(expression))  # pragma: no cover
+
+
+@lru_cache(maxsize=None)
+def slot_names(cls):
+    """Returns the names of the slots of cls and its base classes"""
+    return tuple(
+        name
+        for base in cls.__mro__
+        for name in base.__dict__.get("__slots__", ())
+        if name != "__weakref__"
+    )
+
+
 class BooleanExpressionBase(ABC):
+    __slots__ = ()
+
+    def __getstate__(self):
+        state = {
+            name: getattr(self, name)
+            for name in slot_names(type(self))
+            if hasattr(self, name)
+        }
+        # subclasses without __slots__
+        state.update(getattr(self, "__dict__", {}))
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def __or__(self, other):
         tmp = copy.copy(self)
         tmp.append_or(other)
@@ -553,10 +919,16 @@ class BooleanExpressionBase(ABC):
 
 @total_ordering
 class Conjunction(BooleanExpressionBase):
+    __slots__ = ("_repr", "_key", "_hash", "_cover_digest", "_cover", "_selectors")
+    # how the cover computed by covers is retained: "strong", "weak" (as long as
+    # it is referenced elsewhere), "none" or by the active ps.CoverRetentionPool
+    cover_retention = "weak"
+
     def __init__(self, selectors):
         self._repr = None
+        self._key = None
         self._hash = None
-        self._cover_hash = None
+        self._cover_digest = None
         self._cover = None
         try:
             it = iter(selectors)
@@ -568,16 +940,44 @@ class Conjunction(BooleanExpressionBase):
         # empty description ==> return a list of all '1's
         if not self._selectors:
             result = np.full(len(instance), True, dtype=bool)
-            self._cover = result
-            return result
-        # non-empty description
-        result = np.all([sel.covers(instance) for sel in self._selectors], axis=0)
-
-        # calculate hash for result (over indices)
-        self._cover = result
-        self._cover_hash = result.tostring().__hash__()
+        else:
+            # non-empty description
+            result = np.all([sel.covers(instance) for sel in self._selectors], axis=0)
+        self._retain_cover(result)
         return result
 
+    def _retain_cover(self, cover):
+        # fingerprint of the cover, equal covers have equal digests
+        self._cover_digest = hashlib.blake2b(
+            np.ascontiguousarray(cover), digest_size=16
+        ).digest()
+        retention = Conjunction.cover_retention
+        if isinstance(retention, ps.CoverRetentionPool):
+            token = retention.store(cover)
+            self._cover = None if token is None else (retention, token)
+        elif retention == "strong":
+            self._cover = cover
+        elif retention == "weak":
+            self._cover = weakref.ref(cover)
+        elif retention == "none":
+            self._cover = None
+        else:
+            raise ValueError(
+                f"cover_retention was {retention} which is not in "
+                "(strong, weak, none) or a CoverRetentionPool"
+            )
+
+    def retained_cover(self):
+        """Returns the cover of the last call to covers if it was retained, None
+        otherwise"""
+        cover = self._cover
+        if isinstance(cover, weakref.ref):
+            return cover()
+        if isinstance(cover, tuple):
+            pool, token = cover
+            return pool.get(token)
+        return cover
+
     def __len__(self):
         return len(self._selectors)
 
@@ -595,9 +995,14 @@ class Conjunction(BooleanExpressionBase):
             return self._repr
 
     def __eq__(self, other):
+        if isinstance(other, Conjunction):
+            return self.key == other.key
         return repr(self) == repr(other)
 
     def __lt__(self, other):
+        # the key does not follow the order of the reprs
+        if isinstance(other, Conjunction) and self.key == other.key:
+            return False
         return repr(self) < repr(other)
 
     def __hash__(self):
@@ -607,6 +1012,20 @@ class Conjunction(BooleanExpressionBase):
             self._hash = self._compute_hash()
             return self._hash
 
+    @property
+    def key(self):
+        """The sorted ids of the selectors, which identify the conjunction"""
+        if self._key is None:
+            self._key = self._compute_key()
+        return self._key
+
+    def _compute_key(self):
+        try:
+            return tuple(sorted([sel.selector_id for sel in self._selectors]))
+        except AttributeError:
+            # not all parts are selectors
+            return tuple(sorted(expression_key(sel) for sel in self._selectors))
+
     def _compute_repr(self):
         if not self._selectors:
             return "True"
@@ -614,12 +1033,13 @@ class Conjunction(BooleanExpressionBase):
         return "(" + " and ".join(reprs) + ")"
 
     def _compute_hash(self):
-        return hash(repr(self))
+        return hash(self.key)
 
     def _invalidate_representations(self):
         self._repr = None
+        self._key = None
         self._hash = None
-        self._cover_hash = None
+        self._cover_digest = None
         self._cover = None
 
     def append_and(self, to_append):
@@ -637,7 +1057,9 @@ class Conjunction(BooleanExpressionBase):
         )
 
     def pop_and(self):
-        return self._selectors.pop()
+        selector = self._selectors.pop()
+        self._invalidate_representations()
+        return selector
 
     def pop_or(self):
         raise RuntimeError(
@@ -647,10 +1069,18 @@ class Conjunction(BooleanExpressionBase):
     def __copy__(self):
         cls = self.__class__
         result = cls.__new__(cls)
-        result.__dict__.update(self.__dict__)
+        result.__setstate__(super().__getstate__())
         result._selectors = list(self._selectors)
         return result
 
+    def __getstate__(self):
+        # the selector ids are local to a process, the cover is not sent along
+        state = super().__getstate__()
+        state["_key"] = None
+        state["_hash"] = None
+        state["_cover"] = None
+        return state
+
     @property
     def depth(self):
         return len(self._selectors)
@@ -676,6 +1106,8 @@ class Conjunction(BooleanExpressionBase):
 
 @total_ordering
 class Disjunction(BooleanExpressionBase):
+    __slots__ = ("_selectors",)
+
     def __init__(self, selectors=None):
         if isinstance(selectors, (list, tuple)):
             self._selectors = selectors
@@ -707,13 +1139,25 @@ class Disjunction(BooleanExpressionBase):
         return "".join(("(", " or ".join(reprs), ")"))
 
     def __eq__(self, other):
+        if isinstance(other, Disjunction):
+            return self.key == other.key
         return repr(self) == repr(other)
 
     def __lt__(self, other):
+        # the key does not follow the order of the reprs
+        if isinstance(other, Disjunction) and self.key == other.key:
+            return False
         return repr(self) < repr(other)
 
     def __hash__(self):
-        return hash(repr(self))
+        return hash(self.key)
+
+    @property
+    def key(self):
+        """The sorted keys of the parts, which identify the disjunction
+
+        It is not cached as the parts may be changed, e.g. by DNF.append_and."""
+        return tuple(sorted(expression_key(sel) for sel in self._selectors))
 
     def append_and(self, to_append):
         raise RuntimeError(
@@ -733,7 +1177,7 @@ class Disjunction(BooleanExpressionBase):
     def __copy__(self):
         cls = self.__class__
         result = cls.__new__(cls)
-        result.__dict__.update(self.__dict__)
+        result.__setstate__(self.__getstate__())
         result._selectors = copy.copy(self._selectors)
         return result
 
@@ -743,6 +1187,8 @@ class Disjunction(BooleanExpressionBase):
 
 
 class DNF(Disjunction):
+    __slots__ = ()
+
     def __init__(self, selectors=None):
         if selectors is None:
             selectors = []
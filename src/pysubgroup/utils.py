@@ -29,52 +29,193 @@ def prepare_subgroup_discovery_result(result, task):
     return result_filtered
 
 
-# Returns the cutpoints for discretization
+def equal_frequency_cutpoints(sorted_values, weights, nbins=5, weighted=False):
+    """Returns the cutpoints for discretization of sorted, non-null values
+
+    Without weighted, weights are the (possibly non-integer) counts of the
+    values and the cutpoints are the values at the positions
+    i * total // nbins, skipping values which already are cutpoints.
+    With weighted, a cutpoint is set wherever the weight accumulated since the
+    last cutpoint exceeds a bin of total / nbins, until less than one and a half
+    bins remain. The weights must not be negative.
+    """
+    sorted_values = np.asarray(sorted_values)
+    cumulative_weights = np.cumsum(weights, dtype=np.float64)
+    if len(sorted_values) == 0:
+        return []
+    total = cumulative_weights[-1]
+    cutpoints = []
+    if not weighted:
+        total = int(round(total))
+        positions = np.searchsorted(
+            cumulative_weights,
+            [i * total // nbins for i in range(1, nbins)],
+            side="right",
+        )
+        next_index = 0
+        for index in positions:
+            index = max(index, next_index)
+            if index >= len(sorted_values):
+                break
+            cutpoints.append(sorted_values[index])
+            next_index = np.searchsorted(sorted_values, cutpoints[-1], side="right")
+    else:
+        bin_size = total / nbins
+        remaining_weights = total
+        base = 0.0
+        next_index = 0
+        while True:
+            index = max(
+                np.searchsorted(cumulative_weights, base + bin_size, side="right"),
+                next_index,
+            )
+            if index >= len(sorted_values):
+                break
+            cutpoints.append(sorted_values[index])
+            remaining_weights -= cumulative_weights[index] - base
+            if remaining_weights < 1.5 * bin_size:
+                break
+            base = cumulative_weights[index]
+            next_index = np.searchsorted(sorted_values, cutpoints[-1], side="right")
+    return cutpoints
+
+
 def equal_frequency_discretization(
     data, attribute_name, nbins=5, weighting_attribute=None
 ):
+    """Returns the cutpoints for discretization of a column into nbins bins
+    which contain (nearly) the same number of instances, or the same weight"""
     import pandas as pd  # pylint: disable=import-outside-toplevel
 
-    cutpoints = []
+    values = data[attribute_name]
+    if isinstance(getattr(values, "dtype", None), pd.SparseDtype):
+        values = values.sparse.sp_values
+    values = np.asarray(values)
     if weighting_attribute is None:
-        cleaned_data = data[attribute_name]
-        if isinstance(data[attribute_name].dtype, pd.SparseDtype):
-            cleaned_data = data[attribute_name].sparse.sp_values
-
-        cleaned_data = cleaned_data[~np.isnan(cleaned_data)]
-        sorted_data = sorted(cleaned_data)
-        number_instances = len(sorted_data)
-        for i in range(1, nbins):
-            position = i * number_instances // nbins
-            while True:
-                if position >= number_instances:
-                    break
-                val = sorted_data[position]
-                if val not in cutpoints:
-                    break
-                position += 1
-            # print (sorted_data [position])
-            if val not in cutpoints:
-                cutpoints.append(val)
-    else:
-        cleaned_data = data[[attribute_name, weighting_attribute]]
-        cleaned_data = cleaned_data[~np.isnan(cleaned_data[attribute_name])]
-        cleaned_data.sort(order=attribute_name)
-
-        overall_weights = cleaned_data[weighting_attribute].sum()
-        remaining_weights = overall_weights
-        bin_size = overall_weights / nbins
-        sum_of_weights = 0
-        for row in cleaned_data:
-            sum_of_weights += row[weighting_attribute]
-            if sum_of_weights > bin_size:
-                if not row[attribute_name] in cutpoints:
-                    cutpoints.append(row[attribute_name])
-                    remaining_weights = remaining_weights - sum_of_weights
-                    if remaining_weights < 1.5 * (bin_size):
-                        break
-                    sum_of_weights = 0
-    return cutpoints
+        values = values[~np.isnan(values)]
+        unique_values, counts = np.unique(values, return_counts=True)
+        return equal_frequency_cutpoints(unique_values, counts, nbins)
+    weights = np.asarray(data[weighting_attribute])
+    not_null = ~np.isnan(values)
+    values = values[not_null]
+    weights = weights[not_null]
+    # ties are ordered by weight
+    order = np.lexsort((weights, values))
+    return equal_frequency_cutpoints(
+        values[order], weights[order], nbins, weighted=True
+    )
+
+
+class QuantileSketch:
+    """
+    Mergeable summary of the values of a numeric column, which is built from
+    chunks of the column and provides the cutpoints of
+    equal_frequency_discretization without holding the column in memory.
+
+    The sketch keeps the distinct values with their summed weights (counts if
+    no weights are given). As long as there are at most max_size distinct
+    values it is exact. Beyond that it is compressed to max_size entries of
+    roughly equal weight, each represented by its weighted median value,
+    which shifts the rank of a value by at most about total weight / max_size
+    per compression.
+    """
+
+    def __init__(self, max_size=4096):
+        assert max_size >= 2
+        self.max_size = max_size
+        self.values = None
+        self.weights = None
+        self.weighted = None
+        self.n_instances = 0
+        self.n_null = 0
+        self.exact = True
+
+    def update(self, values, weights=None):
+        """Adds a chunk of values (and their weights) to the sketch"""
+        weighted = weights is not None
+        if self.weighted is None:
+            self.weighted = weighted
+        elif self.weighted != weighted:
+            raise ValueError("a sketch is either weighted or unweighted")
+        values = np.asarray(values)
+        if weighted:
+            weights = np.asarray(weights, dtype=np.float64)
+        else:
+            weights = np.ones(len(values), dtype=np.float64)
+        is_null = np.isnan(values) if values.dtype.kind == "f" else None
+        self.n_instances += len(values)
+        if is_null is not None:
+            self.n_null += int(np.count_nonzero(is_null))
+            values = values[~is_null]
+            weights = weights[~is_null]
+        self._add(values, weights)
+        return self
+
+    def merge(self, other):
+        """Adds the values summarized by another sketch to this one"""
+        if self.weighted is None:
+            self.weighted = other.weighted
+        elif other.weighted is not None and self.weighted != other.weighted:
+            raise ValueError("a sketch is either weighted or unweighted")
+        self.n_instances += other.n_instances
+        self.n_null += other.n_null
+        self.exact = self.exact and other.exact
+        if other.values is not None:
+            self._add(other.values, other.weights)
+        return self
+
+    def _add(self, values, weights):
+        if self.values is not None:
+            values = np.concatenate([self.values, values])
+            weights = np.concatenate([self.weights, weights])
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        weights = weights[order]
+        is_first = np.ones(len(values), dtype=bool)
+        is_first[1:] = values[1:] != values[:-1]
+        starts = np.flatnonzero(is_first)
+        values = values[starts]
+        weights = np.add.reduceat(weights, starts) if len(starts) else weights
+        if len(values) > self.max_size:
+            values, weights = self._compress(values, weights)
+            self.exact = False
+        self.values = values
+        self.weights = weights
+
+    def _compress(self, values, weights):
+        cumulative_weights = np.cumsum(weights)
+        preceding_weights = cumulative_weights - weights
+        total = cumulative_weights[-1]
+        groups = np.minimum(
+            (preceding_weights * self.max_size / total).astype(np.int64),
+            self.max_size - 1,
+        )
+        starts = np.flatnonzero(np.diff(groups, prepend=-1))
+        group_weights = np.add.reduceat(weights, starts)
+        medians = np.searchsorted(
+            cumulative_weights,
+            preceding_weights[starts] + group_weights / 2,
+            side="left",
+        )
+        return values[medians], group_weights
+
+    @property
+    def has_null(self):
+        return self.n_null > 0
+
+    def unique_values(self):
+        """Returns the distinct non-null values, exact only if self.exact"""
+        if self.values is None:
+            return np.empty(0)
+        return self.values
+
+    def cutpoints(self, nbins=5):
+        """Returns the cutpoints of equal_frequency_discretization"""
+        if self.values is None:
+            return []
+        return equal_frequency_cutpoints(
+            self.values, self.weights, nbins, weighted=bool(self.weighted)
+        )
 
 
 def conditional_invert(val, invert):
@@ -299,7 +440,7 @@ def is_duplicate(list_of_sgs, sg):
     if same_expression: 
         return True
 
-    same_set = sg._cover_hash in set([sg_._cover_hash for sg_ in list_of_sgs])
+    same_set = sg._cover_digest in set([sg_._cover_digest for sg_ in list_of_sgs])
     if same_set:
         # print('Non-equal expression, but equal set:\n\t {}'.format(sg))
         return True
@@ -308,16 +449,14 @@ def is_duplicate(list_of_sgs, sg):
 
 
 def has_significant_overlap(data, list_of_sgs, sg, threshold):
-    if sg._cover is None:
+    ref_set = sg.retained_cover()
+    if ref_set is None:
         ref_set = sg.covers(data)
-    else:
-        ref_set = sg._cover
     
     for sg_ in list_of_sgs:
-        if sg_._cover is None:
+        set_ = sg_.retained_cover()
+        if set_ is None:
             set_ = sg_.covers(data)
-        else:
-            set_ = sg_._cover
         intersection = ref_set&set_
         union = ref_set|set_
 
@@ -332,6 +471,35 @@ def sg_from_inds(search_space, inds):
     return ps.Conjunction([search_space[i] for i in inds])
 
 def add_if_required(
+    result,
+    sg,
+    quality,
+    task: SubgroupDiscoveryTask,
+    check_for_duplicates=False,
+    statistics=None,
+    explicit_result_set_size=None,
+):
+    """
+    IMPORTANT:
+        Only add/remove subgroups from `result` by using `heappop` and `heappush`
+        to ensure order of subgroups by quality.
+    """
+    if explicit_result_set_size is None:
+        explicit_result_set_size = task.result_set_size
+
+    if quality >= task.min_quality:
+        if not ps.constraints_satisfied(task.constraints, sg, statistics, task.data):
+            return
+        if check_for_duplicates and (quality, sg, statistics) in result:
+            return
+        if len(result) < explicit_result_set_size:
+            heappush(result, (quality, sg, statistics))
+        elif quality > result[0][0]:  # better than worst subgroup
+            heappop(result)
+            heappush(result, (quality, sg, statistics))
+
+
+def add_if_required_inds(
     result,
     visited,
     sg_inds,
@@ -342,6 +510,9 @@ def add_if_required(
     explicit_result_set_size=None,
 ):
     """
+    Variant of `add_if_required` for subgroups given as lists of indices into
+    `task.search_space`. Descriptions which were seen before are tracked in `visited`.
+
     IMPORTANT:
         Only add/remove subgroups from `result` by using `heappop` and `heappush`
         to ensure order of subgroups by quality.
@@ -1,6 +1,9 @@
 import unittest
 
+import numpy as np
+
 import pysubgroup as ps
+from pysubgroup.algorithms import apriori_join, apriori_prune
 from pysubgroup.datasets import get_credit_data
 
 
@@ -32,6 +35,29 @@ class TestAlgorithms(unittest.TestCase):
     def test_Apriori_set_representation(self):
         ps.Apriori(ps.SetRepresentation)
 
+    def test_Apriori_join(self):
+        candidates = np.array([[1, 4], [0, 1], [1, 2], [0, 3], [0, 2], [2, 3]])
+        joined, parents = apriori_join(candidates)
+        # grouped by prefix in the order of first appearance
+        self.assertEqual(joined.tolist(), [[1, 2, 4], [0, 1, 2], [0, 1, 3], [0, 2, 3]])
+        self.assertEqual(parents.tolist(), [[2, 0], [1, 4], [1, 3], [4, 3]])
+        # [1, 2, 4] lacks [2, 4], [0, 1, 3] lacks [1, 3]
+        self.assertEqual(
+            apriori_prune(joined, candidates).tolist(), [False, True, False, True]
+        )
+        self.assertEqual(apriori_join(np.empty((0, 2), dtype=int))[0].shape, (0, 3))
+
+    def test_Apriori_level_covers(self):
+        self.task.depth = 3
+        self.task.result_set_size = 10
+        result = ps.Apriori(use_numba=False).execute(self.task)
+        for _, sg, _ in result.results:
+            # the covers computed from the previous level are not shared
+            self.assertIsNone(sg.representation.base)
+            np.testing.assert_array_equal(
+                sg.representation, ps.Conjunction(sg.selectors).covers(self.task.data)
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
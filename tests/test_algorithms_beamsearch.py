@@ -90,3 +90,24 @@ def test_algorithms_beamsearch_width_too_small():
     assert set([ps.Conjunction(s) for s in searchspace[:2]]) == set(
         [sg for _, sg, _ in result.results]
     )
+
+
+def test_algorithms_beamsearch_parallel():
+    import pysubgroup as ps
+    from pysubgroup.datasets import get_credit_data
+
+    data = get_credit_data()
+    target = ps.BinaryTarget("class", b"bad")
+    searchspace = ps.create_selectors(data, ignore=["class"])
+    task = ps.SubgroupDiscoveryTask(
+        data, target, searchspace, result_set_size=5, depth=2, qf=ps.StandardQF(a=0.5)
+    )
+    result = ps.BeamSearch(beam_width=10).execute(task)
+    result_parallel = ps.BeamSearch(beam_width=10, nproc=2).execute(task)
+
+    assert result.to_descriptions() == result_parallel.to_descriptions()
+
+    with ps.SharedCoverPool(2) as pool:
+        beamsearch = ps.BeamSearch(beam_width=10, executor=pool)
+        assert beamsearch.execute(task).to_descriptions() == result.to_descriptions()
+        assert beamsearch.execute(task).to_descriptions() == result.to_descriptions()
@@ -64,6 +64,30 @@ class BooleanTargetBase:
             self.task,
         )
 
+    @unittest.skipUnless(
+        TestSettings.All or TestSettings.BestFirstSearch, "flag not set"
+    )
+    def test_BestFirstSearch_batched(self):
+        self.runAlgorithm(
+            ps.BestFirstSearch(batch_expansion=True),
+            "BestFirstSearch batched",
+            self.result,
+            self.qualities,
+            self.task,
+        )
+
+    @unittest.skipUnless(
+        TestSettings.All or TestSettings.BestFirstSearch, "flag not set"
+    )
+    def test_BestFirstSearch_n_pop(self):
+        self.runAlgorithm(
+            ps.BestFirstSearch(n_pop=4),
+            "BestFirstSearch n_pop",
+            self.result,
+            self.qualities,
+            self.task,
+        )
+
     @unittest.skipUnless(TestSettings.All or TestSettings.BeamSearch, "flag not set")
     def test_BeamSearch(self):
         self.runAlgorithm(
@@ -84,6 +108,46 @@ class BooleanTargetBase:
             self.task,
         )
 
+    @unittest.skipUnless(TestSettings.All or TestSettings.DFS_bitset, "flag not set")
+    def test_DFS_packed_bitset(self):
+        self.runAlgorithm(
+            ps.DFS(ps.PackedBitSetRepresentation),
+            "DFS packed bitset",
+            self.result,
+            self.qualities,
+            self.task,
+        )
+
+    @unittest.skipUnless(TestSettings.All or TestSettings.SimpleDFS, "flag not set")
+    def test_SimpleDFS_numpy_sets(self):
+        self.runAlgorithm(
+            ps.SimpleDFS(ps.NumpySetRepresentation),
+            "SimpleDFS numpyset",
+            self.result,
+            self.qualities,
+            self.task,
+        )
+
+    @unittest.skipUnless(TestSettings.All or TestSettings.DFS_bitset, "flag not set")
+    def test_DFS_parallel(self):
+        self.runAlgorithm(
+            ps.DFS(ps.BitSetRepresentation, nproc=2),
+            "DFS parallel",
+            self.result,
+            self.qualities,
+            self.task,
+        )
+
+    @unittest.skipUnless(TestSettings.All or TestSettings.Apriori, "flag not set")
+    def test_Apriori_packed_bitset(self):
+        self.runAlgorithm(
+            ps.Apriori(ps.PackedBitSetRepresentation, use_numba=False),
+            "Apriori packed bitset",
+            self.result,
+            self.qualities,
+            self.task,
+        )
+
     @unittest.skipUnless(TestSettings.All or TestSettings.GpGrowth, "flag not set")
     def test_gp_growth(self):
         self.task.constraints_monotone.append(
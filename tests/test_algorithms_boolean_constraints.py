@@ -47,6 +47,18 @@ class BooleanTargetBase(TestAlgorithmsBase):
             self.task,
         )
 
+    @unittest.skipUnless(
+        TestSettings.All or TestSettings.BestFirstSearch, "flag not set"
+    )
+    def test_BestFirstSearch_batched(self):
+        self.runAlgorithm(
+            ps.BestFirstSearch(batch_expansion=True),
+            "BestFirstSearch batched",
+            self.result,
+            self.qualities,
+            self.task,
+        )
+
     @unittest.skipUnless(TestSettings.All or TestSettings.BeamSearch, "flag not set")
     def test_BeamSearch(self):
         self.runAlgorithm(
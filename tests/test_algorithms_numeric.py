@@ -3,6 +3,7 @@
 import unittest
 from copy import copy
 
+import numpy as np
 import pandas as pd
 from algorithms_testing import TestAlgorithmsBase
 from t_utils import conjunctions_from_str
@@ -28,6 +29,39 @@ class TestStandardQFNumeric(unittest.TestCase):
         with self.assertRaises(ValueError):
             ps.StandardQFNumeric(0, estimator="bla")
 
+    def test_calculate_statistics_batch(self):
+        data = get_credit_data()
+        target = ps.NumericTarget("credit_amount")
+        subgroups = ps.create_nominal_selectors(data)[:20]
+        subgroups.append(ps.EqualitySelector("age", -1))  # empty
+        covers = ps.get_cover_matrix(subgroups, data=data)
+        for qf in (
+            ps.StandardQFNumeric(0.5, estimator="max"),
+            ps.StandardQFNumeric(0.5, estimator="sum"),
+            ps.StandardQFNumericTscore(),
+        ):
+            qf.calculate_constant_statistics(data, target)
+            batch = qf.calculate_statistics_batch(covers, target, data)
+            for i, sg in enumerate(subgroups):
+                # the statistics of the empty subgroup may contain arrays
+                expected = np.hstack(qf.calculate_statistics(sg, target, data))
+                np.testing.assert_allclose([column[i] for column in batch], expected)
+            # several batches of four covers are concatenated
+            task = ps.SubgroupDiscoveryTask(data, target, subgroups, qf)
+            batched = ps.calculate_statistics_batched(
+                task, subgroups, max_nbytes=4 * len(data)
+            )
+            self.assertIsInstance(batched, type(batch))
+            for column, expected in zip(batched, batch):
+                np.testing.assert_allclose(column, expected)
+            row = ps.statistics_row(batched, 3)
+            np.testing.assert_allclose(row, [column[3] for column in batch])
+        values = np.arange(len(data), dtype=float)
+        np.testing.assert_allclose(
+            ps.masked_row_sums(covers, values, block_nbytes=1),
+            covers @ values,
+        )
+
 
 class TestStandardQFNumericMedian(TestAlgorithmsBase, unittest.TestCase):
     def test_constructor(self):
@@ -282,6 +316,16 @@ class TestAlgorithmsWithNumericTarget(TestAlgorithmsBase, unittest.TestCase):
             self.task,
         )
 
+    def test_BestFirstSearch_batched(self):
+        self.task.qf = ps.StandardQFNumeric(self.task.qf.a, False, "sum")
+        self.runAlgorithm(
+            ps.BestFirstSearch(batch_expansion=True),
+            "BestFirstSearch batched",
+            self.result,
+            self.qualities,
+            self.task,
+        )
+
     def test_BeamSearch_sum(self):
         self.task.qf = ps.StandardQFNumeric(self.task.qf.a, False, "sum")
         self.runAlgorithm(
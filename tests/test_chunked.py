@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pysubgroup as ps
+from pysubgroup.datasets import get_credit_data
+
+
+class TestChunked(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.directory, "credit.csv")
+        get_credit_data().to_csv(cls.path, index=False)
+        cls.data = pd.read_csv(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.source = ps.ChunkedDataSource(self.path, chunksize=97)
+
+    def assertSameResult(self, algorithm, store_task, task):
+        result = algorithm.execute(store_task).to_descriptions()
+        expected = algorithm.execute(task).to_descriptions()
+        self.assertEqual(
+            [(quality, repr(sg)) for quality, sg, *_ in result],
+            [(quality, repr(sg)) for quality, sg, *_ in expected],
+        )
+
+    def test_source(self):
+        self.assertEqual(sum(len(chunk) for chunk in self.source), len(self.data))
+        self.assertEqual(self.source.count_rows(), len(self.data))
+        source = ps.ChunkedDataSource(
+            lambda: (self.data.iloc[i : i + 100] for i in range(0, 1000, 100)),
+            columns=["age", "class"],
+        )
+        self.assertEqual(source.count_rows(), len(self.data))
+        self.assertEqual(list(next(iter(source)).columns), ["age", "class"])
+        with self.assertRaises(ValueError):
+            ps.ChunkedDataSource("credit.txt")
+
+    def test_create_selectors(self):
+        self.assertEqual(
+            self.source.create_selectors(ignore=["class"]),
+            ps.create_selectors(self.data, ignore=["class"]),
+        )
+
+    def test_binary_target(self):
+        search_space = self.source.create_selectors(ignore=["class"])
+        # the bytes values of the credit data are written as b'...' to the csv
+        target = ps.BinaryTarget("class", "b'bad'")
+        with self.source.build_store(search_space, target) as store:
+            self.assertEqual(len(store), len(self.data))
+            self.assertIn(target.target_selector, store)
+            for sel in search_space + [target.target_selector]:
+                np.testing.assert_array_equal(sel.covers(store), sel.covers(self.data))
+            with self.assertRaises(KeyError):
+                store.packed_cover(ps.EqualitySelector("age", 1000))
+            for algorithm, depth in (
+                (ps.DFS(ps.PackedBitSetRepresentation), 2),
+                (ps.Apriori(ps.PackedBitSetRepresentation, use_numba=False), 2),
+                (ps.GpGrowth(), 3),
+            ):
+                self.assertSameResult(
+                    algorithm,
+                    ps.SubgroupDiscoveryTask(
+                        store, target, search_space, qf=ps.WRAccQF(), depth=depth
+                    ),
+                    ps.SubgroupDiscoveryTask(
+                        self.data, target, search_space, qf=ps.WRAccQF(), depth=depth
+                    ),
+                )
+            directory = store.directory
+        self.assertFalse(os.path.exists(directory))
+
+    def test_numeric_target(self):
+        search_space = self.source.create_selectors(ignore=["credit_amount"])
+        target = ps.NumericTarget("credit_amount")
+        directory = os.path.join(self.directory, "store")
+        with self.source.build_store(search_space, target, directory) as store:
+            np.testing.assert_array_equal(
+                store["credit_amount"], self.data["credit_amount"]
+            )
+            self.assertSameResult(
+                ps.DFS(ps.PackedBitSetRepresentation),
+                ps.SubgroupDiscoveryTask(
+                    store, target, search_space, qf=ps.StandardQFNumeric(0.5), depth=2
+                ),
+                ps.SubgroupDiscoveryTask(
+                    self.data,
+                    target,
+                    search_space,
+                    qf=ps.StandardQFNumeric(0.5),
+                    depth=2,
+                ),
+            )
+        self.assertTrue(os.path.exists(os.path.join(directory, "manifest.json")))
+
+    def test_packed_rows(self):
+        data = pd.DataFrame({"A": np.arange(200) % 3, "B": np.arange(200) % 5})
+        source = ps.ChunkedDataSource(lambda: (data.iloc[i : i + 30] for i in (0, 30)))
+        # the number of rows differs from the one counted before
+        source.n_instances = 50
+        with self.assertRaises(ValueError):
+            source.build_store(
+                ps.create_selectors(data),
+                directory=os.path.join(self.directory, "mismatch"),
+            )
+        source = ps.ChunkedDataSource(
+            lambda: (data.iloc[i : i + 30] for i in range(0, 200, 30))
+        )
+        selectors = ps.create_selectors(data)
+        with source.build_store(selectors) as store:
+            rows = store.rows(selectors[::-1], block_words=1)
+            expected = np.column_stack([sel.covers(data) for sel in selectors[::-1]])
+            self.assertEqual(rows.shape, expected.shape)
+            np.testing.assert_array_equal(np.array(list(rows)), expected)
+            np.testing.assert_array_equal(rows[:, 2], expected[:, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+import gc
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pysubgroup as ps
+from pysubgroup.datasets import get_credit_data
+
+
+class TestSelectorCoverCache(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {"A": [1, 2, 1, 3, 1], "B": [0.5, 1.5, 2.5, 3.5, 4.5]},
+        )
+        self.sel_A = ps.EqualitySelector("A", 1)
+        self.sel_B = ps.IntervalSelector("B", 1, 3)
+
+    def test_hits_and_misses(self):
+        with ps.SelectorCoverCache() as cache:
+            self.assertIs(ps.SelectorBase.cover_cache, cache)
+            for _ in range(3):
+                np.testing.assert_array_equal(
+                    self.sel_A.covers(self.df), [1, 0, 1, 0, 1]
+                )
+                np.testing.assert_array_equal(
+                    ps.Conjunction([self.sel_A, self.sel_B]).covers(self.df),
+                    [0, 0, 1, 0, 0],
+                )
+            self.assertEqual(cache.misses, 2)
+            self.assertEqual(cache.hits, 7)
+            self.assertFalse(self.sel_A.covers(self.df).flags.writeable)
+            # equal selectors share their entries
+            ps.EqualitySelector("A", 1).covers(self.df)
+            self.assertEqual(cache.hits, 9)
+        self.assertIsNone(ps.SelectorBase.cover_cache)
+
+    def test_lru_eviction(self):
+        selectors = [ps.EqualitySelector("A", value) for value in (1, 2, 3)]
+        with ps.SelectorCoverCache(max_nbytes=2 * len(self.df)) as cache:
+            selectors[0].covers(self.df)
+            selectors[1].covers(self.df)
+            selectors[0].covers(self.df)
+            selectors[2].covers(self.df)
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.evictions, 1)
+            self.assertLessEqual(cache.nbytes, cache.max_nbytes)
+            selectors[0].covers(self.df)
+            self.assertEqual(cache.hits, 2)
+            selectors[1].covers(self.df)
+            self.assertEqual(cache.misses, 4)
+
+    def test_packed(self):
+        with ps.SelectorCoverCache(packed=True) as cache:
+            first = self.sel_B.covers(self.df)
+            second = self.sel_B.covers(self.df)
+            np.testing.assert_array_equal(first, second)
+            self.assertEqual(second.dtype, bool)
+            self.assertEqual(cache.nbytes, 8)
+
+    def test_fingerprint(self):
+        with ps.SelectorCoverCache() as cache:
+            self.sel_A.covers(self.df)
+            self.sel_A.covers(self.df.copy())
+            self.assertEqual(cache.misses, 2)
+        with ps.SelectorCoverCache(fingerprint="content") as cache:
+            self.sel_A.covers(self.df)
+            self.sel_A.covers(self.df.copy())
+            self.assertEqual(cache.misses, 1)
+            modified = self.df.copy()
+            modified.loc[0, "A"] = 2
+            np.testing.assert_array_equal(self.sel_A.covers(modified), [0, 0, 1, 0, 1])
+            self.assertEqual(cache.misses, 2)
+        with self.assertRaises(ValueError):
+            ps.SelectorCoverCache(fingerprint="name")
+
+    def test_dropped_with_data(self):
+        with ps.SelectorCoverCache() as cache:
+            df = self.df.copy()
+            self.sel_A.covers(df)
+            self.assertEqual(len(cache), 1)
+            del df
+            gc.collect()
+            self.assertEqual(len(cache), 0)
+            self.assertEqual(cache.nbytes, 0)
+
+    def test_repeated_search(self):
+        data = get_credit_data()
+        target = ps.BinaryTarget("class", b"bad")
+        search_space = ps.create_selectors(data, ignore=["class"])
+        task = ps.SubgroupDiscoveryTask(
+            data, target, search_space, result_set_size=5, depth=2, qf=ps.WRAccQF()
+        )
+        expected = ps.SimpleDFS().execute(task).to_descriptions()
+        with ps.SelectorCoverCache() as cache:
+            ps.SimpleDFS().execute(task)
+            misses = cache.misses
+            result = ps.SimpleDFS().execute(task)
+            self.assertEqual(cache.misses, misses)
+        self.assertEqual(result.to_descriptions(), expected)
+
+
+class TestPersistentCoverStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data = get_credit_data()
+        self.target = ps.BinaryTarget("class", b"bad")
+        self.search_space = ps.create_selectors(self.data, ignore=["class"])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_algorithms(self):
+        task = ps.SubgroupDiscoveryTask(
+            self.data, self.target, self.search_space, qf=ps.WRAccQF(), depth=2
+        )
+        return [
+            [(quality, repr(sg)) for quality, sg, *_ in result.to_descriptions()]
+            for result in (
+                ps.DFS(ps.PackedBitSetRepresentation).execute(task),
+                ps.DFS(ps.BitSetRepresentation).execute(task),
+                ps.GpGrowth().execute(task),
+            )
+        ]
+
+    def test_reopen(self):
+        expected = self.run_algorithms()
+        with ps.PersistentCoverStore(self.directory.name) as store:
+            self.assertIs(ps.SelectorBase.cover_cache, store)
+            self.assertEqual(self.run_algorithms(), expected)
+            self.assertEqual(store.misses, len(self.search_space) + 1)
+        self.assertIsNone(ps.SelectorBase.cover_cache)
+        with ps.PersistentCoverStore(self.directory.name) as store:
+            self.assertEqual(self.run_algorithms(), expected)
+            self.assertEqual(store.misses, 0)
+            gp_growth = ps.GpGrowth()
+            gp_growth.setup(
+                ps.SubgroupDiscoveryTask(
+                    self.data, self.target, self.search_space, qf=ps.WRAccQF()
+                )
+            )
+            _, arrs = gp_growth.prepare_selectors(self.search_space, self.data)
+            self.assertIsInstance(arrs, ps.PackedRows)
+            cover = store.packed_cover(self.search_space[0], self.data)
+            self.assertIsInstance(cover, np.memmap)
+
+    def test_segments(self):
+        df = pd.DataFrame({"A": [1, 2, 1, 3, 1]})
+        with ps.PersistentCoverStore(self.directory.name) as store:
+            store.register(df, "A")
+            ps.EqualitySelector("A", 1).covers(df)
+        with ps.PersistentCoverStore(self.directory.name) as store:
+            store.register(df, "A")
+            ps.EqualitySelector("A", 1).covers(df)
+            np.testing.assert_array_equal(
+                ps.EqualitySelector("A", 3).covers(df), [0, 0, 0, 1, 0]
+            )
+            self.assertEqual((store.hits, store.misses), (1, 1))
+        path = os.path.join(self.directory.name, "A", "manifest.json")
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.assertEqual(
+            [segment["selectors"] for segment in manifest["segments"]],
+            [["A==1"], ["A==3"]],
+        )
+        with ps.PersistentCoverStore(self.directory.name) as store:
+            head = df.iloc[:3]
+            store.register(head, "A")
+            with self.assertRaises(ValueError):
+                ps.EqualitySelector("A", 1).covers(head)
+
+
+class TestCoverRetention(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({"A": [1, 2, 1, 3, 1], "B": [0, 1, 1, 1, 0]})
+        self.conjunctions = [
+            ps.Conjunction([ps.EqualitySelector("A", 1)]),
+            ps.Conjunction([ps.EqualitySelector("B", 1)]),
+            ps.Conjunction([ps.EqualitySelector("A", 3), ps.EqualitySelector("B", 1)]),
+        ]
+
+    def tearDown(self):
+        ps.Conjunction.cover_retention = "weak"
+
+    def test_policies(self):
+        conj = self.conjunctions[0]
+        cover = conj.covers(self.df)
+        self.assertIs(conj.retained_cover(), cover)
+        del cover
+        gc.collect()
+        self.assertIsNone(conj.retained_cover())
+
+        ps.Conjunction.cover_retention = "strong"
+        conj.covers(self.df)
+        np.testing.assert_array_equal(conj.retained_cover(), [1, 0, 1, 0, 1])
+        ps.Conjunction.cover_retention = "none"
+        conj.covers(self.df)
+        self.assertIsNone(conj.retained_cover())
+        ps.Conjunction.cover_retention = "all"
+        with self.assertRaises(ValueError):
+            conj.covers(self.df)
+
+    def test_digest(self):
+        digests = []
+        for conj in self.conjunctions:
+            conj.covers(self.df)
+            digests.append(conj._cover_digest)
+        self.assertEqual(len(digests[0]), 16)
+        self.assertNotEqual(digests[0], digests[1])
+        same_cover = ps.Conjunction([ps.IntervalSelector("A", 3, 4)])
+        same_cover.covers(self.df)
+        self.assertEqual(same_cover._cover_digest, digests[2])
+        self.assertTrue(ps.is_duplicate(self.conjunctions, same_cover))
+
+    def test_pool(self):
+        with ps.CoverRetentionPool(max_nbytes=2 * len(self.df)) as pool:
+            self.assertIs(ps.Conjunction.cover_retention, pool)
+            for conj in self.conjunctions:
+                conj.covers(self.df)
+            self.assertEqual(len(pool), 2)
+            self.assertEqual(pool.evictions, 1)
+            self.assertIsNone(self.conjunctions[0].retained_cover())
+            np.testing.assert_array_equal(
+                self.conjunctions[2].retained_cover(), [0, 0, 0, 1, 0]
+            )
+            # the cover of a copy is kept separately
+            refined = self.conjunctions[1] & ps.EqualitySelector("A", 2)
+            np.testing.assert_array_equal(refined.covers(self.df), [0, 1, 0, 0, 0])
+            self.assertIsNotNone(self.conjunctions[2].retained_cover())
+            self.assertIsNone(self.conjunctions[1].retained_cover())
+        self.assertEqual(ps.Conjunction.cover_retention, "weak")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import pickle
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pysubgroup as ps
+from pysubgroup.datasets import get_credit_data, get_titanic_data
+
+
+class TestDatasetIndex(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(
+            {
+                "nominal": [b"a", b"b", np.nan, b"a", b"c"],
+                "boolean": [True, False, True, True, False],
+                "integer": [3, 1, 2, 3, 5],
+                "numeric": [0.5, np.nan, 2.5, -1.0, 1.5],
+                "sparse": pd.arrays.SparseArray([0, 0, 1, 0, 2]),
+            }
+        )
+        self.index = ps.DatasetIndex(self.df)
+
+    def test_encoding(self):
+        np.testing.assert_array_equal(self.index.codes["nominal"], [0, 1, 2, 0, 3])
+        self.assertEqual(self.index.null_codes["nominal"], 2)
+        self.assertIsNone(self.index.null_codes["boolean"])
+        self.assertEqual(self.index.code("nominal", b"c"), 3)
+        self.assertIsNone(self.index.code("nominal", b"d"))
+        np.testing.assert_array_equal(self.index.orders["numeric"], [3, 0, 4, 2, 1])
+        np.testing.assert_array_equal(
+            self.index.interval_rows("integer", 2, 4), [2, 0, 3]
+        )
+        self.assertNotIn("sparse", self.index.values)
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(list(self.index.columns), list(self.df.columns))
+
+    def test_covers(self):
+        selectors = ps.create_selectors(self.df, nbins=2) + [
+            ps.EqualitySelector("nominal", b"d"),
+            ps.EqualitySelector("numeric", np.nan),
+            ps.IntervalSelector("numeric", 0.5, 2.5),
+            ps.IntervalSelector("numeric", float("-inf"), float("inf")),
+            ps.NegatedSelector(ps.EqualitySelector("nominal", b"a")),
+        ]
+        for sel in selectors:
+            np.testing.assert_array_equal(
+                sel.covers(self.index), sel.covers(self.df), err_msg=repr(sel)
+            )
+
+    def test_create_selectors(self):
+        for data in (get_credit_data(), get_titanic_data(), self.df):
+            self.assertEqual(
+                [repr(sel) for sel in ps.create_selectors(ps.DatasetIndex(data))],
+                [repr(sel) for sel in ps.create_selectors(data)],
+            )
+
+    def test_pickle(self):
+        loaded = pickle.loads(pickle.dumps(self.index))
+        np.testing.assert_array_equal(
+            ps.EqualitySelector("nominal", b"a").covers(loaded), [1, 0, 0, 1, 0]
+        )
+
+    def test_algorithms(self):
+        data = get_credit_data()
+        index = ps.DatasetIndex(data)
+        target = ps.BinaryTarget("class", b"bad")
+        for representation in (
+            ps.BitSetRepresentation,
+            ps.SetRepresentation,
+            ps.NumpySetRepresentation,
+        ):
+            results = [
+                ps.DFS(representation)
+                .execute(
+                    ps.SubgroupDiscoveryTask(
+                        data_,
+                        target,
+                        ps.create_selectors(data_, ignore=["class"]),
+                        qf=ps.WRAccQF(),
+                        depth=2,
+                    )
+                )
+                .to_descriptions()
+                for data_ in (data, index)
+            ]
+            self.assertEqual(results[0], results[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
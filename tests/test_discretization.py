@@ -0,0 +1,103 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pysubgroup as ps
+from pysubgroup.datasets import get_credit_data, get_titanic_data
+
+
+class TestEqualFrequencyDiscretization(unittest.TestCase):
+    def test_unweighted(self):
+        df = pd.DataFrame({"A": [1, 1, 1, 1, 2, 2, 3, 4, np.nan, 5, 6, 7]})
+        self.assertEqual(ps.equal_frequency_discretization(df, "A", 3), [1, 4])
+        self.assertEqual(ps.equal_frequency_discretization(df, "A", 5), [1, 2, 3, 5])
+        # repeated values are skipped
+        self.assertEqual(
+            ps.equal_frequency_discretization(df, "A", 10), [1, 2, 3, 4, 5, 6, 7]
+        )
+
+    def test_weighted(self):
+        df = pd.DataFrame(
+            {"A": [5.0, 1.0, 2.0, np.nan, 3.0, 4.0], "w": [1, 3, 1, 5, 1, 2]}
+        )
+        self.assertEqual(
+            ps.equal_frequency_discretization(df, "A", 2, weighting_attribute="w"),
+            [3.0],
+        )
+        self.assertEqual(
+            ps.equal_frequency_discretization(
+                df.to_records(index=False), "A", 4, weighting_attribute="w"
+            ),
+            [1.0, 4.0],
+        )
+
+    def test_sparse(self):
+        df = pd.DataFrame({"A": pd.arrays.SparseArray([0, 0, 3, 0, 1, 2, 4, 5])})
+        self.assertEqual(ps.equal_frequency_discretization(df, "A", 2), [3])
+
+
+class TestQuantileSketch(unittest.TestCase):
+    def test_exact(self):
+        values = np.random.default_rng(0).integers(0, 100, 1000).astype(float)
+        values[::10] = np.nan
+        df = pd.DataFrame({"A": values})
+        sketch = ps.QuantileSketch()
+        for chunk in np.array_split(values, 7):
+            sketch.update(chunk)
+        self.assertTrue(sketch.exact)
+        self.assertTrue(sketch.has_null)
+        self.assertEqual(sketch.n_instances, 1000)
+        for nbins in (2, 5, 13):
+            self.assertEqual(
+                sketch.cutpoints(nbins),
+                ps.equal_frequency_discretization(df, "A", nbins),
+            )
+
+    def test_approximate(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(size=100_000)
+        weights = rng.random(len(values))
+        for w in (None, weights):
+            sketches = []
+            for rows in np.array_split(np.arange(len(values)), 10):
+                sketch = ps.QuantileSketch(max_size=256)
+                sketches.append(
+                    sketch.update(values[rows], None if w is None else w[rows])
+                )
+            sketch = sketches[0]
+            for other in sketches[1:]:
+                sketch.merge(other)
+            self.assertFalse(sketch.exact)
+            self.assertLessEqual(len(sketch.values), 256)
+            if w is None:
+                w = np.ones(len(values))
+            for i, cutpoint in enumerate(sketch.cutpoints(5), 1):
+                self.assertAlmostEqual(
+                    w[values < cutpoint].sum() / w.sum(), i / 5, delta=0.02
+                )
+
+    def test_weighted_mismatch(self):
+        sketch = ps.QuantileSketch().update([1.0, 2.0])
+        with self.assertRaises(ValueError):
+            sketch.update([1.0], [2.0])
+
+
+class TestCreateFromChunks(unittest.TestCase):
+    def test_same_as_in_memory(self):
+        for data in (get_credit_data(), get_titanic_data()):
+            for intervals_only in (True, False):
+                chunks = (data.iloc[i : i + 97] for i in range(0, len(data), 97))
+                self.assertEqual(
+                    ps.create_numeric_selectors_from_chunks(
+                        chunks, intervals_only=intervals_only, ignore=["Survived"]
+                    ),
+                    ps.create_numeric_selectors(
+                        data, intervals_only=intervals_only, ignore=["Survived"]
+                    ),
+                )
+        self.assertEqual(ps.create_numeric_selectors_from_chunks([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
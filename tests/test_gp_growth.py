@@ -1,10 +1,14 @@
+import os
+import tempfile
 import unittest
 
+import numpy as np
 import pandas as pd
 from t_utils import assertResultEqual
 
 import pysubgroup as ps
 from pysubgroup.datasets import get_credit_data
+from pysubgroup.gp_growth import GpTransactions, GpTree
 
 
 class TestGpGrowth(unittest.TestCase):
@@ -117,7 +121,8 @@ class TestGpGrowth(unittest.TestCase):
         task = ps.SubgroupDiscoveryTask(
             self.df1, target, searchspace, result_set_size=5, depth=2, qf=ps.CountQF()
         )
-        ps.GpGrowth().to_file(task, "./test_gp_fi.txt")
+        with tempfile.TemporaryDirectory() as directory:
+            ps.GpGrowth().to_file(task, os.path.join(directory, "test_gp_fi.txt"))
 
     def test_export_binary(self):
         target = ps.BinaryTarget("A", 1)
@@ -130,7 +135,8 @@ class TestGpGrowth(unittest.TestCase):
             depth=2,
             qf=ps.StandardQF(0.5),
         )
-        ps.GpGrowth().to_file(task, "./test_gp_binary.txt")
+        with tempfile.TemporaryDirectory() as directory:
+            ps.GpGrowth().to_file(task, os.path.join(directory, "test_gp_binary.txt"))
 
     def test_export_model(self):
         model = ps.PolyRegression_ModelClass("A", "B")
@@ -139,7 +145,8 @@ class TestGpGrowth(unittest.TestCase):
         task = ps.SubgroupDiscoveryTask(
             self.df, None, searchspace, result_set_size=5, depth=2, qf=QF
         )
-        ps.GpGrowth().to_file(task, "./test_gp_model.txt")
+        with tempfile.TemporaryDirectory() as directory:
+            ps.GpGrowth().to_file(task, os.path.join(directory, "test_gp_model.txt"))
 
     def test_gp_modes_restricted(self):
         with self.assertRaises(AssertionError):
@@ -186,14 +193,14 @@ class TestGpGrowth(unittest.TestCase):
             2 A==1 AND D==1 AND E==1
             2 B==1 AND D==1
             2 B==1 AND D==1 AND E==1
-            2 A==1 AND B==1 AND D==1
             2 C==1
             2 A==1 AND C==1
             2 A==1 AND D==1
-            2 A==1 AND D==1
             2 B==1 AND C==1
-            2 B==1 AND D==1
-            2 A==1 AND B==1 AND C==1""",
+            2 A==1 AND B==1 AND C==1
+            2 D==1
+            2 D==1 AND E==1
+            2 E==1""",
         )
 
     def test_gp_simple3(self):
@@ -206,8 +213,7 @@ class TestGpGrowth(unittest.TestCase):
             """4 Dataset
             3 A==1
             2 B==1
-            1 A==1 AND B==1
-            1 B==1""",
+            1 A==1 AND B==1""",
         )
 
     def test_gp_simple4(self):
@@ -288,6 +294,88 @@ class TestGpGrowth(unittest.TestCase):
             0.06272082938724895 credit_history=='b'all paid'' AND other_parties=='b'none''""",  # noqa: E501
         )
 
+    def test_gp_tree(self):
+        rows = np.array(
+            [[1, 1, 0], [1, 1, 1], [1, 0, 1], [0, 1, 1], [0, 0, 1]], dtype=bool
+        )
+        qf = ps.CountQF()
+        stats = np.array([qf.gp_get_stats(None) for _ in rows])
+        transactions = GpTransactions.from_rows(rows, stats)
+        tree = GpTree.from_transactions(
+            transactions, qf.gp_get_null_vector(), qf.gp_merge, True
+        )
+        np.testing.assert_array_equal(tree.cls, [-1, 0, 1, 2, 2, 1, 2, 2])
+        np.testing.assert_array_equal(tree.parent, [-1, 0, 1, 2, 1, 0, 5, 0])
+        self.assertEqual(list(tree.header), [-1, 0, 1, 2])
+        self.assertEqual(
+            {cls: stats[0] for cls, stats in tree.class_stats().items()},
+            {-1: 5, 0: 3, 1: 3, 2: 4},
+        )
+        np.testing.assert_array_equal(tree.preorder(), [0, 1, 2, 3, 4, 5, 6, 7])
+        # ancestors of the nodes of class 2, weighted by the transactions below
+        conditional = tree.conditional_tree(2)
+        np.testing.assert_array_equal(conditional.cls, [-1, 0, 1, 1])
+        np.testing.assert_array_equal(conditional.stats[:, 0], [4, 2, 1, 1])
+        # merged subtrees below the nodes of class 1
+        suffix = tree.suffix_tree(1)
+        np.testing.assert_array_equal(suffix.cls, [1, 2])
+        np.testing.assert_array_equal(suffix.stats[:, 0], [3, 2])
+
+    def test_gp_initial_tree_grouped(self):
+        data = get_credit_data()
+        task = ps.SubgroupDiscoveryTask(
+            data,
+            ps.BinaryTarget("class", b"bad"),
+            ps.create_nominal_selectors(data, ignore=["class"]),
+            qf=ps.StandardQF(0.5),
+        )
+        gp = ps.GpGrowth()
+        gp.setup(task)
+        _, arrs = gp.prepare_selectors(task.search_space, task.data)
+        tree = gp.create_initial_tree(arrs)
+        # insert the transactions one at a time
+        gp.additive = False
+        expected = gp.create_initial_tree(arrs)
+        np.testing.assert_array_equal(tree.cls, expected.cls)
+        np.testing.assert_array_equal(tree.parent, expected.parent)
+        np.testing.assert_array_equal(tree.stats, expected.stats)
+
+    def test_gp_transactions_file(self):
+        data = get_credit_data()
+        search_space = ps.create_selectors(data, ignore=["class"])
+        model = ps.PolyRegression_ModelClass("age", "duration")
+
+        def create_task(qf):
+            return ps.SubgroupDiscoveryTask(
+                data,
+                ps.BinaryTarget("class", b"bad"),
+                search_space,
+                qf=qf,
+                result_set_size=5,
+                depth=2,
+                constraints=[ps.MinSupportConstraint(100)],
+            )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "transactions.npz")
+            for mode, qf in (
+                ("b_u", ps.StandardQF(0.5)),
+                ("t_d", ps.EMM_Likelihood(model)),
+            ):
+                ps.GpGrowth(mode).to_file(create_task(qf), path)
+                transactions, _ = ps.GpTransactions.load(path)
+                self.assertEqual(len(transactions), len(data))
+                expected = ps.GpGrowth(mode).execute(create_task(qf))
+                result = ps.GpGrowth(mode).execute(create_task(qf), transactions=path)
+                self.assertEqual(result.to_descriptions(), expected.to_descriptions())
+            with self.assertRaises(ValueError):
+                ps.GpGrowth().execute(
+                    ps.SubgroupDiscoveryTask(
+                        data, None, search_space[1:], qf=ps.CountQF()
+                    ),
+                    transactions=path,
+                )
+
 
 if __name__ == "__main__":
     unittest.main()
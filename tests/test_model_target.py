@@ -34,42 +34,42 @@ class TestGpGrowth(unittest.TestCase):
             qf=qf,
             constraints=[ps.MinSupportConstraint(100)],
         )
-        results = ps.GpGrowth().execute(task)
-
-        assertResultEqual(
-            self,
-            results,
-            """0.013797436813222048 property_magnitude=='b'car'' AND purpose=='b'radio/tv''
-            0.009898734286313158 credit_history=='b'existing paid'' AND job=='b'unskilled resident''
-            0.008246523912217767 employment=='b'>=7'' AND existing_credits==2.0
-            0.008140633988502345 residence_since==1.0
-            0.0077895968955903 installment_commitment==4.0 AND personal_status=='b'female div/dep/mar''
-            0.0074121246910140584 employment=='b'4<=X<7'' AND personal_status=='b'male single''
-            0.0071337090733226 employment=='b'<1'' AND existing_credits==1.0
-            0.0068670509196103215 checking_status=='b'no checking'' AND residence_since==2.0
-            0.006504784620278891 residence_since==2.0 AND savings_status=='b'<100''
-            0.006155044522767603 own_telephone=='b'none'' AND property_magnitude=='b'real estate''
-            0.005861872663834833 housing=='b'rent'' AND residence_since==4.0
-            0.005860952266316298 housing=='b'own'' AND purpose=='b'furniture/equipment''
-            0.005803210503193562 property_magnitude=='b'car'' AND residence_since==2.0
-            0.005799115508272782 installment_commitment==4.0 AND purpose=='b'radio/tv''
-            0.005784113955920163 checking_status=='b'no checking'' AND purpose=='b'radio/tv''
-            0.00576020125931543 own_telephone=='b'yes'' AND personal_status=='b'female div/dep/mar''
-            0.005710873446125693 age: [30.0:36.0[ AND own_telephone=='b'yes''
-            0.005447977966354751 employment=='b'>=7'' AND personal_status=='b'male single''
-            0.005369226054398001 credit_history=='b'critical/other existing credit'' AND own_telephone=='b'yes''
-            0.0051795091578145415 checking_status=='b'<0''
-            0.005142633556137799 installment_commitment==3.0 AND job=='b'skilled''
-            0.005113508747833315 personal_status=='b'female div/dep/mar'' AND property_magnitude=='b'car''
-            0.005076244770614837 job=='b'unskilled resident'' AND num_dependents==1.0
-            0.005037829303302348 checking_status=='b'no checking'' AND employment=='b'>=7''
-            0.004968598479332576 age: [26.0:30.0[ AND own_telephone=='b'none''
-            0.004948240707577685 employment=='b'<1'' AND other_payment_plans=='b'none''
-            0.004908520358522154 age<26.0 AND existing_credits==1.0
-            0.00483781209051734 installment_commitment==3.0 AND other_payment_plans=='b'none''
-            0.00476540157528357 own_telephone=='b'none'' AND purpose=='b'furniture/equipment''
-            0.004700479771495154 employment=='b'1<=X<4'' AND existing_credits==2.0""",  # noqa: E501
-        )
+        for mode in ("b_u", "t_d"):
+            results = ps.GpGrowth(mode).execute(task)
+            assertResultEqual(
+                self,
+                results,
+                """0.004125404353658707 installment_commitment==4.0 AND personal_status=='b'female div/dep/mar''
+                0.003949104591079922 employment=='b'>=7'' AND existing_credits==2.0
+                0.0036622133586147743 credit_history=='b'existing paid'' AND job=='b'unskilled resident''
+                0.0035107147712656888 age>=45.0 AND installment_commitment==4.0
+                0.003477084456318777 installment_commitment==4.0 AND property_magnitude=='b'real estate''
+                0.0029872368311445237 personal_status=='b'male single'' AND property_magnitude=='b'real estate''
+                0.002656009631889224 foreign_worker=='b'yes'' AND residence_since==3.0
+                0.0025723160654445836 employment=='b'<1'' AND num_dependents==1.0
+                0.0022580478005381956 own_telephone=='b'none'' AND property_magnitude=='b'real estate''
+                0.0021048617864518906 existing_credits==1.0 AND property_magnitude=='b'life insurance''
+                0.0020094837480520373 checking_status=='b'no checking'' AND personal_status=='b'male single''
+                0.0019095158400401831 foreign_worker=='b'yes'' AND num_dependents==2.0
+                0.001812947120335377 credit_history=='b'existing paid'' AND property_magnitude=='b'real estate''
+                0.0017996527357908771 employment=='b'<1'' AND other_payment_plans=='b'none''
+                0.0017968722533465184 checking_status=='b'<0'' AND num_dependents==1.0
+                0.001712352156985456 job=='b'skilled'' AND savings_status=='b'<100''
+                0.0016020148984202856 credit_history=='b'existing paid'' AND employment=='b'1<=X<4''
+                0.0015980882760678284 existing_credits==2.0 AND job=='b'skilled''
+                0.0015761312513390626 age: [30.0:36.0[ AND credit_history=='b'existing paid''
+                0.0015050534655693497 installment_commitment==4.0 AND purpose=='b'radio/tv''
+                0.0014850731208653793 age: [26.0:30.0[ AND num_dependents==1.0
+                0.0014224750256878842 credit_history=='b'critical/other existing credit'' AND personal_status=='b'male single''
+                0.0013989626109611004 housing=='b'own'' AND installment_commitment==3.0
+                0.0013934111496206113 property_magnitude=='b'car'' AND residence_since==2.0
+                0.0013580369707479772 credit_history=='b'critical/other existing credit'' AND residence_since==4.0
+                0.0013166260729740008 checking_status=='b'no checking'' AND property_magnitude=='b'real estate''
+                0.0013144883183096934 installment_commitment==3.0 AND other_payment_plans=='b'none''
+                0.0012690140920876458 employment=='b'4<=X<7''
+                0.001233840956186023 other_parties=='b'none'' AND personal_status=='b'female div/dep/mar''
+                0.0012190894371333343 existing_credits==1.0 AND installment_commitment==4.0""",  # noqa: E501
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+import os
+import pickle
+import unittest
+
+import numpy as np
+
+import pysubgroup as ps
+from pysubgroup.datasets import get_credit_data
+
+
+class TestMemmapArrayStore(unittest.TestCase):
+    def test_dumps_loads(self):
+        store = ps.MemmapArrayStore(min_nbytes=100)
+        large = np.arange(1000)
+        small = np.arange(3)
+        payload = store.dumps({"large": large, "small": small, "again": large})
+        self.assertLess(len(payload), large.nbytes)
+        loaded = ps.MemmapArrayStore.loads(payload)
+        np.testing.assert_array_equal(loaded["large"], large)
+        np.testing.assert_array_equal(loaded["small"], small)
+        self.assertEqual(len(os.listdir(store.directory)), 1)
+        self.assertFalse(loaded["large"].flags.writeable)
+        store.close()
+        self.assertFalse(os.path.exists(store.directory))
+
+    def test_qf_payload(self):
+        data = get_credit_data()
+        target = ps.NumericTarget("credit_amount")
+        qf = ps.StandardQFNumeric(0.5)
+        qf.calculate_constant_statistics(data, target)
+        store = ps.MemmapArrayStore(min_nbytes=1000)
+        payload = store.dumps(qf)
+        self.assertLess(len(payload), len(pickle.dumps(qf)))
+        loaded_qf = ps.MemmapArrayStore.loads(payload)
+        sel = ps.EqualitySelector("foreign_worker", b"yes")
+        cover_arr = sel.covers(data)
+        self.assertEqual(
+            qf.calculate_statistics(cover_arr, target, data),
+            loaded_qf.calculate_statistics(cover_arr, target, None),
+        )
+        store.close()
+
+
+class TestSharedCoverPool(unittest.TestCase):
+    def test_imap(self):
+        data = get_credit_data()
+        target = ps.BinaryTarget("class", b"bad")
+        search_space = ps.create_nominal_selectors(data, ignore=["class"])[:10]
+        task = ps.SubgroupDiscoveryTask(
+            data, target, search_space, result_set_size=5, depth=2, qf=ps.WRAccQF()
+        )
+        task.qf.calculate_constant_statistics(data, target)
+        candidates = [[i] for i in range(10)] + [[0, 3], [2, 7, 9]]
+        with ps.SharedCoverPool(2) as pool:
+            pool.prepare(task)
+            results = list(pool.imap(candidates, chunksize=4))
+        self.assertEqual([sg_inds for sg_inds, _, _ in results], candidates)
+        for sg_inds, quality, statistics in results:
+            sg = ps.sg_from_inds(search_space, sg_inds)
+            self.assertEqual(statistics, task.qf.calculate_statistics(sg, target, data))
+            np.testing.assert_allclose(quality, task.qf.evaluate(sg, target, data))
+
+    def test_reuse(self):
+        data = get_credit_data()
+        target = ps.BinaryTarget("class", b"bad")
+        search_space = ps.create_nominal_selectors(data, ignore=["class"])
+        candidates = [[i] for i in range(len(search_space))]
+        covers_paths = set()
+        with ps.SharedCoverPool(2) as pool:
+            for a in (0.5, 1, 0.5):
+                task = ps.SubgroupDiscoveryTask(
+                    data, target, search_space, qf=ps.StandardQF(a)
+                )
+                task.qf.calculate_constant_statistics(data, target)
+                pool.prepare(task)
+                covers_paths.add(pool._covers_path)
+                qualities = [quality for _, quality, _ in pool.imap(candidates)]
+                expected = [
+                    task.qf.evaluate(ps.sg_from_inds(search_space, inds), target, data)
+                    for inds in candidates
+                ]
+                np.testing.assert_allclose(qualities, expected)
+            # the covers are computed once for the same data
+            self.assertEqual(len(covers_paths), 1)
+            covers_path = covers_paths.pop()
+
+            # new data replaces the resident covers
+            task.data = data.iloc[:500]
+            task.qf.calculate_constant_statistics(task.data, target)
+            pool.prepare(task)
+            self.assertFalse(os.path.exists(covers_path))
+            _, quality, _ = next(pool.imap([[0]]))
+            sg = ps.Conjunction([search_space[0]])
+            np.testing.assert_allclose(quality, task.qf.evaluate(sg, target, task.data))
+
+    def test_chunksize(self):
+        with ps.SharedCoverPool(2, chunk_nbytes=8 * 10) as pool:
+            pool._n_words = 1
+            self.assertEqual(pool.chunksize(16), 2)
+            self.assertEqual(pool.chunksize(1000), 10)
+            self.assertEqual(pool.chunksize(0), 1)
+
+
+class TestParallelDFS(unittest.TestCase):
+    def test_same_as_sequential(self):
+        data = get_credit_data()
+        target = ps.BinaryTarget("class", b"bad")
+        search_space = ps.create_selectors(data, ignore=["class"])
+        # a=0 produces many ties, a=1 empty subgroups with a quality of nan
+        for a, result_set_size, depth in [(0, 10, 2), (1, 1, 3), (0.5, 20, 2)]:
+            task = ps.SubgroupDiscoveryTask(
+                data,
+                target,
+                search_space,
+                result_set_size=result_set_size,
+                depth=depth,
+                qf=ps.StandardQF(a),
+            )
+            expected = ps.DFS().execute(task).to_descriptions(include_stats=True)
+            for split_depth in (1, 2):
+                result = ps.DFS(nproc=2, split_depth=split_depth).execute(task)
+                self.assertEqual(result.to_descriptions(include_stats=True), expected)
+
+
+class TestParallelGpGrowth(unittest.TestCase):
+    def test_same_as_sequential(self):
+        data = get_credit_data()
+        target = ps.BinaryTarget("class", b"bad")
+        search_space = ps.create_selectors(data, ignore=["class"])
+        # a=0 produces many ties
+        for mode, a, result_set_size, depth in [
+            ("b_u", 0, 10, 3),
+            ("b_u", 0.5, 20, 4),
+            ("t_d", 0.5, 10, 3),
+        ]:
+            task = ps.SubgroupDiscoveryTask(
+                data,
+                target,
+                search_space,
+                result_set_size=result_set_size,
+                depth=depth,
+                qf=ps.StandardQF(a),
+                constraints=[ps.MinSupportConstraint(100)],
+            )
+            expected = ps.GpGrowth(mode).execute(task)
+            result = ps.GpGrowth(mode, nproc=2).execute(task)
+            self.assertEqual(
+                result.to_descriptions(include_stats=True),
+                expected.to_descriptions(include_stats=True),
+            )
+
+    def test_cover_required(self):
+        data = get_credit_data()
+        search_space = ps.create_nominal_selectors(data, ignore=["class"])
+        for mode in ("b_u", "t_d"):
+            qf = ps.EMM_Likelihood(ps.PolyRegression_ModelClass("age", "duration"))
+            task = ps.SubgroupDiscoveryTask(
+                data,
+                None,
+                search_space,
+                result_set_size=10,
+                depth=2,
+                qf=qf,
+                constraints=[ps.MinSupportConstraint(100)],
+            )
+            expected = ps.GpGrowth(mode).execute(task)
+            result = ps.GpGrowth(mode, nproc=2).execute(task)
+            self.assertEqual(result.to_descriptions(), expected.to_descriptions())
+
+
+if __name__ == "__main__":
+    unittest.main()
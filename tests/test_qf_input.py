@@ -43,6 +43,70 @@ class TestQFInputs(unittest.TestCase):
         size = qf.evaluate(np.array([1, 3, 5, 7, 11], dtype=int), target, self.data)
         self.assertEqual(size, 5)
 
+    def check_calculate_statistics_batch(self, qf, target):
+        qf.calculate_constant_statistics(self.data, target)
+        selectors = ps.create_selectors(self.data, ignore=["class", "credit_amount"])
+        subgroups = [ps.Conjunction([])] + [
+            ps.Conjunction([sel1, sel2])
+            for sel1, sel2 in zip(selectors[::7], selectors[3::7])
+        ]
+        covers = ps.get_cover_matrix(subgroups, len(self.data), self.data)
+        batch = qf.calculate_statistics_batch(covers, target, self.data)
+        for i, sg in enumerate(subgroups):
+            statistics = qf.calculate_statistics(sg, target, self.data)
+            for field, value in zip(statistics._fields, statistics):
+                self.assertAlmostEqual(value, getattr(batch, field)[i])
+        if hasattr(qf, "evaluate_batch"):
+            np.testing.assert_allclose(
+                qf.evaluate_batch(batch),
+                [qf.evaluate(sg, target, self.data) for sg in subgroups],
+            )
+            np.testing.assert_allclose(
+                qf.optimistic_estimate_batch(batch),
+                [qf.optimistic_estimate(sg, target, self.data) for sg in subgroups],
+            )
+
+    def test_calculate_statistics_batch_StandardQF(self):
+        self.check_calculate_statistics_batch(
+            ps.StandardQF(0.5), ps.BinaryTarget("class", b"bad")
+        )
+
+    def test_calculate_statistics_batch_CountQF(self):
+        self.check_calculate_statistics_batch(ps.CountQF(), ps.FITarget())
+
+    def test_calculate_statistics_batch_StandardQFNumeric(self):
+        target = ps.NumericTarget("credit_amount")
+        for estimator in ("sum", "max", "order"):
+            self.check_calculate_statistics_batch(
+                ps.StandardQFNumeric(0.5, estimator=estimator), target
+            )
+        self.check_calculate_statistics_batch(
+            ps.StandardQFNumeric(0.5, centroid="median"), target
+        )
+
+    def test_calculate_statistics_batch_StandardQFNumericTscore(self):
+        self.check_calculate_statistics_batch(
+            ps.StandardQFNumericTscore(), ps.NumericTarget("credit_amount")
+        )
+
+    def test_calculate_statistics_batch_packed(self):
+        target = ps.BinaryTarget("class", b"bad")
+        qf = ps.StandardQF(0.5)
+        qf.calculate_constant_statistics(self.data, target)
+        selectors = ps.create_nominal_selectors(self.data, ignore=["class"])[:10]
+        expected = qf.calculate_statistics_batch(
+            ps.get_cover_matrix(selectors, len(self.data), self.data),
+            target,
+            self.data,
+        )
+        with ps.PackedBitSetRepresentation(self.data, selectors) as representation:
+            subgroups = [representation.Conjunction([sel]) for sel in selectors]
+            covers = ps.get_cover_matrix(subgroups)
+            self.assertEqual(covers.dtype, np.uint64)
+            batch = qf.calculate_statistics_batch(covers, target, self.data)
+        np.testing.assert_array_equal(batch.size_sg, expected.size_sg)
+        np.testing.assert_array_equal(batch.positives_count, expected.positives_count)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -68,6 +68,51 @@ class TestRepresentation(unittest.TestCase):
             )
             # pylint: enable=no-member
 
+    def test_PackedBitSet(self):
+        with ps.PackedBitSetRepresentation(
+            self.df, [self.A1, self.A0, self.BA, self.BC, self.CA, self.CNan]
+        ) as representation:
+            # pylint: disable=no-member
+            self.assertEqual(self.A1.representation.dtype, np.uint64)
+            self.assertEqual(self.A1.size_sg, 6)
+            np.testing.assert_array_equal(
+                ps.unpack_bitset(self.A1.representation, len(self.df)), self.A
+            )
+
+            conj = representation.Conjunction([self.BA, self.CNan])
+            self.assertEqual(conj.size_sg, 1)
+            np.testing.assert_array_equal(conj, [1, 0, 0, 0, 0, 0, 0, 0, 0, 0])
+            self.assertEqual(representation.Conjunction([]).size_sg, 10)
+            conj = representation.Conjunction([self.BA]) & self.A1
+            np.testing.assert_array_equal(conj, [0, 0, 0, 0, 0, 0, 0, 1, 1, 1])
+
+            np.testing.assert_array_equal(
+                representation.Disjunction([self.BA, self.BC]),
+                [1, 0, 1, 1, 0, 1, 0, 1, 1, 1],
+            )
+            self.assertEqual(representation.Disjunction().size_sg, 0)
+            # pylint: enable=no-member
+
+    def test_PackedBitSet_statistics(self):
+        qf = ps.StandardQF(0.5)
+        qf.calculate_constant_statistics(self.df, ps.BinaryTarget("columnA", True))
+        with ps.PackedBitSetRepresentation(
+            self.df, [self.BA, self.CNan]
+        ) as representation:
+            conj = representation.Conjunction([self.BA])
+            self.assertEqual(
+                qf.calculate_statistics(conj, None, self.df),
+                qf.calculate_statistics(self.BA.covers(self.df), None, self.df),
+            )
+
+    def test_pack_bitset(self):
+        for n in (0, 1, 63, 64, 65, 130):
+            arr = np.arange(n) % 3 == 0
+            packed = ps.pack_bitset(arr)
+            self.assertEqual(len(packed), (n + 63) // 64)
+            self.assertEqual(ps.popcount(packed), np.count_nonzero(arr))
+            np.testing.assert_array_equal(ps.unpack_bitset(packed, n), arr)
+
     def test_Set(self):
         with ps.SetRepresentation(
             self.df, [self.A1, self.A0, self.BA, self.BC, self.CA, self.CNan]
@@ -110,6 +155,15 @@ class TestRepresentation(unittest.TestCase):
             np.testing.assert_array_equal(
                 representation.Conjunction([self.A0, self.CNan]).representation, [0, 1]
             )
+            # refinements only look at the instances of their parent
+            np.testing.assert_array_equal(
+                (representation.Conjunction([self.A1]) & self.BA).representation,
+                [7, 8, 9],
+            )
+            np.testing.assert_array_equal(
+                (representation.Conjunction([]) & self.A0 & self.CNan).representation,
+                [0, 1],
+            )
             # pylint: enable=no-member
 
 
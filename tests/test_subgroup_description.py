@@ -1,3 +1,4 @@
+import gc
 import os
 import pickle
 import tempfile
@@ -23,6 +24,39 @@ class TestRelationsMethods(unittest.TestCase):
                 A2 = pickle.load(f)
 
             assert A1 == A2
+            assert A1 is A2
+
+    def test_interning(self):
+        A1 = ps.EqualitySelector("A", 1)
+        self.assertIs(ps.NegatedSelector(A1), ps.NegatedSelector(A1))
+        self.assertEqual(A1.selector_id, ps.EqualitySelector("A", 1).selector_id)
+        self.assertNotEqual(A1.selector_id, ps.EqualitySelector("A", 2).selector_id)
+        # the same repr but different values, the selectors are equal but distinct
+        bytes_sel = ps.EqualitySelector("B", b"yes")
+        str_sel = ps.EqualitySelector("B", "b'yes'")
+        self.assertIsNot(bytes_sel, str_sel)
+        self.assertEqual(bytes_sel, str_sel)
+        self.assertEqual(str_sel.attribute_value, "b'yes'")
+
+        interval = ps.IntervalSelector("C", 1, 2.5)
+        interval.sorted_column = ps.SortedColumn("C")
+        loaded = pickle.loads(pickle.dumps([A1, interval]))
+        self.assertIs(loaded[0], A1)
+        self.assertIs(loaded[1], interval)
+
+    def test_selector_ids_are_reused(self):
+        selector = ps.EqualitySelector("unused_attribute", 1)
+        name = repr(selector)
+        selector_id = selector.selector_id
+        self.assertEqual(ps.SelectorBase.__ids__[name], selector_id)
+        del selector
+        gc.collect()
+        self.assertNotIn(name, ps.SelectorBase.__ids__)
+        self.assertIn(selector_id, ps.SelectorBase._free_ids)
+        # a new selector takes a freed id, ids of live selectors stay distinct
+        other = ps.EqualitySelector("unused_attribute", 2)
+        self.assertNotIn(other.selector_id, ps.SelectorBase._free_ids)
+        self.assertNotEqual(other.selector_id, ps.EqualitySelector("A", 1).selector_id)
 
 
 class TestBasics(unittest.TestCase):
@@ -174,6 +208,40 @@ class TestBasics(unittest.TestCase):
         self.assertIs(sel, ps.EqualitySelector("B", 1))
         self.assertEqual(conj, ps.Conjunction([ps.EqualitySelector("A", 0)]))
 
+    def test_keys(self):
+        A0 = ps.EqualitySelector("A", 0)
+        B1 = ps.EqualitySelector("B", 1)
+        conj = ps.Conjunction([B1, A0])
+        self.assertEqual(conj.key, tuple(sorted([A0.selector_id, B1.selector_id])))
+        self.assertEqual(conj.key, ps.Conjunction([A0, B1]).key)
+        loaded = pickle.loads(pickle.dumps(conj))
+        self.assertIsNone(loaded._key)
+        self.assertEqual(loaded, conj)
+        self.assertEqual(hash(loaded), hash(conj))
+
+        dnf = ps.DNF([A0, B1])
+        dnf_hash = hash(dnf)
+        C2 = ps.EqualitySelector("C", 2)
+        dnf.append_and(C2)
+        self.assertNotEqual(hash(dnf), dnf_hash)
+        expected = ps.DNF([ps.Conjunction([C2, B1]), ps.Conjunction([A0, C2])])
+        self.assertEqual(dnf, expected)
+
+    def test_slots(self):
+        df = pd.DataFrame({"A": np.array([1, 1, 0]), "B": np.array([1, 0, 1])})
+        A1 = ps.EqualitySelector("A", 1)
+        B1 = ps.EqualitySelector("B", 1)
+        with ps.BitSetRepresentation(df, [A1, B1]) as representation:
+            conj = representation.Conjunction([A1, B1])
+            for obj in (A1, ps.IntervalSelector("A", 0, 1), conj):
+                self.assertFalse(hasattr(obj, "__dict__"))
+            loaded = pickle.loads(pickle.dumps(conj))
+            np.testing.assert_array_equal(loaded.representation, [True, False, False])
+            self.assertEqual(A1.size_sg, 2)
+        # the attributes patched by the representation are removed again
+        self.assertFalse(hasattr(A1, "representation"))
+        self.assertFalse(hasattr(A1, "size_sg"))
+
     def test_Disjunction(self):
         from copy import copy  # pylint: disable=import-outside-toplevel
 
@@ -210,6 +278,58 @@ class TestBasics(unittest.TestCase):
         )
         self.assertEqual(selectors, result_selectors)
 
+    def test_sorted_column(self):
+        df = pd.DataFrame(
+            {
+                "A": np.array([1, 1, 0, 3, 3, 4, 5], dtype=int),
+                "B": [0.5, np.nan, 2.5, -1.0, 1.5, np.nan, 3.0],
+            }
+        )
+        for attribute_name in ("A", "B"):
+            for intervals_only in (True, False):
+                selectors = ps.create_numeric_selectors_for_attribute(
+                    df, attribute_name, nbins=3, intervals_only=intervals_only
+                )
+                intervals = [
+                    sel for sel in selectors if isinstance(sel, ps.IntervalSelector)
+                ]
+                self.assertTrue(intervals)
+                # all intervals of an attribute share one order
+                sorted_column = intervals[0].sorted_column
+                self.assertIsNotNone(sorted_column)
+                self.assertTrue(
+                    all(sel.sorted_column is sorted_column for sel in intervals)
+                )
+                for sel in intervals:
+                    expected = ps.IntervalSelector(
+                        attribute_name, sel.lower_bound, sel.upper_bound
+                    ).covers(df)
+                    np.testing.assert_array_equal(sel.covers(df), expected)
+                    np.testing.assert_array_equal(
+                        sel.covers(df.iloc[::-1]), expected[::-1]
+                    )
+        loaded = pickle.loads(pickle.dumps(intervals[0]))
+        np.testing.assert_array_equal(loaded.covers(df), intervals[0].covers(df))
+
+    def test_sorted_column_modified_data(self):
+        df = pd.DataFrame({"a": np.arange(100, dtype=float)})
+        selector = ps.create_numeric_selectors(df, nbins=5)[0]
+        sorted_column = selector.sorted_column
+        self.assertIsNotNone(sorted_column)
+        self.assertEqual(selector.covers(df).sum(), 20)
+        # the column is assigned anew
+        df["a"] = df["a"] + 100
+        self.assertEqual(selector.covers(df).sum(), 0)
+        # rows are appended
+        df.loc[len(df)] = [-1.0]
+        self.assertEqual(selector.covers(df).sum(), 1)
+        # the order is released with the data
+        self.assertIsNotNone(sorted_column._order)
+        del df
+        gc.collect()
+        self.assertIsNone(sorted_column._order)
+        self.assertIsNone(sorted_column._values)
+
 
 if __name__ == "__main__":
     unittest.main()